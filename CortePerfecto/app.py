@@ -2,55 +2,129 @@ import os, base64, streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import io
-import math
-from utils.calculator import CuttingCalculator
-from utils.export_utils import ExportUtils
+import time
+from utils.calculator import CuttingCalculator as ProductionCalculator
+from utils.database import DEFAULT_TEMPLATES, DatabaseManager
+from utils.parallel import ParallelBackend
+from utils.remnants import RemnantStore
+from utils.box_calculator import CalculadorasCajas
+from utils.imposition import impose_boxes
+from utils.circle_packing import impose_round_box
+from utils.sheet_sweep import sheet_sizes, sweep_sheet_sizes
+from utils.layout import PLACEMENT_COLUMNS, Layout
+from utils.assets import AssetPipeline
+from utils.stylesheets import StylesheetCompiler
+from utils.result_cache import length_key
 import streamlit.components.v1 as components
 
 BASE_DIR = os.path.dirname(__file__)
 
+# Vista previa: piezas que se dibujan una por una (con más, vista simplificada por bloques)
+PREVIEW_DETAIL_LIMIT = 5000
+# Figuras de vista previa guardadas por patrón
+PREVIEW_CACHE_SIZE = 64
+# Cálculo en vivo: segundos sin cambios en los datos antes de un cálculo nuevo
+LIVE_DEBOUNCE = 0.4
+# Cada cuántos segundos se mira si venció el plazo de un cálculo en vivo pendiente
+LIVE_TIMER_INTERVAL = 0.1
+# Piezas que entran en la hoja 'Piezas' del Excel (filas de una hoja menos el encabezado)
+EXCEL_MAX_PIECES = 1048575
+
 # -------------------- CLASE CALCULADORA CORREGIDA --------------------
-class CuttingCalculator:
-    def calculate_optimal_cutting(self, sheet_width, sheet_height, cut_width, cut_height):
-        """Calcula el corte óptimo para una hoja dada"""
+class CuttingCalculator(ProductionCalculator):
+    """Calculadora de la app: resultados de una sola hoja sobre utils.calculator
+    
+    La geometría la calcula y la guarda en la caché compartida CuttingCalculator de
+    utils.calculator; aquí solo se arma el resultado por hoja que muestra la app.
+    """
+    
+    # La cuadrícula de la app respeta la orientación de la pieza (modo 'inline' del núcleo)
+    LAYOUT_MODES = {'grid': 'inline', 'guillotine': 'guillotine', 'guillotine3': 'guillotine3'}
+    
+    def calculate_optimal_cutting(self, sheet_width, sheet_height, cut_width, cut_height, mode='grid',
+                                  kerf=0.0, trim=0.0, gripper=0.0):
+        """Calcula el corte óptimo para una hoja dada (usa la caché compartida entre sesiones)
+        
+        `kerf` es el corte de cuchilla entre piezas, `trim` el refile de cada borde y
+        `gripper` la pinza del borde inferior (en cm).
+        """
         try:
-            # Calcular número máximo de cortes en cada dirección
-            cuts_horizontal = math.floor(sheet_width / cut_width)
-            cuts_vertical = math.floor(sheet_height / cut_height)
-            
-            # Calcular cortes totales por hoja
-            cuts_per_sheet = cuts_horizontal * cuts_vertical
-            
-            # Calcular porcentaje de utilización
-            total_sheet_area = sheet_width * sheet_height
-            used_area = cuts_per_sheet * cut_width * cut_height
-            utilization_percentage = (used_area / total_sheet_area) * 100
-            
-            return {
-                'sheet_width': sheet_width,
-                'sheet_height': sheet_height,
-                'cut_width': cut_width,
-                'cut_height': cut_height,
-                'cuts_horizontal': cuts_horizontal,
-                'cuts_vertical': cuts_vertical,
-                'cuts_per_sheet': cuts_per_sheet,
-                'sheets_required': 1,  # Para una hoja
-                'usable_cuts': cuts_per_sheet,
-                'utilization_percentage': utilization_percentage,
-                'wasted_area': total_sheet_area - used_area
-            }
+            layout_mode = self.LAYOUT_MODES[mode]
+            layout = self.calculate_layout(sheet_width, sheet_height, cut_width, cut_height, layout_mode,
+                                           kerf, trim, gripper)
+            return self._sheet_result(self.cost_layout(layout, 1, 0))
         except Exception as e:
             raise Exception(f"Error en cálculo óptimo: {str(e)}")
+    
+    def sheet_cache_key(self, sheet_width, sheet_height, cut_width, cut_height, mode='grid',
+                        kerf=0.0, trim=0.0, gripper=0.0):
+        """Clave del patrón en la caché compartida (la misma que usa calculate_optimal_cutting)"""
+        return self.cache_key(self.LAYOUT_MODES[mode], sheet_width, sheet_height, cut_width, cut_height,
+                              kerf, trim, gripper)
+    
+    def calculate_anytime_cutting(self, sheet_width, sheet_height, cut_width, cut_height, time_budget=2.0,
+                                  kerf=0.0, trim=0.0, gripper=0.0):
+        """Búsqueda progresiva: entrega un resultado cada vez que encuentra un patrón mejor"""
+        try:
+            for result in self.calculate_anytime(sheet_width, sheet_height, cut_width, cut_height, 1, 0,
+                                                 time_budget, kerf, trim, gripper):
+                yield self._sheet_result(result)
+        except Exception as e:
+            raise Exception(f"Error en búsqueda progresiva: {str(e)}")
+    
+    def _sheet_result(self, result):
+        """Lleva un resultado del núcleo a una sola hoja llena con el patrón"""
+        total_sheet_area = result['sheet_width'] * result['sheet_height']
+        used_area = result['cuts_per_sheet'] * result['cut_width'] * result['cut_height']
+        result.update(
+            sheets_required=1,  # Para una hoja
+            usable_cuts=result['cuts_per_sheet'],
+            utilization_percentage=(used_area / total_sheet_area) * 100,
+            wasted_area=total_sheet_area - used_area
+        )
+        return result
 
 # -------------------- CLASE EXPORT UTILS CORREGIDA --------------------
 class ExportUtils:
-    def export_to_excel(self, data):
-        """Exporta datos a Excel"""
+    def export_to_excel(self, data, layout=None):
+        """Exporta datos a Excel (con un Layout agrega la hoja 'Piezas' con sus posiciones)
+
+        El libro se escribe con xlsxwriter en modo constant_memory: las posiciones pasan
+        del Layout a la hoja por tramos y nunca están todas en memoria a la vez.
+        """
         try:
+            # xlsxwriter solo se carga al exportar, no en cada rerun
+            import xlsxwriter
+
             output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df = pd.DataFrame(data)
-                df.to_excel(writer, index=False, sheet_name='Resultados')
+            workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'nan_inf_to_errors': True})
+            header = workbook.add_format({'bold': True})
+
+            sheet = workbook.add_worksheet('Resultados')
+            columns = list(data)
+            sheet.write_row(0, 0, columns, header)
+            rows = len(next(iter(data.values()), []))
+            for row in range(rows):
+                # Celdas vacías donde falta el dato, como las dejaba pandas
+                sheet.write_row(row + 1, 0, [None if pd.isna(data[column][row]) else data[column][row]
+                                             for column in columns])
+            if layout is not None and len(layout) > EXCEL_MAX_PIECES:
+                sheet.write(rows + 2, 0, f"La hoja 'Piezas' tiene solo las primeras {EXCEL_MAX_PIECES:,} de "
+                                         f"{len(layout):,} piezas (límite de filas de Excel)")
+
+            if layout is not None:
+                placements = workbook.add_worksheet('Piezas')
+                placements.write_row(0, 0, PLACEMENT_COLUMNS, header)
+                row = 1
+                for chunk in layout.iter_chunks():
+                    chunk = chunk[:EXCEL_MAX_PIECES - row + 1]
+                    # float32 se redondea a 0.1 µm
+                    for values in chunk.astype(float).round(4).tolist():
+                        placements.write_row(row, 0, values)
+                        row += 1
+                    if row > EXCEL_MAX_PIECES:
+                        break
+            workbook.close()
             return output.getvalue()
         except Exception as e:
             raise Exception(f"Error exportando a Excel: {str(e)}")
@@ -72,49 +146,28 @@ class ExportUtils:
             raise Exception(f"Error exportando a PDF: {str(e)}")
 
 # -------------------- CARGA DE RECURSOS --------------------
-def load_image_base64(filename):
-    """
-    Carga una imagen desde la carpeta assets y la convierte a base64
+# Logo que se prepara al arrancar (miniaturas en static/generated/)
+LOGO_IMAGE = "Imagen2.jpeg"
+
+@st.cache_resource
+def get_asset_pipeline():
+    """Imágenes de assets/ preparadas una vez por proceso y compartidas por todas las sesiones"""
+    pipeline = AssetPipeline()
+    pipeline.get(LOGO_IMAGE)
+    return pipeline
+
+def image_src(filename):
+    """src de una imagen de assets: URL estática de la miniatura o su data URI ya codificado
+    
+    Con server.enableStaticServing el navegador descarga la miniatura una vez y la
+    guarda en caché; sin eso se usa el mismo data URI (pocos KB) en cada recarga.
+    Suma lo enviado en 'image_payload' para informar el peso por recarga.
     """
-    try:
-        # Rutas posibles para encontrar las imágenes
-        possible_paths = [
-            os.path.join("CortePerfecto", "assets", filename),  # Para GitHub
-            os.path.join("assets", filename),                   # Ruta directa
-            os.path.join(BASE_DIR, "assets", filename),         # Ruta absoluta
-            filename                                            # Ruta directa al archivo
-        ]
-        
-        image_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                image_path = path
-                break
-        
-        if image_path:
-            with open(image_path, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode()
-                
-                # Determinar el tipo MIME
-                if filename.lower().endswith('.png'):
-                    mime_type = "png"
-                elif filename.lower().endswith('.jpg') or filename.lower().endswith('.jpeg'):
-                    mime_type = "jpeg"
-                elif filename.lower().endswith('.gif'):
-                    mime_type = "gif"
-                elif filename.lower().endswith('.svg'):
-                    mime_type = "svg+xml"
-                else:
-                    mime_type = "jpeg"
-                
-                return f"data:image/{mime_type};base64,{encoded_string}"
-        else:
-            # Si no encuentra la imagen, usar placeholder
-            return get_placeholder_image()
-            
-    except Exception as e:
-        st.error(f"❌ Error cargando imagen {filename}: {str(e)}")
-        return get_placeholder_image()
+    src = get_asset_pipeline().src(filename, st.get_option("server.enableStaticServing"))
+    if src is None:
+        src = get_placeholder_image()
+    st.session_state.image_payload = st.session_state.get('image_payload', 0) + len(src)
+    return src
 
 def get_placeholder_image():
     """Retorna el SVG placeholder"""
@@ -133,7 +186,7 @@ def get_placeholder_image():
     return f"data:image/svg+xml;base64,{base64.b64encode(svg_placeholder.encode()).decode()}"
 
 def show_floating_bar():
-    img_b64 = load_image_base64("Imagen2.jpeg")
+    img_b64 = image_src(LOGO_IMAGE)
     st.markdown(f"""
     <div id="floatingBar" class="floating-bar" style="margin-bottom:10px;">
         <div class="floating-content">
@@ -149,8 +202,8 @@ def show_floating_bar():
 def show_social_bar():
     """Muestra una barra social con imagen sin marco"""
     
-    # Generar el base64 ANTES de crear el HTML
-    img_b64_social = load_image_base64("Imagen2.jpeg")
+    # Generar el src ANTES de crear el HTML
+    img_b64_social = image_src(LOGO_IMAGE)
     
     social_html = f"""
     <!DOCTYPE html>
@@ -383,20 +436,27 @@ def show_decoration_elements():
     </div>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_stylesheet_compiler():
+    """Hojas de estilo compiladas una vez por proceso y compartidas por todas las sesiones"""
+    return StylesheetCompiler(theme_css)
+
 def load_css():
-    css_path = os.path.join(BASE_DIR, "static", "styles.css")
-    if os.path.exists(css_path):
-        with open(css_path, "r") as f:
-            st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
-
-    # Determinar tema actual
-    dark_mode = st.session_state.get('dark_mode', False)
-    theme_mode = st.session_state.get('theme_mode', 'clasico')
+    """Inyecta la hoja de estilos del tema actual (compilada y minificada una sola vez)"""
     custom_colors = st.session_state.get('custom_colors', {'primary': '#FF69B4', 'secondary': '#FFB6C1'})
-    
+    stylesheet = get_stylesheet_compiler().get(
+        st.session_state.get('theme_mode', 'clasico'),
+        st.session_state.get('dark_mode', False),
+        custom_colors['primary'],
+        custom_colors['secondary']
+    )
+    st.markdown(stylesheet['html'], unsafe_allow_html=True)
+
+def theme_css(theme_mode, dark_mode, primary, secondary):
+    """CSS del tema y modo claro/oscuro con los colores personalizados (sin <style>)"""
     # Convertir colores personalizados a RGB para uso en CSS
-    primary_rgb = tuple(int(custom_colors['primary'][i:i+2], 16) for i in (1, 3, 5))
-    secondary_rgb = tuple(int(custom_colors['secondary'][i:i+2], 16) for i in (1, 3, 5))
+    primary_rgb = tuple(int(primary[i:i+2], 16) for i in (1, 3, 5))
+    secondary_rgb = tuple(int(secondary[i:i+2], 16) for i in (1, 3, 5))
     
     # Colores según el tema y modo
     if theme_mode == 'rosa':
@@ -455,8 +515,7 @@ def load_css():
             hover_bg = "#fef7f7"
 
     # Estilos mejorados con modo oscuro/claro
-    st.markdown(f"""
-    <style>
+    return f"""
         @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700&display=swap');
         
         /* Fondo principal mejorado */
@@ -503,7 +562,7 @@ def load_css():
 
         /* Botones +/- usando colores personalizados */
         .stNumberInput div[data-baseweb="input"] button {{
-            background: linear-gradient(135deg, {custom_colors['primary']}, {custom_colors['secondary']}) !important;
+            background: linear-gradient(135deg, {primary}, {secondary}) !important;
             color: white !important;
             border: none !important;
             border-radius: 8px !important;
@@ -511,14 +570,14 @@ def load_css():
         }}
 
         .stNumberInput div[data-baseweb="input"] button:hover {{
-            background: linear-gradient(135deg, {custom_colors['secondary']}, {custom_colors['primary']}) !important;
+            background: linear-gradient(135deg, {secondary}, {primary}) !important;
             transform: scale(1.1) !important;
             box-shadow: 0 4px 12px rgba({primary_rgb[0]}, {primary_rgb[1]}, {primary_rgb[2]}, 0.4) !important;
         }}
 
         /* Botones principales con colores personalizados */
         .stButton>button {{
-            background: linear-gradient(135deg, {custom_colors['primary']}, {custom_colors['secondary']}) !important;
+            background: linear-gradient(135deg, {primary}, {secondary}) !important;
             color: white !important;
             border: none !important;
             border-radius: 12px !important;
@@ -532,7 +591,7 @@ def load_css():
         }}
 
         .stButton>button:hover {{
-            background: linear-gradient(135deg, {custom_colors['secondary']}, {custom_colors['primary']}) !important;
+            background: linear-gradient(135deg, {secondary}, {primary}) !important;
             transform: translateY(-3px) !important;
             box-shadow: 0 8px 25px rgba({primary_rgb[0]}, {primary_rgb[1]}, {primary_rgb[2]}, 0.5) !important;
         }}
@@ -690,8 +749,7 @@ def load_css():
             border-right: 2px solid {card_border} !important;
         }}
 
-    </style>
-    """, unsafe_allow_html=True)
+    """
 
 def load_js():
     js_path = os.path.join(BASE_DIR, "static", "script.js")
@@ -719,234 +777,202 @@ def initialize_app():
     if 'calculator_mode' not in st.session_state:
         st.session_state.calculator_mode = 'normal'
 
-# -------------------- CALCULADORAS ESPECIALIZADAS --------------------
-class CalculadorasCajas:
-    @staticmethod
-    def calcular_tapa_libro(espesor, largo, ancho, alto, acabado_virada=1.0, espacio_ranura=0.3):
-        """Calculadora Tapa Libro - Basada en Excel 'Tampa Livro'"""
-        resultados = {}
-        
-        # Variables específicas de tapa libro
-        canaleta = ((espesor * 2) / 10) + 0.1
-        
-        # MEDIDAS CARTÓN - MÉTODO CORTE SEPARADO
-        resultados['base'] = {
-            'medida': f"{largo} x {ancho}",
-            'descripcion': 'Base - 1 pieza'
-        }
-        
-        resultados['lateral_largo'] = {
-            'medida': f"{largo + ((espesor/10)*2):.1f} x {alto}",
-            'descripcion': 'Lateral (largo) - 2 piezas'
-        }
-        
-        resultados['lateral_ancho'] = {
-            'medida': f"{ancho} x {alto}",
-            'descripcion': 'Lateral (ancho) - 2 piezas'
-        }
-        
-        # Cálculos para tapa
-        tapa_largo = largo + canaleta + canaleta
-        tapa_ancho = ancho + ((espesor * 2) / 10) + acabado_virada
-        
-        resultados['tapa'] = {
-            'medida': f"{tapa_largo:.1f} x {tapa_ancho:.1f}",
-            'descripcion': 'Tapa - 2 piezas'
-        }
-        
-        resultados['lomo'] = {
-            'medida': f"{tapa_largo:.1f} x {alto}",
-            'descripcion': 'Lomo tapa'
-        }
-        
-        # MEDIDAS CARTÓN - MÉTODO CORTE Y VINCO
-        resultados['placa_base'] = {
-            'medida': f"{largo + alto + alto:.1f} x {ancho + alto + alto:.1f}",
-            'descripcion': 'Tamaño placa de cartón - BASE'
-        }
-        
-        # MEDIDAS REVESTIMIENTO PAPEL
-        resultados['parte_interna_base'] = {
-            'medida': f"{largo + alto + alto:.1f} x {ancho + alto + alto + acabado_virada:.1f}",
-            'descripcion': 'Parte interna base'
-        }
-        
-        resultados['parte_externa_base_banda'] = {
-            'medida': f"{(ancho + (espesor*2)/10) + largo + (ancho + (espesor*2)/10) + acabado_virada + acabado_virada:.1f} x {alto + acabado_virada + acabado_virada:.1f}",
-            'descripcion': 'Parte externa base banda'
-        }
-        
-        resultados['parte_externa_tapa'] = {
-            'medida': f"{tapa_largo + acabado_virada + acabado_virada:.1f} x {tapa_ancho + alto + tapa_ancho + acabado_virada + acabado_virada + acabado_virada + acabado_virada:.1f}",
-            'descripcion': 'Parte externa tapa'
-        }
-        
-        resultados['parte_interna_tapa'] = {
-            'medida': f"{largo + espesor*2/10:.1f} x {tapa_ancho + 2:.1f}",
-            'descripcion': 'Parte interna tapa'
-        }
-        
-        resultados['canaleta'] = {
-            'medida': f"{canaleta:.1f}",
-            'descripcion': 'Canaleta (cm)'
-        }
-        
-        return resultados
-
-    @staticmethod
-    def calcular_tapa_suelta(espesor, largo, ancho, alto, altura_tapa=3.0, acabado_virada=1.5):
-        """Calculadora Tapa Suelta - Basada en Excel 'Tampa de solta'"""
-        resultados = {}
-        
-        # CONSTANTE: 1 mm extra para todas las medidas de tapa (0.1 cm)
-        EXTRA_TAPA = 0.1
-        
-        # MEDIDAS CARTÓN - MÉTODO CORTE SEPARADO
-        resultados['base'] = {
-            'medida': f"{largo} x {ancho}",
-            'descripcion': 'Base - 1 pieza'
-        }
-        
-        resultados['lateral_largo'] = {
-            'medida': f"{largo + ((espesor/10)*2):.1f} x {alto}",
-            'descripcion': 'Lateral (largo) - 2 piezas'
-        }
-        
-        resultados['lateral_ancho'] = {
-            'medida': f"{ancho} x {alto}",
-            'descripcion': 'Lateral (ancho) - 2 piezas'
-        }
-        
-        # Tampa - CON 1mm EXTRA
-        tapa_largo = largo + ((espesor * 3) / 10) + EXTRA_TAPA
-        tapa_ancho = ancho + ((espesor * 3) / 10) + EXTRA_TAPA
-        
-        resultados['tapa'] = {
-            'medida': f"{tapa_largo:.1f} x {tapa_ancho:.1f}",
-            'descripcion': 'Tapa - 1 pieza'
-        }
-        
-        resultados['tapa_lateral_largo'] = {
-            'medida': f"{tapa_largo + ((espesor/10)*2) + EXTRA_TAPA:.1f} x {altura_tapa + EXTRA_TAPA:.1f}",
-            'descripcion': 'Tapa lateral (largo) - 2 piezas'
-        }
-        
-        resultados['tapa_lateral_ancho'] = {
-            'medida': f"{tapa_ancho + EXTRA_TAPA:.1f} x {altura_tapa + EXTRA_TAPA:.1f}",
-            'descripcion': 'Tapa lateral (ancho) - 2 piezas'
-        }
-        
-        # MEDIDAS CARTÓN - MÉTODO CORTE Y VINCO - CON 1mm EXTRA
-        resultados['placa_base'] = {
-            'medida': f"{largo + alto + alto:.1f} x {ancho + alto + alto:.1f}",
-            'descripcion': 'Tamaño placa de cartón - BASE'
-        }
-        
-        resultados['placa_tapa'] = {
-            'medida': f"{tapa_largo + altura_tapa + altura_tapa + EXTRA_TAPA:.1f} x {tapa_ancho + altura_tapa + altura_tapa + EXTRA_TAPA:.1f}",
-            'descripcion': 'Tamaño placa de cartón - TAPA'
-        }
-        
-        # MEDIDAS REVESTIMIENTO PAPEL - CON 1mm EXTRA
-        resultados['parte_interna_base'] = {
-            'medida': f"{largo + alto + alto:.1f} x {ancho + alto + alto:.1f}",
-            'descripcion': 'Parte interna base'
-        }
-        
-        resultados['banda_externa_base'] = {
-            'medida': f"{(largo + ((espesor/10)*2)) + (largo + ((espesor/10)*2)) + (ancho) + (ancho) + (espesor*4/10):.1f} x {alto + acabado_virada + acabado_virada:.1f}",
-            'descripcion': 'Banda externa base'
-        }
-        
-        resultados['fondo_base'] = {
-            'medida': f"{largo} x {ancho}",
-            'descripcion': 'Fondo base'
-        }
-        
-        resultados['parte_interna_tapa'] = {
-            'medida': f"{tapa_largo + altura_tapa + altura_tapa + EXTRA_TAPA:.1f} x {tapa_ancho + altura_tapa + altura_tapa + EXTRA_TAPA:.1f}",
-            'descripcion': 'Parte interna tapa'
-        }
-        
-        resultados['parte_externa_tapa'] = {
-            'medida': f"{tapa_largo + acabado_virada + acabado_virada + EXTRA_TAPA:.1f} x {tapa_ancho + acabado_virada + acabado_virada + EXTRA_TAPA:.1f}",
-            'descripcion': 'Parte externa tapa'
-        }
-        
-        return resultados
-
-    @staticmethod
-    def calcular_redonda(espesor_banda, diametro_base, altura_banda_base, altura_banda_tapa):
-        """Calculadora Redonda - Basada en Excel 'Caja Redonda'"""
-        resultados = {}
-        
-        # MEDIDAS CARTÓN
-        resultados['base'] = {
-            'medida': f"{diametro_base}",
-            'descripcion': 'Base circular (diámetro)'
-        }
-        
-        resultados['banda_base'] = {
-            'medida': f"{(diametro_base * 3.14) + 1:.1f} x {altura_banda_base}",
-            'descripcion': 'Banda base'
-        }
-        
-        resultados['tapa'] = {
-            'medida': f"{diametro_base + espesor_banda*3/10 + 0.1:.1f}",
-            'descripcion': 'Tapa circular (diámetro)'
-        }
-        
-        diametro_tapa = diametro_base + espesor_banda*3/10 + 0.1
-        resultados['banda_tapa'] = {
-            'medida': f"{(diametro_tapa * 3.14) + 1:.1f} x {altura_banda_tapa}",
-            'descripcion': 'Banda tapa'
-        }
-        
-        return resultados
-
 # -------------------- FUNCIONES DE CÁLCULO --------------------
-def calculate_optimal(sheet_width, sheet_height, cut_width, cut_height):
-    """Calcula el corte óptimo para modo normal"""
+def calculate_optimal(sheet_width, sheet_height, cut_width, cut_height, mode='grid', margins=(0.0, 0.0, 0.0)):
+    """Calcula el corte óptimo para modo normal (margins = kerf, refile y pinza en cm)"""
     try:
         result = st.session_state.calculator.calculate_optimal_cutting(
-            sheet_width, sheet_height, cut_width, cut_height
+            sheet_width, sheet_height, cut_width, cut_height, mode, *margins
         )
         st.session_state.calculation_result = result
         st.success("✅ Cálculo completado exitosamente")
     except Exception as e:
         st.error(f"Error en el cálculo: {str(e)}")
 
+def calculate_live(sheet_width, sheet_height, cut_width, cut_height, mode, margins, status):
+    """Cálculo en vivo: recalcula al cambiar los datos, sin apretar "Calcular Óptimo"
+    
+    Si el resultado ya está en la caché compartida (por ejemplo al volver a un valor
+    anterior) se muestra al instante. Un cálculo nuevo se hace enseguida si los datos
+    llevaban LIVE_DEBOUNCE segundos sin cambiar; si no, la recarga no calcula nada y
+    queda pendiente: live_debounce_timer lo hace cuando pasan LIVE_DEBOUNCE segundos
+    sin cambios, con los últimos valores. Así recorrer valores con +/- no hace un
+    cálculo por cada paso ni demora las recargas intermedias.
+    """
+    calculator = st.session_state.calculator
+    key = calculator.sheet_cache_key(sheet_width, sheet_height, cut_width, cut_height, mode, *margins)
+    if key == st.session_state.get('live_key') and st.session_state.calculation_result:
+        st.session_state.live_pending = None
+        return
+    now = time.monotonic()
+    if key not in calculator.cache:
+        if key != st.session_state.get('live_pending'):
+            # Datos nuevos: el plazo sin cambios empieza de nuevo
+            last_change = st.session_state.get('live_changed_at', 0.0)
+            st.session_state.live_pending = key
+            st.session_state.live_changed_at = now
+        else:
+            last_change = st.session_state.live_changed_at
+        if now - last_change < LIVE_DEBOUNCE:
+            status.caption("⏳ Se calcula al dejar de cambiar los datos...")
+            live_debounce_timer()
+            return
+    try:
+        st.session_state.calculation_result = calculator.calculate_optimal_cutting(
+            sheet_width, sheet_height, cut_width, cut_height, mode, *margins
+        )
+        st.session_state.live_key = key
+    except Exception as e:
+        st.error(f"Error en el cálculo: {str(e)}")
+    st.session_state.live_pending = None
+    st.session_state.live_changed_at = now
+
+@st.fragment(run_every=LIVE_TIMER_INTERVAL)
+def live_debounce_timer():
+    """Recarga la página para el cálculo en vivo pendiente cuando los datos dejan de cambiar
+    
+    Solo se dibuja mientras hay un cálculo pendiente; cada LIVE_TIMER_INTERVAL segundos
+    mira si pasó el plazo sin cambios.
+    """
+    if not st.session_state.get('live_mode') or st.session_state.get('live_pending') is None:
+        return
+    if time.monotonic() - st.session_state.live_changed_at >= LIVE_DEBOUNCE:
+        st.rerun()
+
+@st.cache_resource
+def get_parallel_backend():
+    """Pool de procesos compartido por todas las sesiones (CORTE_WORKERS procesos)"""
+    return ParallelBackend()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_stock_catalogue():
+    """Pliegos del catálogo: la tabla templates si hay base de datos, si no los predefinidos"""
+    if os.getenv('DATABASE_URL') or os.getenv('PGHOST'):
+        try:
+            return DatabaseManager().get_templates()
+        except Exception:
+            pass
+    return [
+        {'name': name, 'description': description, 'sheet_width': width, 'sheet_height': height, 'grammage': grammage}
+        for name, description, width, height, grammage in DEFAULT_TEMPLATES
+    ]
+
+def run_anytime_search(preview_slot, report_slot):
+    """Ejecuta la búsqueda progresiva mostrando cada mejora en la vista previa y el reporte"""
+    sheet_width, sheet_height, cut_width, cut_height, time_budget, margins = st.session_state.pop('anytime_request')
+    progress = st.empty()
+    try:
+        for step, result in enumerate(st.session_state.calculator.calculate_anytime_cutting(
+                sheet_width, sheet_height, cut_width, cut_height, time_budget, *margins)):
+            st.session_state.calculation_result = result
+            with preview_slot.container():
+                show_cutting_preview(key=f"anytime_preview_{step}")
+            with report_slot.container():
+                show_cut_report(key=f"anytime_report_{step}")
+            progress.info(f"⏱️ Mejor hasta ahora: {result['cuts_per_sheet']} cortes por hoja "
+                          f"(brecha {result['gap'] * 100:.2f}%, {result['elapsed']:.2f} s)")
+        result = st.session_state.calculation_result
+        if result and result['gap'] == 0:
+            progress.success("✅ Búsqueda completa: el patrón es óptimo para el área de la hoja")
+        elif result:
+            progress.success(f"✅ Búsqueda terminada: brecha de {result['gap'] * 100:.2f}% con la cota por área")
+    except Exception as e:
+        progress.error(f"Error en el cálculo: {str(e)}")
+
+@st.cache_resource
+def get_remnant_store():
+    """Inventario de sobrantes compartido: tabla remnants si hay base de datos, si no en memoria"""
+    if os.getenv('DATABASE_URL') or os.getenv('PGHOST'):
+        try:
+            return RemnantStore(DatabaseManager())
+        except Exception:
+            pass
+    return RemnantStore()
+
+def plan_remnants(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage, mode='grid'):
+    """Planifica el trabajo usando primero los sobrantes del inventario"""
+    try:
+        st.session_state.remnant_plan = ProductionCalculator().plan_with_remnants(
+            sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+            get_remnant_store().index, mode
+        )
+    except Exception as e:
+        st.error(f"Error planificando con sobrantes: {str(e)}")
+
+def register_remnant_plan():
+    """Registra el trabajo: consume los sobrantes usados y guarda los recortes nuevos"""
+    try:
+        nuevos = get_remnant_store().apply_plan(st.session_state.remnant_plan, source='Corte Normal')
+        st.session_state.remnant_plan = None
+        st.success(f"✅ Trabajo registrado: {len(nuevos)} sobrantes nuevos en el inventario")
+    except Exception as e:
+        st.error(f"Error registrando el trabajo: {str(e)}")
+
+def select_stock(cut_width, cut_height, quantity, cost_per_sheet, rank_by, mode='grid'):
+    """Busca los pliegos del catálogo más convenientes para el corte"""
+    try:
+        st.session_state.stock_selection = ProductionCalculator().select_stock(
+            cut_width, cut_height, quantity, load_stock_catalogue(),
+            cost_per_sheet=cost_per_sheet, mode=mode, rank_by=rank_by, backend=get_parallel_backend()
+        )
+    except Exception as e:
+        st.error(f"Error buscando pliegos: {str(e)}")
+
+def run_sheet_sweep(width_range, height_range, step_mm, cortes):
+    """Evalúa la lista de cortes en todos los tamaños de pliego de los rangos"""
+    try:
+        cuts = [
+            (float(fila['Ancho (cm)']), float(fila['Alto (cm)']), float(fila['Peso']))
+            for fila in cortes if fila.get('Ancho (cm)') and fila.get('Alto (cm)')
+        ]
+        st.session_state.sheet_sweep = sweep_sheet_sizes(
+            sheet_sizes(*width_range, step_mm), sheet_sizes(*height_range, step_mm), cuts
+        )
+    except Exception as e:
+        st.error(f"Error en el barrido de pliegos: {str(e)}")
+
+def parametros_caja(modo):
+    """Parámetros de la caja actual tomados de los campos de la interfaz"""
+    if modo == 'tapa_libro':
+        return {
+            'espesor': st.session_state.espesor_caja,
+            'largo': st.session_state.largo_caja,
+            'ancho': st.session_state.ancho_caja,
+            'alto': st.session_state.alto_caja,
+            'acabado_virada': st.session_state.acabado_virada,
+            'espacio_ranura': st.session_state.espacio_ranura
+        }
+    elif modo == 'tapa_suelta':
+        return {
+            'espesor': st.session_state.espesor_caja,
+            'largo': st.session_state.largo_caja,
+            'ancho': st.session_state.ancho_caja,
+            'alto': st.session_state.alto_caja,
+            'altura_tapa': st.session_state.altura_tapa,
+            'acabado_virada': st.session_state.acabado_virada
+        }
+    elif modo == 'redonda':
+        return {
+            'espesor_banda': st.session_state.espesor_banda,
+            'diametro_base': st.session_state.diametro_base,
+            'altura_banda_base': st.session_state.altura_banda_base,
+            'altura_banda_tapa': st.session_state.altura_banda_tapa
+        }
+    raise ValueError(f"Modo de caja desconocido: {modo}")
+
 def calcular_caja_especializada():
     """Calcula medidas para calculadoras especializadas"""
     try:
         modo = st.session_state.calculator_mode
         calculadora = CalculadorasCajas()
+        parametros = parametros_caja(modo)
         
         if modo == 'tapa_libro':
-            resultados = calculadora.calcular_tapa_libro(
-                st.session_state.espesor_caja,
-                st.session_state.largo_caja,
-                st.session_state.ancho_caja,
-                st.session_state.alto_caja,
-                st.session_state.acabado_virada,
-                st.session_state.espacio_ranura
-            )
+            resultados = calculadora.calcular_tapa_libro(**parametros)
         elif modo == 'tapa_suelta':
-            resultados = calculadora.calcular_tapa_suelta(
-                st.session_state.espesor_caja,
-                st.session_state.largo_caja,
-                st.session_state.ancho_caja,
-                st.session_state.alto_caja,
-                st.session_state.altura_tapa,
-                st.session_state.acabado_virada
-            )
+            resultados = calculadora.calcular_tapa_suelta(**parametros)
         elif modo == 'redonda':
-            resultados = calculadora.calcular_redonda(
-                st.session_state.espesor_banda,
-                st.session_state.diametro_base,
-                st.session_state.altura_banda_base,
-                st.session_state.altura_banda_tapa
-            )
+            resultados = calculadora.calcular_redonda(**parametros)
         
         st.session_state.calculation_result = resultados
         st.success("✅ Cálculo de caja completado exitosamente")
@@ -954,19 +980,62 @@ def calcular_caja_especializada():
     except Exception as e:
         st.error(f"Error en el cálculo de caja: {str(e)}")
 
+def calcular_imposicion(sheet_width, sheet_height, cantidad_cajas, kerf, tiempo_busqueda=None):
+    """Acomoda todas las piezas de cartón de la tirada en pliegos"""
+    try:
+        modo = st.session_state.calculator_mode
+        st.session_state.imposition_result = impose_boxes(
+            modo, parametros_caja(modo), cantidad_cajas, sheet_width, sheet_height, kerf,
+            time_budget=tiempo_busqueda or None
+        )
+        # Las bases y tapas de la caja redonda son discos: se acomodan también en tresbolillo
+        st.session_state.disc_result = impose_round_box(
+            parametros_caja(modo), cantidad_cajas, sheet_width, sheet_height, kerf
+        ) if modo == 'redonda' else None
+        st.success("✅ Imposición calculada exitosamente")
+    except Exception as e:
+        st.error(f"Error en la imposición: {str(e)}")
+
 def clear_all_fields():
     """Limpia todos los campos y resultados"""
     st.session_state.calculation_result = None
+    st.session_state.stock_selection = None
+    st.session_state.remnant_plan = None
+    st.session_state.sheet_sweep = None
     st.success("🗑️ Campos limpiados")
     st.rerun()
 
-def show_cutting_preview():
+def show_cutting_preview(key=None):
     """Muestra la vista previa del corte (solo para modo normal)"""
     if not st.session_state.calculation_result or st.session_state.calculator_mode != 'normal':
         return
         
     result = st.session_state.calculation_result
+    layout = Layout.from_result(result)
+    figure_key = (
+        tuple(length_key(result.get(name, 0.0)) for name in ('sheet_width', 'sheet_height', 'trim', 'gripper', 'kerf')),
+        layout.blocks.tobytes()
+    )
+    fig = cached_preview_figure(figure_key, result)
+    st.plotly_chart(fig, use_container_width=True, key=key)
+
+@st.cache_data(max_entries=PREVIEW_CACHE_SIZE, show_spinner=False)
+def cached_preview_figure(figure_key, _result):
+    """Figura de la vista previa guardada para todas las sesiones que tienen el mismo patrón
     
+    La clave son las medidas de la hoja y los bloques del Layout, así que recalcular con
+    los mismos datos (o con otra cantidad u otro gramaje) no vuelve a armar la figura.
+    Cada llamada recibe su propia copia: una sesión que la modifique no altera las demás.
+    """
+    return cutting_preview_figure(_result)
+
+def cutting_preview_figure(result):
+    """Figura de Plotly con la hoja, el área aprovechable y las piezas del resultado
+    
+    Hasta PREVIEW_DETAIL_LIMIT piezas se dibujan todas como una sola traza (rectángulos
+    separados por NaN); con más se dibuja una vista simplificada: cada bloque relleno con
+    sus bordes de columnas y filas y la cantidad de piezas anotada.
+    """
     # Crear gráfico con Plotly
     fig = go.Figure()
     
@@ -979,20 +1048,45 @@ def show_cutting_preview():
         fillcolor="rgba(255, 182, 193, 0.2)"
     )
     
-    # Añadir rectángulos de los cortes
-    for i in range(result['cuts_horizontal']):
-        for j in range(result['cuts_vertical']):
-            x0 = i * result['cut_width']
-            y0 = j * result['cut_height']
-            x1 = x0 + result['cut_width']
-            y1 = y0 + result['cut_height']
-            
-            fig.add_shape(
-                type="rect",
-                x0=x0, y0=y0, x1=x1, y1=y1,
-                line=dict(color="rgba(255, 20, 147, 0.8)", width=2),
-                fillcolor="rgba(255, 105, 180, 0.3)"
-            )
+    trim, gripper = result.get('trim', 0.0), result.get('gripper', 0.0)
+    
+    # Área aprovechable (sin refile ni pinza)
+    if trim or gripper:
+        fig.add_shape(
+            type="rect",
+            x0=trim, y0=trim + gripper,
+            x1=result['sheet_width'] - trim, y1=result['sheet_height'] - trim,
+            line=dict(color="rgba(255, 105, 180, 0.6)", width=1, dash="dash")
+        )
+    
+    # Añadir los cortes como una sola traza (una forma por pieza hace la figura cuadrática)
+    layout = Layout.from_result(result)
+    if len(layout) <= PREVIEW_DETAIL_LIMIT:
+        x, y = layout.piece_path()
+        fig.add_trace(go.Scatter(
+            x=x, y=y, mode="lines", fill="toself", hoverinfo="skip",
+            line=dict(color="rgba(255, 20, 147, 0.8)", width=2),
+            fillcolor="rgba(255, 105, 180, 0.3)"
+        ))
+    else:
+        # Vista simplificada: bloques rellenos y bordes de columnas y filas
+        x, y = layout.block_path()
+        fig.add_trace(go.Scatter(
+            x=x, y=y, mode="lines", fill="toself", hoverinfo="skip",
+            line=dict(color="rgba(255, 20, 147, 0.8)", width=2),
+            fillcolor="rgba(255, 105, 180, 0.3)"
+        ))
+        x, y = layout.grid_path()
+        fig.add_trace(go.Scatter(
+            x=x, y=y, mode="lines", hoverinfo="skip",
+            line=dict(color="rgba(255, 20, 147, 0.6)", width=1)
+        ))
+        fig.add_annotation(
+            x=result['sheet_width'] / 2, y=result['sheet_height'],
+            text=f"{len(layout):,} piezas (vista simplificada)",
+            showarrow=False, yshift=12,
+            font=dict(color="rgba(255, 20, 147, 0.9)")
+        )
     
     # Configurar el layout - MODO PREDETERMINADO A PAN (MOVER)
     fig.update_layout(
@@ -1012,7 +1106,7 @@ def show_cutting_preview():
         )
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 def show_caja_report():
     """Muestra el reporte de medidas de caja"""
@@ -1023,14 +1117,164 @@ def show_caja_report():
     
     # Crear DataFrame con los resultados
     data = {
-        "Pieza": [resultados[key]['descripcion'] for key in resultados],
-        "Medidas (cm)": [resultados[key]['medida'] for key in resultados]
+        "Pieza": [pieza.descripcion for pieza in resultados],
+        "Medidas (cm)": [pieza.medida() for pieza in resultados]
+    }
+    
+    df = pd.DataFrame(data)
+    st.dataframe(df, hide_index=True, use_container_width=True)
+
+def show_imposition_report():
+    """Muestra cuántos pliegos necesita la tirada de cajas y sus patrones de corte"""
+    imposicion = st.session_state.get('imposition_result')
+    if not imposicion or imposicion['box_type'] != st.session_state.calculator_mode:
+        return
+    
+    col_pliegos, col_desperdicio = st.columns(2)
+    with col_pliegos:
+        st.metric("Pliegos necesarios", imposicion['total_boards'])
+    with col_desperdicio:
+        st.metric("Desperdicio", f"{imposicion['waste_percentage']:.1f}%")
+    
+    for pieza in imposicion['unplaced']:
+        st.error(f"⚠️ La pieza '{pieza['item']}' ({pieza['width']:.1f} x {pieza['height']:.1f} cm) no cabe en el pliego")
+    
+    data = {
+        "Patrón": [f"#{i + 1}" for i in range(len(imposicion['patterns']))],
+        "Repeticiones": [pattern['repeat'] for pattern in imposicion['patterns']],
+        "Piezas por pliego": [len(pattern['placements']) for pattern in imposicion['patterns']],
+        "Utilización (%)": [f"{pattern['utilization_percentage']:.1f}" for pattern in imposicion['patterns']]
     }
     
     df = pd.DataFrame(data)
     st.dataframe(df, hide_index=True, use_container_width=True)
+    
+    if imposicion['box_type'] == 'redonda':
+        show_disc_report()
 
-def show_cut_report():
+def show_disc_report():
+    """Muestra los discos por pliego de la caja redonda con cuadrícula, tresbolillo y filas mixtas"""
+    discos = st.session_state.get('disc_result')
+    if not discos:
+        return
+    
+    st.markdown("#### ⭕ Discos de Base y Tapa")
+    nombres = {'square': 'Cuadrícula', 'hexagonal': 'Tresbolillo', 'mixed': 'Mixto'}
+    df = pd.DataFrame([
+        {
+            'Disco': pieza,
+            'Diámetro (cm)': f"{disco['diameter']:.1f}",
+            'Cuadrícula': disco['square'],
+            'Tresbolillo': disco['hexagonal'],
+            'Mixto': disco['mixed'],
+            'Mejor': nombres[disco['arrangement']],
+            'Utilización (%)': f"{disco['utilization_percentage']:.1f}"
+        }
+        for pieza, disco in (('Base', discos['base']), ('Tapa', discos['lid']))
+    ])
+    st.dataframe(df, hide_index=True, use_container_width=True)
+    
+    if discos['boards_required'] is None:
+        st.error("⚠️ Los discos no caben en el pliego")
+        return
+    col_discos, col_ahorro = st.columns(2)
+    with col_discos:
+        st.metric("Pliegos para discos", discos['boards_required'])
+    with col_ahorro:
+        st.metric("Ahorro vs. cuadrícula", discos['square_boards_required'] - discos['boards_required'])
+    if discos['shared_sheets']:
+        st.caption("Conviene cortar bases y tapas en los mismos pliegos")
+
+def show_remnant_plan():
+    """Muestra qué sobrantes se usan y cuántas hojas nuevas hacen falta"""
+    plan = st.session_state.get('remnant_plan')
+    if not plan:
+        return
+    
+    col_sobrantes, col_hojas = st.columns(2)
+    with col_sobrantes:
+        st.metric("Piezas de sobrantes", f"{plan['pieces_from_remnants']} de {plan['quantity']}")
+    with col_hojas:
+        st.metric("Hojas nuevas", plan['sheets_required'])
+    
+    if plan['remnants_used']:
+        df = pd.DataFrame([
+            {
+                'Sobrante': uso['remnant']['id'],
+                'Medida (cm)': f"{float(uso['remnant']['width']):.1f} x {float(uso['remnant']['height']):.1f}",
+                'Piezas': uso['pieces']
+            }
+            for uso in plan['remnants_used']
+        ])
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    else:
+        st.info("No hay sobrantes donde quepa el corte; se usan hojas nuevas")
+    st.caption(f"Al terminar quedan {len(plan['new_remnants'])} recortes reutilizables")
+    if st.button("✅ Registrar Trabajo", use_container_width=True, key="register_remnants"):
+        register_remnant_plan()
+
+def show_sheet_sweep():
+    """Muestra el mapa de calor de utilización y los mejores tamaños de pliego"""
+    barrido = st.session_state.get('sheet_sweep')
+    if not barrido:
+        return
+    
+    fig = go.Figure(go.Heatmap(
+        x=barrido['sheet_widths'],
+        y=barrido['sheet_heights'],
+        z=barrido['utilization_percentage'],
+        colorscale="RdPu",
+        colorbar=dict(title="%"),
+        hovertemplate="%{x:.1f} x %{y:.1f} cm<br>Utilización: %{z:.1f}%<extra></extra>"
+    ))
+    fig.update_layout(
+        title="Utilización por Tamaño de Pliego",
+        xaxis_title="Ancho (cm)",
+        yaxis_title="Alto (cm)",
+        height=450,
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    if not barrido['top']:
+        st.warning("⚠️ En ningún tamaño del rango caben todos los cortes")
+        return
+    df = pd.DataFrame([
+        {
+            'Pliego (cm)': f"{opcion['sheet_width']:.1f} x {opcion['sheet_height']:.1f}",
+            'Utilización (%)': f"{opcion['utilization_percentage']:.1f}"
+        }
+        for opcion in barrido['top']
+    ])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+def show_stock_selection():
+    """Muestra las mejores opciones de pliego del catálogo"""
+    seleccion = st.session_state.get('stock_selection')
+    if not seleccion:
+        return
+    if not seleccion['options']:
+        st.warning("⚠️ El corte no cabe en ningún pliego del catálogo")
+        return
+    
+    df = pd.DataFrame([
+        {
+            'Pliego': opcion['stock'].get('name', ''),
+            'Medida (cm)': f"{opcion['sheet_width']:.1f} x {opcion['sheet_height']:.1f}",
+            'Cortes por hoja': opcion['cuts_per_sheet'],
+            'Pliegos': opcion['sheets_required'],
+            'Desperdicio (cm²)': round(opcion['waste_area'], 1),
+            'Utilización': f"{opcion['utilization_percentage']:.1f}%",
+            'Costo total': round(opcion['total_cost'], 2)
+        }
+        for opcion in seleccion['options']
+    ])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.caption(f"Se calcularon {seleccion['evaluated']} de {seleccion['candidates']} pliegos que admiten el corte; "
+               f"el resto se descartó por cota de área")
+
+def show_cut_report(key=None):
     """Muestra el reporte de cortes (solo para modo normal)"""
     if not st.session_state.calculation_result or st.session_state.calculator_mode != 'normal':
         return
@@ -1046,6 +1290,7 @@ def show_cut_report():
             "Alto del corte",
             "Cortes horizontales",
             "Cortes verticales",
+            "Cortes por hoja",
             "Utilización (%)"
         ],
         "Valor": [
@@ -1053,14 +1298,26 @@ def show_cut_report():
             f"{result.get('sheet_height', 0):.1f} cm",
             f"{result.get('cut_width', 0):.1f} cm",
             f"{result.get('cut_height', 0):.1f} cm",
-            result.get('cuts_horizontal', 0),
-            result.get('cuts_vertical', 0),
+            # En patrones mezclados no hay filas/columnas uniformes
+            result.get('cuts_horizontal') if result.get('cuts_horizontal') is not None else "—",
+            result.get('cuts_vertical') if result.get('cuts_vertical') is not None else "—",
+            result.get('cuts_per_sheet', 0),
             f"{result.get('utilization_percentage', 0):.2f}%"
         ]
     }
     
+    # Márgenes de corte usados en el cálculo
+    if result.get('kerf') or result.get('trim') or result.get('gripper'):
+        data["Métrica"] += ["Corte de cuchilla", "Refile por borde", "Pinza"]
+        data["Valor"] += [f"{result.get(name, 0):.2f} cm" for name in ('kerf', 'trim', 'gripper')]
+    
+    # Búsqueda progresiva: distancia a la cota superior por área
+    if 'upper_bound' in result:
+        data["Métrica"] += ["Cota superior por área", "Brecha de optimalidad"]
+        data["Valor"] += [result['upper_bound'], f"{result['gap'] * 100:.2f}%"]
+    
     df = pd.DataFrame(data)
-    st.dataframe(df, hide_index=True, use_container_width=True)
+    st.dataframe(df, hide_index=True, use_container_width=True, key=key)
 
 def export_excel():
     """Exporta los resultados a Excel"""
@@ -1094,11 +1351,18 @@ def export_excel():
             # Modos especializados
             resultados = st.session_state.calculation_result
             filtered_data = {
-                "Pieza": [resultados[key]['descripcion'] for key in resultados],
-                "Medidas (cm)": [resultados[key]['medida'] for key in resultados]
+                "Pieza": [pieza.descripcion for pieza in resultados],
+                "Medidas (cm)": [pieza.medida() for pieza in resultados],
+                # Columnas numéricas para poder sumar o filtrar en la hoja de cálculo
+                "Ancho (cm)": [pieza.ancho for pieza in resultados],
+                "Alto (cm)": [pieza.alto for pieza in resultados],
+                "Cantidad": [pieza.cantidad for pieza in resultados]
             }
         
-        excel_data = st.session_state.export_utils.export_to_excel(filtered_data)
+        layout = None
+        if st.session_state.calculator_mode == 'normal':
+            layout = Layout.from_result(st.session_state.calculation_result)
+        excel_data = st.session_state.export_utils.export_to_excel(filtered_data, layout)
         
         st.download_button(
             label="📊 Descargar Excel",
@@ -1142,8 +1406,8 @@ def export_pdf():
             # Modos especializados
             resultados = st.session_state.calculation_result
             filtered_data = {
-                "Pieza": [resultados[key]['descripcion'] for key in resultados],
-                "Medidas (cm)": [resultados[key]['medida'] for key in resultados]
+                "Pieza": [pieza.descripcion for pieza in resultados],
+                "Medidas (cm)": [pieza.medida() for pieza in resultados]
             }
         
         pdf_data = st.session_state.export_utils.export_to_pdf(filtered_data)
@@ -1320,6 +1584,18 @@ def render_normal_mode(shared_params):
     cut_height = st.number_input("Alto del corte (cm)", min_value=0.1, 
                                 value=shared_params.get('cut_height', 7.0), step=0.1)
     
+    # Márgenes de corte: cuchilla entre piezas, refile de los bordes y pinza de la máquina
+    with st.expander("📏 Márgenes de corte"):
+        col_kerf, col_refile, col_pinza = st.columns(3)
+        with col_kerf:
+            kerf = st.number_input("Corte de cuchilla (cm)", min_value=0.0, value=0.0, step=0.1, key="kerf_corte")
+        with col_refile:
+            trim = st.number_input("Refile por borde (cm)", min_value=0.0, value=0.0, step=0.1, key="refile")
+        with col_pinza:
+            gripper = st.number_input("Pinza (cm)", min_value=0.0, value=0.0, step=0.1, key="pinza",
+                                      help="Margen del borde por donde la máquina toma el pliego")
+    margins = (kerf, trim, gripper)
+    
     # Validación en tiempo real
     validation_errors = []
     if cut_width > sheet_width:
@@ -1336,6 +1612,26 @@ def render_normal_mode(shared_params):
         # Mostrar mensaje de validación exitosa
         st.success("✅ Las dimensiones son válidas")
     
+    # Tipo de optimización
+    modos_optimizacion = {
+        'grid': '▦ Cuadrícula uniforme',
+        'guillotine': '🪚 Guillotina mixta (2 etapas)',
+        'guillotine3': '🪚 Guillotina mixta (3 etapas)',
+        'anytime': '⏱️ Búsqueda progresiva (con tiempo límite)'
+    }
+    optimization_mode = st.selectbox(
+        "Tipo de optimización",
+        options=list(modos_optimizacion.keys()),
+        format_func=lambda x: modos_optimizacion[x],
+        key="optimization_mode",
+        help="La guillotina mixta combina piezas normales y rotadas para aprovechar tiras sobrantes"
+    )
+    time_budget = None
+    if optimization_mode == 'anytime':
+        time_budget = st.slider("Tiempo máximo de búsqueda (s)", min_value=0.5, max_value=10.0,
+                                value=2.0, step=0.5, key="time_budget",
+                                help="Se muestra el mejor patrón encontrado mientras la búsqueda avanza")
+    
     # Verificar easter eggs
     easter_egg_type = check_easter_eggs(sheet_width, sheet_height, cut_width, cut_height)
     if easter_egg_type:
@@ -1343,17 +1639,96 @@ def render_normal_mode(shared_params):
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+    # Cálculo en vivo (cuando los datos dejan de cambiar) o con el botón
+    live_mode = st.toggle("⚡ Cálculo en vivo", key="live_mode",
+                          help="Actualiza el resultado y la vista previa al cambiar los datos")
+    live_status = st.empty()
+    if live_mode and optimization_mode == 'anytime':
+        live_status.caption("La búsqueda progresiva se calcula con el botón")
+
     # Botones
     col_opt, col_clear = st.columns([1, 1])
     with col_opt:
         if st.button("🎯 Calcular Óptimo", use_container_width=True):
             if not validation_errors:
-                calculate_optimal(sheet_width, sheet_height, cut_width, cut_height)
+                if optimization_mode == 'anytime':
+                    # Se ejecuta en la columna de resultados para ir mostrando cada mejora
+                    st.session_state.anytime_request = (sheet_width, sheet_height, cut_width, cut_height,
+                                                        time_budget, margins)
+                else:
+                    calculate_optimal(sheet_width, sheet_height, cut_width, cut_height, optimization_mode, margins)
             else:
                 st.error("❌ Corrige los errores de validación antes de calcular")
     with col_clear:
         if st.button("🗑️ Limpiar Todo", use_container_width=True):
             clear_all_fields()
+    if live_mode and not validation_errors and optimization_mode != 'anytime':
+        calculate_live(sheet_width, sheet_height, cut_width, cut_height, optimization_mode, margins, live_status)
+    
+    # Selección de pliego del catálogo
+    st.markdown('<div class="section-card">', unsafe_allow_html=True)
+    st.markdown("### 🔎 Elegir Pliego del Catálogo")
+    st.markdown("<p style='font-size: 14px; opacity: 0.8;'>Compara todos los pliegos del catálogo para este corte</p>", unsafe_allow_html=True)
+    col_cantidad, col_costo, col_criterio = st.columns(3)
+    with col_cantidad:
+        stock_quantity = st.number_input("Cantidad de cortes", min_value=1, value=1000, step=1, key="stock_quantity")
+    with col_costo:
+        stock_cost = st.number_input("Costo por pliego", min_value=0.0, value=0.0, step=0.1, key="stock_cost")
+    with col_criterio:
+        criterios = {'sheets': 'Menos pliegos', 'waste': 'Menos desperdicio', 'cost': 'Menor costo'}
+        stock_rank = st.selectbox("Ordenar por", options=list(criterios.keys()),
+                                  format_func=lambda x: criterios[x], key="stock_rank")
+    if st.button("🔎 Buscar Pliego", use_container_width=True):
+        # La búsqueda progresiva no aplica a cada pliego del catálogo: se usa la guillotina completa
+        stock_mode = 'guillotine3' if optimization_mode == 'anytime' else optimization_mode
+        select_stock(cut_width, cut_height, stock_quantity, stock_cost, stock_rank, stock_mode)
+    show_stock_selection()
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Sobrantes del inventario
+    st.markdown('<div class="section-card">', unsafe_allow_html=True)
+    st.markdown("### ♻️ Sobrantes del Inventario")
+    st.markdown(f"<p style='font-size: 14px; opacity: 0.8;'>Usa primero los recortes guardados "
+                f"({len(get_remnant_store())} disponibles) y después hojas nuevas</p>", unsafe_allow_html=True)
+    col_cantidad, col_gramaje = st.columns(2)
+    with col_cantidad:
+        remnant_quantity = st.number_input("Cantidad de cortes", min_value=1, value=100, step=1, key="remnant_quantity")
+    with col_gramaje:
+        remnant_grammage = st.number_input("Gramaje (g/m²)", min_value=1, value=80, step=1, key="remnant_grammage")
+    if st.button("♻️ Planificar con Sobrantes", use_container_width=True):
+        remnant_mode = 'guillotine3' if optimization_mode == 'anytime' else optimization_mode
+        plan_remnants(sheet_width, sheet_height, cut_width, cut_height, remnant_quantity, remnant_grammage, remnant_mode)
+    show_remnant_plan()
+    with st.expander("➕ Agregar sobrante"):
+        col_largo, col_ancho = st.columns(2)
+        with col_largo:
+            sobrante_largo = st.number_input("Largo (cm)", min_value=0.1, value=50.0, step=0.1, key="sobrante_largo")
+        with col_ancho:
+            sobrante_ancho = st.number_input("Ancho (cm)", min_value=0.1, value=35.0, step=0.1, key="sobrante_ancho")
+        if st.button("➕ Guardar Sobrante", use_container_width=True):
+            get_remnant_store().add([{'width': sobrante_largo, 'height': sobrante_ancho, 'grammage': remnant_grammage}])
+            st.success("✅ Sobrante guardado")
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Barrido de tamaños de pliego
+    st.markdown('<div class="section-card">', unsafe_allow_html=True)
+    st.markdown("### 🗺️ Barrido de Tamaños de Pliego")
+    st.markdown("<p style='font-size: 14px; opacity: 0.8;'>Busca el tamaño de pliego a pedido que mejor aprovecha una lista de cortes</p>", unsafe_allow_html=True)
+    col_ancho, col_alto, col_paso = st.columns(3)
+    with col_ancho:
+        sweep_width = st.slider("Ancho del pliego (cm)", min_value=10.0, max_value=200.0, value=(50.0, 120.0), step=0.5, key="sweep_width")
+    with col_alto:
+        sweep_height = st.slider("Alto del pliego (cm)", min_value=10.0, max_value=200.0, value=(50.0, 120.0), step=0.5, key="sweep_height")
+    with col_paso:
+        sweep_step = st.number_input("Paso (mm)", min_value=1, value=5, step=1, key="sweep_step")
+    cortes = st.data_editor(
+        pd.DataFrame([{'Ancho (cm)': cut_width, 'Alto (cm)': cut_height, 'Peso': 1.0}]),
+        num_rows="dynamic", use_container_width=True, hide_index=True, key="sweep_cuts"
+    )
+    if st.button("🗺️ Calcular Barrido", use_container_width=True):
+        run_sheet_sweep(sweep_width, sweep_height, sweep_step, cortes.dropna().to_dict('records'))
+    show_sheet_sweep()
+    st.markdown('</div>', unsafe_allow_html=True)
     
     return sheet_width, sheet_height, cut_width, cut_height
 
@@ -1453,53 +1828,23 @@ def render_redonda_mode():
         if st.button("🗑️ Limpiar Todo", use_container_width=True):
             clear_all_fields()
 
-# -------------------- MAIN --------------------
-def main():
-    st.set_page_config(
-        page_title="Calculadora de Cortes y Cajas",
-        page_icon="✂️",
-        layout="wide",
-        initial_sidebar_state="collapsed"
-    )
-    
-    load_css()
-    load_js()
-    initialize_app()
+def select_theme():
+    st.session_state.theme_mode = st.session_state.theme_selector
 
-    # Header con controles de tema y modo calculadora
-    col_header, col_mode, col_theme, col_toggle = st.columns([3, 2, 1, 1])
-    
-    with col_header:
-        st.markdown(f"""
-        <div class="header-container" style="margin-bottom:30px;">
-            <div class="logo-container">
-                <img src="{load_image_base64('Imagen2.jpeg')}" class="logo" style="border-radius: 50%; width: 100px; height: 100px;">
-            </div>
-            <h1 class="main-title">✂️ Calculadora Profesional de Cortes y Cajas</h1>
-        </div>
-        """, unsafe_allow_html=True)
+def toggle_dark_mode():
+    st.session_state.dark_mode = not st.session_state.dark_mode
+
+@st.fragment
+def render_theme_controls():
+    """Tema, modo claro/oscuro y la hoja de estilos que dependen de ellos
     
-    with col_mode:
-        st.markdown("### 🧮 Modo Calculadora")
-        modos_calculadora = {
-            'normal': '✂️ Corte Normal',
-            'tapa_libro': '📚 Tapa Libro', 
-            'tapa_suelta': '🧩 Tapa Suelta',
-            'redonda': '🔵 Caja Redonda'
-        }
-        
-        selected_mode = st.selectbox(
-            "Seleccionar modo",
-            options=list(modos_calculadora.keys()),
-            format_func=lambda x: modos_calculadora[x],
-            index=list(modos_calculadora.keys()).index(st.session_state.calculator_mode),
-            label_visibility="collapsed"
-        )
-        
-        if selected_mode != st.session_state.calculator_mode:
-            st.session_state.calculator_mode = selected_mode
-            st.session_state.calculation_result = None
-            st.rerun()
+    La hoja de estilos se inyecta dentro del fragmento: cambiar de tema solo vuelve a
+    correr este bloque y el navegador aplica la nueva hoja sin recargar la página. Los
+    cambios se guardan en callbacks, que corren antes del fragmento, así load_css ya
+    toma el tema nuevo sin un st.rerun extra.
+    """
+    load_css()
+    col_theme, col_toggle = st.columns(2)
     
     with col_theme:
         st.markdown("### 🎨 Tema")
@@ -1509,36 +1854,33 @@ def main():
             'minimalista': '⚪ Minimalista'
         }
         
-        selected_theme = st.selectbox(
+        st.selectbox(
             "Seleccionar tema",
             options=list(theme_options.keys()),
             format_func=lambda x: theme_options[x],
             index=list(theme_options.keys()).index(st.session_state.theme_mode),
-            label_visibility="collapsed"
+            label_visibility="collapsed",
+            key="theme_selector",
+            on_change=select_theme
         )
-        
-        if selected_theme != st.session_state.theme_mode:
-            st.session_state.theme_mode = selected_theme
-            st.rerun()
     
     with col_toggle:
         st.markdown("### 🌓 Modo")
         dark_mode_icon = "🌙" if st.session_state.dark_mode else "☀️"
         mode_text = "Oscuro" if st.session_state.dark_mode else "Claro"
         
-        if st.button(f"{dark_mode_icon} {mode_text}", key="mode_toggle", help="Cambiar tema"):
-            st.session_state.dark_mode = not st.session_state.dark_mode
-            st.rerun()
-
-    # Elementos decorativos
-    show_decoration_elements()
-
-    # Floating bar
-    show_floating_bar()
+        st.button(f"{dark_mode_icon} {mode_text}", key="mode_toggle", help="Cambiar tema",
+                  on_click=toggle_dark_mode)
 
-    # Cargar parámetros compartidos si existen
-    shared_params = load_shared_params()
+@st.fragment
+def render_workspace(shared_params):
+    """Datos, validación, resultados y vista previa del modo actual
     
+    Editar un dato vuelve a correr solo este fragmento (no el header, la hoja de estilos,
+    las imágenes ni la barra social). Los datos y los resultados van en el mismo
+    fragmento porque un fragmento no puede hacer correr a otro: así "Calcular" actualiza
+    la vista previa sin recargar toda la página.
+    """
     # PRIMER NIVEL: Dos columnas principales
     col1, col2 = st.columns([1, 1])
 
@@ -1560,19 +1902,24 @@ def main():
             st.markdown('<div class="section-card">', unsafe_allow_html=True)
             st.markdown("### 📊 Vista Previa de Cortes")
             st.markdown("<p style='font-size: 14px; opacity: 0.8;'>La gráfica es interactiva - puedes hacer zoom y arrastrar</p>", unsafe_allow_html=True)
-            if st.session_state.calculation_result:
-                show_cutting_preview()
-            else:
-                st.info("Haz clic en 'Calcular Óptimo' para ver la vista previa")
+            preview_slot = st.empty()
             st.markdown('</div>', unsafe_allow_html=True)
 
             st.markdown('<div class="section-card">', unsafe_allow_html=True)
             st.markdown("### 📈 Reporte de Cortes")
-            if st.session_state.calculation_result:
-                show_cut_report()
-            else:
-                st.info("Los resultados aparecerán aquí después del cálculo")
+            report_slot = st.empty()
             st.markdown('</div>', unsafe_allow_html=True)
+
+            if st.session_state.get('anytime_request'):
+                run_anytime_search(preview_slot, report_slot)
+            elif st.session_state.calculation_result:
+                with preview_slot.container():
+                    show_cutting_preview()
+                with report_slot.container():
+                    show_cut_report()
+            else:
+                preview_slot.info("Haz clic en 'Calcular Óptimo' para ver la vista previa")
+                report_slot.info("Los resultados aparecerán aquí después del cálculo")
         else:
             st.markdown('<div class="section-card">', unsafe_allow_html=True)
             st.markdown("### 📋 Medidas de la Caja")
@@ -1583,58 +1930,159 @@ def main():
                 st.info("Haz clic en 'Calcular Medidas' para ver los resultados")
             st.markdown('</div>', unsafe_allow_html=True)
 
-        # Botones de descarga y compartir (siempre visibles)
-        if st.session_state.calculation_result:
             st.markdown('<div class="section-card">', unsafe_allow_html=True)
-            st.markdown("### 💾 Exportar Resultados")
-            
-            col_excel, col_pdf, col_share = st.columns([1, 1, 1])
-            with col_excel:
-                if st.button("📊 Excel", key="excel_btn", help="Descargar resultados como Excel", use_container_width=True):
-                    export_excel()
-            with col_pdf:
-                if st.button("📄 PDF", key="pdf_btn", help="Descargar resultados como PDF", use_container_width=True):
-                    export_pdf()
-            with col_share:
-                if st.button("🔗 Compartir", key="share_btn", help="Generar enlace para compartir", use_container_width=True):
-                    generate_share_link()
+            st.markdown("### 🧱 Pliegos para la Tirada")
+            st.markdown("<p style='font-size: 14px; opacity: 0.8;'>Acomoda todas las piezas de cartón de la tirada en pliegos</p>", unsafe_allow_html=True)
+            col_largo, col_ancho = st.columns(2)
+            with col_largo:
+                pliego_largo = st.number_input("Largo del pliego (cm)", min_value=0.1, value=100.0, step=0.1, key="pliego_largo")
+            with col_ancho:
+                pliego_ancho = st.number_input("Ancho del pliego (cm)", min_value=0.1, value=70.0, step=0.1, key="pliego_ancho")
+            col_cantidad, col_kerf, col_tiempo = st.columns(3)
+            with col_cantidad:
+                cantidad_cajas = st.number_input("Cantidad de cajas", min_value=1, value=500, step=1, key="cantidad_cajas")
+            with col_kerf:
+                kerf = st.number_input("Corte de cuchilla (cm)", min_value=0.0, value=0.0, step=0.1, key="kerf_imposicion")
+            with col_tiempo:
+                tiempo_busqueda = st.number_input("Tiempo de búsqueda (s)", min_value=0.0, max_value=30.0, value=1.0,
+                                                  step=0.5, key="tiempo_imposicion",
+                                                  help="Tiempo para probar otros órdenes de acomodo; 0 usa solo el orden por defecto")
+            if st.button("📐 Calcular Pliegos", use_container_width=True):
+                calcular_imposicion(pliego_largo, pliego_ancho, cantidad_cajas, kerf, tiempo_busqueda)
+            show_imposition_report()
             st.markdown('</div>', unsafe_allow_html=True)
 
+        # Botones de descarga y compartir (siempre visibles)
+        render_exports()
+
         # Controles de personalización de colores (siempre visibles)
+        render_color_controls()
+
+@st.fragment
+def render_exports():
+    """Botones de exportar y compartir el resultado actual (cada clic corre solo este bloque)"""
+    if st.session_state.calculation_result:
         st.markdown('<div class="section-card">', unsafe_allow_html=True)
-        with st.expander("🎨 Personalizar Colores", expanded=False):
-            col_primary, col_secondary = st.columns(2)
-            
-            with col_primary:
-                new_primary = st.color_picker(
-                    "Color Primario",
-                    value=st.session_state.custom_colors['primary'],
-                    key="primary_color"
-                )
-            
-            with col_secondary:
-                new_secondary = st.color_picker(
-                    "Color Secundario", 
-                    value=st.session_state.custom_colors['secondary'],
-                    key="secondary_color"
-                )
-            
-            if (new_primary != st.session_state.custom_colors['primary'] or 
-                new_secondary != st.session_state.custom_colors['secondary']):
-                st.session_state.custom_colors = {
-                    'primary': new_primary,
-                    'secondary': new_secondary
-                }
-                st.rerun()
-            
-            if st.button("🔄 Restablecer Colores", key="reset_colors"):
-                st.session_state.custom_colors = {
-                    'primary': '#FF69B4',
-                    'secondary': '#FFB6C1'
-                }
-                st.rerun()
+        st.markdown("### 💾 Exportar Resultados")
+        
+        col_excel, col_pdf, col_share = st.columns([1, 1, 1])
+        with col_excel:
+            if st.button("📊 Excel", key="excel_btn", help="Descargar resultados como Excel", use_container_width=True):
+                export_excel()
+        with col_pdf:
+            if st.button("📄 PDF", key="pdf_btn", help="Descargar resultados como PDF", use_container_width=True):
+                export_pdf()
+        with col_share:
+            if st.button("🔗 Compartir", key="share_btn", help="Generar enlace para compartir", use_container_width=True):
+                generate_share_link()
         st.markdown('</div>', unsafe_allow_html=True)
 
+@st.fragment
+def render_color_controls():
+    """Colores personalizados: elegir un color corre solo este bloque hasta que cambia
+    
+    Un color nuevo necesita recargar la página completa para que la hoja de estilos del
+    header lo tome.
+    """
+    st.markdown('<div class="section-card">', unsafe_allow_html=True)
+    with st.expander("🎨 Personalizar Colores", expanded=False):
+        col_primary, col_secondary = st.columns(2)
+        
+        with col_primary:
+            new_primary = st.color_picker(
+                "Color Primario",
+                value=st.session_state.custom_colors['primary'],
+                key="primary_color"
+            )
+        
+        with col_secondary:
+            new_secondary = st.color_picker(
+                "Color Secundario", 
+                value=st.session_state.custom_colors['secondary'],
+                key="secondary_color"
+            )
+        
+        if (new_primary != st.session_state.custom_colors['primary'] or 
+            new_secondary != st.session_state.custom_colors['secondary']):
+            st.session_state.custom_colors = {
+                'primary': new_primary,
+                'secondary': new_secondary
+            }
+            st.rerun()
+        
+        if st.button("🔄 Restablecer Colores", key="reset_colors"):
+            st.session_state.custom_colors = {
+                'primary': '#FF69B4',
+                'secondary': '#FFB6C1'
+            }
+            st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+# -------------------- MAIN --------------------
+def main():
+    st.set_page_config(
+        page_title="Calculadora de Cortes y Cajas",
+        page_icon="✂️",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+    
+    # Bytes de imágenes enviados en esta recarga (los suma image_src)
+    st.session_state.image_payload = 0
+    
+    initialize_app()
+    load_js()
+
+    # Header con controles de tema y modo calculadora
+    col_header, col_mode, col_theme = st.columns([3, 2, 2])
+    
+    with col_header:
+        st.markdown(f"""
+        <div class="header-container" style="margin-bottom:30px;">
+            <div class="logo-container">
+                <img src="{image_src(LOGO_IMAGE)}" class="logo" style="border-radius: 50%; width: 100px; height: 100px;">
+            </div>
+            <h1 class="main-title">✂️ Calculadora Profesional de Cortes y Cajas</h1>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col_mode:
+        st.markdown("### 🧮 Modo Calculadora")
+        modos_calculadora = {
+            'normal': '✂️ Corte Normal',
+            'tapa_libro': '📚 Tapa Libro', 
+            'tapa_suelta': '🧩 Tapa Suelta',
+            'redonda': '🔵 Caja Redonda'
+        }
+        
+        selected_mode = st.selectbox(
+            "Seleccionar modo",
+            options=list(modos_calculadora.keys()),
+            format_func=lambda x: modos_calculadora[x],
+            index=list(modos_calculadora.keys()).index(st.session_state.calculator_mode),
+            label_visibility="collapsed"
+        )
+        
+        if selected_mode != st.session_state.calculator_mode:
+            st.session_state.calculator_mode = selected_mode
+            st.session_state.calculation_result = None
+            st.rerun()
+    
+    with col_theme:
+        render_theme_controls()
+
+    # Elementos decorativos
+    show_decoration_elements()
+
+    # Floating bar
+    show_floating_bar()
+
+    # Cargar parámetros compartidos si existen
+    shared_params = load_shared_params()
+    
+    # Datos y resultados (al editar un dato se vuelve a correr solo esta parte)
+    render_workspace(shared_params)
+
     # SEGUNDO NIVEL: Dos columnas inferiores para mejor distribución
     st.markdown("---")
     col3, col4 = st.columns([1, 1])
@@ -1666,6 +2114,9 @@ def main():
 
     # Barra social al final
     show_social_bar()
+    
+    modo_imagenes = "archivos estáticos en caché" if st.get_option("server.enableStaticServing") else "data URI en caché"
+    st.caption(f"🖼️ Imágenes en esta recarga: {st.session_state.image_payload / 1024:.1f} KB ({modo_imagenes})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,138 @@
+"""Compuerta de regresiones de rendimiento contra una línea base guardada
+
+Corre el banco de pruebas (o toma un JSON ya corrido con --results) y compara cada
+benchmark con benchmarks/baseline.json. Un benchmark es una regresión si su mediana
+empeora más que el umbral y además el cambio de la mediana supera la suma de los
+rangos intercuartiles (IQR) de las dos corridas; si empeora más que el umbral pero
+el cambio queda dentro de esa dispersión se informa como ruido y no falla. Sale con 1
+si hay alguna regresión.
+
+Uso, desde CortePerfecto:
+  python benchmarks/compare.py [--threshold 10] [-k filtro] [--results corrida.json]
+  python benchmarks/compare.py --update      (guarda la corrida como nueva línea base)
+"""
+import argparse
+import json
+import os
+import sys
+
+import suite
+
+BASELINE_PATH = os.path.join(suite.ROOT, 'benchmarks', 'baseline.json')
+
+# Porcentaje de empeoramiento de la mediana que se tolera
+DEFAULT_THRESHOLD = 10.0
+
+REGRESSION = 'REGRESIÓN'
+IMPROVEMENT = 'mejora'
+UNCHANGED = 'igual'
+NOISE = 'ruido'
+NEW = 'nuevo'
+SKIPPED = 'omitido'
+
+# Datos de la máquina que tienen que coincidir para que la comparación sea justa
+MACHINE_KEYS = ('platform', 'processor', 'cpu_count', 'python')
+
+
+def verdict(base, current, threshold):
+    """Veredicto y cambio relativo de la mediana de un benchmark (None si no aplica)"""
+    if current is None or 'skipped' in current:
+        return SKIPPED, None
+    if base is None or 'skipped' in base:
+        return NEW, None
+    change = current['median'] / base['median'] - 1
+    # El cambio tiene que salir de la dispersión de ambas corridas para contar
+    significant = abs(current['median'] - base['median']) > base['iqr'] + current['iqr']
+    if change > threshold / 100:
+        return (REGRESSION if significant else NOISE), change
+    if change < -threshold / 100:
+        return (IMPROVEMENT if significant else NOISE), change
+    return UNCHANGED, change
+
+
+def compare(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """Filas (nombre, base, actual, veredicto, cambio) para cada benchmark de la corrida"""
+    rows = []
+    for name, current in results['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        rows.append((name, base, current) + verdict(base, current, threshold))
+    return rows
+
+
+def machine_differences(baseline, results):
+    return [
+        key for key in MACHINE_KEYS
+        if baseline.get('machine', {}).get(key) != results.get('machine', {}).get(key)
+    ]
+
+
+def _median(result):
+    if result is None or 'skipped' in result:
+        return '-'
+    return suite.format_time(result['median'])
+
+
+def _iqr(result):
+    if result is None or 'skipped' in result:
+        return '-'
+    return suite.format_time(result['iqr'])
+
+
+def print_table(rows, threshold):
+    print(f"{'benchmark':34} {'base':>10} {'actual':>10} {'IQR':>10} {'cambio':>8}  veredicto (umbral {threshold:g}%)")
+    for name, base, current, result, change in rows:
+        change_text = '-' if change is None else f"{change * 100:+.1f}%"
+        print(f"{name:34} {_median(base):>10} {_median(current):>10} {_iqr(current):>10} {change_text:>8}  {result}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Porcentaje de empeoramiento de la mediana que se tolera")
+    parser.add_argument('--results', help="JSON de una corrida ya hecha con suite.py (no vuelve a correr)")
+    parser.add_argument('-k', dest='pattern', help="Solo los benchmarks cuyo nombre contiene este texto")
+    parser.add_argument('--repeats', type=int, default=suite.DEFAULT_REPEATS)
+    parser.add_argument('--update', action='store_true', help="Guarda la corrida como línea base")
+    args = parser.parse_args(argv)
+
+    if args.results:
+        with open(args.results, encoding='utf-8') as source:
+            results = json.load(source)
+    else:
+        results = suite.run_suite(args.pattern, max(1, args.repeats), suite.print_result)
+
+    if args.update:
+        if args.pattern and os.path.exists(args.baseline):
+            # Con filtro solo se reemplazan esos benchmarks en la línea base existente
+            with open(args.baseline, encoding='utf-8') as source:
+                baseline = json.load(source)
+            baseline['benchmarks'].update(results['benchmarks'])
+            results = dict(results, benchmarks=baseline['benchmarks'])
+        print(f"Línea base guardada en {suite.save_results(results, args.baseline)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No hay línea base en {args.baseline}; crearla con --update", file=sys.stderr)
+        return 2
+    with open(args.baseline, encoding='utf-8') as source:
+        baseline = json.load(source)
+
+    differences = machine_differences(baseline, results)
+    if differences:
+        print(f"Aviso: la línea base es de otra máquina ({', '.join(differences)}); "
+              "los tiempos pueden no ser comparables", file=sys.stderr)
+
+    rows = compare(baseline, results, args.threshold)
+    print()
+    print_table(rows, args.threshold)
+    regressions = [name for name, _, _, result, _ in rows if result == REGRESSION]
+    if regressions:
+        print(f"\n{len(regressions)} regresión(es): {', '.join(regressions)}")
+        return 1
+    print("\nSin regresiones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Latencia y rendimiento de la API HTTP contra localhost
+
+Arranca `python -m utils.http_api` en un proceso aparte (o usa uno ya corriendo con
+--port), abre varias conexiones keep-alive y manda peticiones de calculate_optimal con
+medidas variadas. Informa peticiones por segundo y los percentiles de latencia.
+Antes comprueba que una petición inválida mandada junto con otras válidas recibe su
+400 sin arrastrar a las demás y que un encabezado demasiado largo recibe 400; al final
+detiene el servidor con SIGINT, como Ctrl+C, y espera a que cierre su pool (sale con 1
+si algo de esto falla).
+
+Uso, desde CortePerfecto:  python benchmarks/http_api.py [--requests 5000] [--connections 32] [--workers 0]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Segundos que se espera a que el servidor responda /health y a que termine
+STARTUP_TIMEOUT = 30.0
+SHUTDOWN_TIMEOUT = 30.0
+
+MODES = ('grid', 'grid', 'grid', 'guillotine')
+
+
+def make_jobs(count, seed=0):
+    """Cuerpos de calculate_optimal repetibles (hay medidas repetidas, como en la práctica)"""
+    rng = random.Random(seed)
+    return [
+        {'sheet_width': rng.choice((70, 64, 100)), 'sheet_height': rng.choice((100, 88, 70)),
+         'cut_width': rng.randint(50, 300) / 10, 'cut_height': rng.randint(50, 300) / 10,
+         'quantity': rng.randint(1, 5000), 'grammage': 300, 'mode': rng.choice(MODES)}
+        for _ in range(count)
+    ]
+
+
+async def request(reader, writer, path, body=None):
+    """Una petición HTTP/1.1 por una conexión abierta; devuelve (código, cuerpo)"""
+    data = json.dumps(body).encode() if body is not None else b''
+    method = 'POST' if body is not None else 'GET'
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def wait_ready(port):
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            await request(reader, writer, '/health')
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_benchmark(port, jobs, connections):
+    """Manda todos los trabajos repartidos en `connections` conexiones; devuelve (segundos, latencias, errores)"""
+    queue = list(reversed(jobs))
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        while queue:
+            job = queue.pop()
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, '/calculate_optimal', job)
+            latencies.append(time.perf_counter() - start)
+            errors += status != 200
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+# Cuerpos inválidos que se mezclan con válidos en check_isolation
+INVALID_JOBS = (
+    {'sheet_width': 70, 'sheet_height': 100, 'cut_width': 0, 'cut_height': 10, 'quantity': 100, 'grammage': 300},
+    {'sheet_width': 70, 'sheet_height': 100, 'cut_width': -5, 'cut_height': 10, 'quantity': 100, 'grammage': 300},
+    {'sheet_width': 70, 'sheet_height': 1e400, 'cut_width': 5, 'cut_height': 10, 'quantity': 100, 'grammage': 300}
+)
+
+
+async def check_isolation(port, valid_count=8):
+    """Manda a la vez cada cuerpo inválido con `valid_count` válidos; devuelve los fallos
+
+    Las peticiones concurrentes viajan juntas al pool: la inválida tiene que volver con
+    400 y las válidas con 200.
+    """
+    failures = []
+    jobs = make_jobs(valid_count, seed=1)
+
+    async def send(job):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            return await request(reader, writer, '/calculate_optimal', job)
+        finally:
+            writer.close()
+
+    for invalid in INVALID_JOBS:
+        responses = await asyncio.gather(*(send(job) for job in (invalid, *jobs)))
+        statuses = [status for status, _ in responses]
+        if statuses[0] != 400:
+            failures.append(f"{invalid}: respondió {statuses[0]} en vez de 400")
+        if any(status != 200 for status in statuses[1:]):
+            failures.append(f"{invalid}: las válidas respondieron {statuses[1:]}")
+
+    # Más largo que el límite de línea del servidor (64 KiB)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(b"GET /health HTTP/1.1\r\nX-Relleno: " + b"x" * 100_000 + b"\r\n\r\n")
+        await writer.drain()
+        status_line = await reader.readline()
+        status = int(status_line.split()[1]) if status_line else None
+    finally:
+        writer.close()
+    if status != 400:
+        failures.append(f"encabezado demasiado largo: respondió {status} en vez de 400")
+    return failures
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=0, help="Trabajadores del servidor que se arranca")
+    parser.add_argument('--port', type=int, help="Usar un servidor ya corriendo en este puerto")
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'utils.http_api', '--port', str(port), '--workers', str(args.workers)],
+            cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT), stderr=subprocess.DEVNULL)
+    failures = []
+    try:
+        asyncio.run(wait_ready(port))
+        failures += asyncio.run(check_isolation(port))
+        jobs = make_jobs(args.requests)
+        elapsed, latencies, errors = asyncio.run(run_benchmark(port, jobs, args.connections))
+    finally:
+        if server is not None:
+            # Como Ctrl+C: el servidor cierra su pool antes de salir
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(SHUTDOWN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+                failures.append(f"el servidor no terminó en {SHUTDOWN_TIMEOUT:.0f} s después de SIGINT")
+
+    for failure in failures:
+        print(f"FALLA: {failure}")
+    print(f"{len(latencies)} peticiones ({errors} con error) en {elapsed:.2f} s con "
+          f"{args.connections} conexiones: {len(latencies) / elapsed:,.0f} peticiones/s")
+    print("latencia ms: " + "  ".join(
+        f"p{int(fraction * 100)} {percentile(latencies, fraction) * 1000:.2f}" for fraction in (0.5, 0.95, 0.99)
+    ) + f"  máx {latencies[-1] * 1000:.2f}")
+    return 1 if errors or failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Presupuesto de tiempo de importación del núcleo de cálculo
+
+Importa el calculador y las fórmulas de cajas en un intérprete nuevo (como lo haría
+un proceso de trabajo o la línea de comandos) y falla si tarda más que el presupuesto
+o si arrastra bibliotecas de interfaz o de exportación. NumPy se importa antes de
+medir: es la única dependencia del núcleo y su costo no depende de este proyecto.
+
+Uso, desde CortePerfecto:  python benchmarks/import_time.py [--budget-ms 50] [--runs 7]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Milisegundos permitidos para importar el núcleo sobre NumPy ya cargado
+DEFAULT_BUDGET_MS = 50.0
+
+# Mediciones en intérpretes nuevos; se toma la mejor para quitar el ruido del sistema
+DEFAULT_RUNS = 7
+
+CORE_MODULES = ('utils.calculator', 'utils.box_calculator')
+
+# Bibliotecas que el núcleo no debe cargar al importarse
+FORBIDDEN_MODULES = ('streamlit', 'pandas', 'plotly', 'xlsxwriter', 'reportlab', 'psycopg2', 'multiprocessing')
+
+MEASURE = """
+import json, sys, time
+import numpy
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({forbidden!r}))
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': loaded}}))
+"""
+
+
+def measure_import(runs=DEFAULT_RUNS):
+    """Mejor tiempo (ms) de importar el núcleo y las bibliotecas prohibidas que cargó"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    # Con el bytecode en caché se mide la importación y no la compilación
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    code = MEASURE.format(modules=CORE_MODULES, forbidden=FORBIDDEN_MODULES)
+    results = []
+    for _ in range(runs + 1):
+        output = subprocess.run([sys.executable, '-c', code], env=env, cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output))
+    # La primera corrida solo deja el bytecode escrito
+    best = min(results[1:], key=lambda result: result['ms'])
+    return best['ms'], best['loaded']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    elapsed, loaded = measure_import(max(1, args.runs))
+    print(f"Importar {', '.join(CORE_MODULES)}: {elapsed:.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+    if loaded:
+        print(f"Bibliotecas que no deberían cargarse: {', '.join(loaded)}")
+    if elapsed > args.budget_ms or loaded:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Tiempo del servidor por interacción en la app de Streamlit
+
+Arranca `streamlit run app.py` en un proceso aparte (o usa uno ya corriendo con --port),
+se conecta al websocket como lo hace el navegador y repite interacciones típicas:
+cambiar el ancho del corte con un resultado calculado, cambiar el modo claro/oscuro y
+una ráfaga de pasos +/- con el cálculo en vivo (cuánto tarda el resultado después del
+último paso).
+Cada interacción se manda como lo haría el navegador: si el widget está dentro de un
+st.fragment se pide una recarga solo de ese fragmento, y los fragmentos con run_every
+se recargan solos cada tanto mientras el servidor no los detenga. Se mide desde que se manda el
+cambio hasta que el servidor avisa que terminó la recarga (incluidas las que encadena
+un st.rerun()) y se cuentan los elementos y bytes que manda de vuelta.
+
+Uso, desde CortePerfecto:  python benchmarks/interaction.py [--repeats 20] [--port 8501]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Segundos que se espera a que el servidor acepte la conexión
+STARTUP_TIMEOUT = 60.0
+
+CALCULATE_LABEL = "🎯 Calcular Óptimo"
+CUT_WIDTH_LABEL = "Ancho del corte (cm)"
+LIVE_MODE_LABEL = "⚡ Cálculo en vivo"
+DARK_MODE_KEY = "mode_toggle"
+
+# Segundos sin mensajes del servidor para dar la ráfaga por terminada
+SETTLE_TIMEOUT = 1.0
+
+# Ráfaga de pasos con el cálculo en vivo: cantidad y segundos entre pasos (clics en +)
+BURST_STEPS = 20
+BURST_INTERVAL = 0.05
+
+
+class AppSession:
+    """Una sesión del websocket de Streamlit que manda cambios de widgets y espera cada recarga"""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        # Etiqueta (o clave) del widget -> (id, fragmento que lo contiene)
+        self.widgets = {}
+        # Valores actuales de los widgets: como el navegador, se mandan todos en cada recarga
+        self.values = {}
+        # Fragmento con run_every -> tarea que pide sus recargas
+        self.timers = {}
+
+    async def send(self, widget=None, **value):
+        """Manda una recarga con el cambio de un widget sin esperar la respuesta"""
+        fragment_id = None
+        widget_id = None
+        if widget is not None:
+            widget_id, fragment_id = self.widgets[widget]
+            if 'trigger_value' not in value:
+                self.values[widget_id] = value
+        message = self._message(fragment_id)
+        if widget is not None and 'trigger_value' in value:
+            self._add_state(message, widget_id, value)
+        await self.websocket.send(message.SerializeToString())
+
+    def _message(self, fragment_id=None):
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        for widget_id, widget_value in self.values.items():
+            self._add_state(message, widget_id, widget_value)
+        if fragment_id:
+            message.rerun_script.fragment_id = fragment_id
+        return message
+
+    async def _auto_rerun(self, interval, fragment_id):
+        """Recargas periódicas de un fragmento con run_every, como las pide el navegador"""
+        while True:
+            await asyncio.sleep(interval)
+            message = self._message(fragment_id)
+            message.rerun_script.is_auto_rerun = True
+            await self.websocket.send(message.SerializeToString())
+
+    def stop_timers(self, fragment_ids=None):
+        for fragment_id in list(self.timers) if fragment_ids is None else fragment_ids:
+            timer = self.timers.pop(fragment_id, None)
+            if timer is not None:
+                timer.cancel()
+
+    async def receive(self):
+        """Mensajes hasta el fin de la recarga; devuelve (elementos, bytes)
+
+        Un st.rerun() o un cambio que llega mientras corre la recarga la terminan antes y
+        empieza otra: se espera a la última.
+        """
+        elements = received = 0
+        while True:
+            data = await self.websocket.recv()
+            received += len(data)
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof('type')
+            if kind == 'delta':
+                elements += 1
+                self._register(forward.delta)
+            elif kind == 'new_session' and not forward.new_session.fragment_ids_this_run:
+                # Una recarga completa vuelve a registrar los fragmentos con run_every
+                self.stop_timers()
+            elif kind == 'auto_rerun':
+                fragment_id = forward.auto_rerun.fragment_id
+                self.stop_timers([fragment_id])
+                self.timers[fragment_id] = asyncio.create_task(
+                    self._auto_rerun(forward.auto_rerun.interval, fragment_id))
+            elif kind == 'stop_auto_rerun':
+                self.stop_timers(forward.stop_auto_rerun.fragment_ids)
+            elif kind == 'script_finished' and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return elements, received
+
+    async def rerun(self, widget=None, **value):
+        """Manda una recarga (con el cambio de un widget); devuelve (segundos, elementos, bytes)"""
+        start = time.perf_counter()
+        await self.send(widget, **value)
+        elements, received = await self.receive()
+        return time.perf_counter() - start, elements, received
+
+    async def burst(self, widget, values, interval):
+        """Cambia un widget varias veces seguidas; devuelve los segundos desde el último cambio
+        hasta que termina la última recarga"""
+        for value in values:
+            await self.send(widget, **value)
+            last = time.perf_counter()
+            await asyncio.sleep(interval)
+        finished = last
+        # Recargas terminadas mientras se mandaban los pasos y la que queda corriendo
+        while True:
+            try:
+                await asyncio.wait_for(self.receive(), timeout=SETTLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return finished - last
+            finished = time.perf_counter()
+
+    @staticmethod
+    def _add_state(message, widget_id, value):
+        state = message.rerun_script.widget_states.widgets.add()
+        state.id = widget_id
+        for field, field_value in value.items():
+            setattr(state, field, field_value)
+
+    def _register(self, delta):
+        if delta.WhichOneof('type') != 'new_element':
+            return
+        element = delta.new_element
+        kind = element.WhichOneof('type')
+        if kind not in ('button', 'number_input', 'checkbox'):
+            return
+        widget = getattr(element, kind)
+        fragment = delta.fragment_id
+        self.widgets.setdefault(widget.label, (widget.id, fragment))
+        if widget.id.endswith(f"-{DARK_MODE_KEY}"):
+            self.widgets[DARK_MODE_KEY] = (widget.id, fragment)
+
+
+async def connect(port):
+    deadline = time.perf_counter() + STARTUP_TIMEOUT
+    while True:
+        try:
+            return await websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream",
+                                            subprotocols=['streamlit'], max_size=None)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def run_benchmark(port, repeats):
+    """Tiempos por interacción: {nombre: [(segundos, elementos, bytes), ...]}"""
+    session = AppSession(await connect(port))
+    try:
+        await session.rerun()
+        await session.rerun(CALCULATE_LABEL, trigger_value=True)
+        results = {'editar ancho del corte': [], 'modo claro/oscuro': []}
+        for index in range(repeats):
+            results['editar ancho del corte'].append(
+                await session.rerun(CUT_WIDTH_LABEL, double_value=10.0 + (index % 2) / 10))
+        for _ in range(repeats):
+            results['modo claro/oscuro'].append(await session.rerun(DARK_MODE_KEY, trigger_value=True))
+        fragments = {name: bool(session.widgets[widget][1])
+                     for name, widget in (('editar ancho del corte', CUT_WIDTH_LABEL),
+                                          ('modo claro/oscuro', DARK_MODE_KEY))}
+
+        live = None
+        if LIVE_MODE_LABEL in session.widgets:
+            await session.rerun(LIVE_MODE_LABEL, bool_value=True)
+            # Medidas que no están en la caché: cada paso pediría un cálculo nuevo
+            steps = [{'double_value': 20.0 + step / 10} for step in range(1, BURST_STEPS + 1)]
+            live = await session.burst(CUT_WIDTH_LABEL, steps, BURST_INTERVAL)
+        return results, fragments, live
+    finally:
+        session.stop_timers()
+        await session.websocket.close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--port', type=int, help="Usar una app ya corriendo en este puerto")
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', 'app.py', '--server.headless', 'true',
+             '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        results, fragments, live = asyncio.run(run_benchmark(port, max(1, args.repeats)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    for name, samples in results.items():
+        seconds, elements, received = zip(*samples)
+        scope = 'fragmento' if fragments[name] else 'página completa'
+        print(f"{name:24} mediana {statistics.median(seconds) * 1000:7.1f} ms  "
+              f"máx {max(seconds) * 1000:7.1f} ms  {statistics.median(elements):4.0f} elementos  "
+              f"{statistics.median(received) / 1024:6.1f} KB  ({scope})")
+    if live is not None:
+        print(f"{'ráfaga en vivo':24} {BURST_STEPS} pasos cada {BURST_INTERVAL * 1000:.0f} ms: "
+              f"resultado listo {live * 1000:.0f} ms después del último paso")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,384 @@
+"""Banco de pruebas de rendimiento de los caminos que usan los operadores
+
+Cada benchmark prepara sus datos una vez (setup) y mide una llamada con cargas
+realistas: cálculo de un corte y por lotes, acomodo de listas de piezas, fórmulas de
+cajas, la figura de la vista previa, las exportaciones y las escrituras a la base de
+datos. Como timeit, cada
+repetición ejecuta la llamada las veces necesarias para durar al menos
+MIN_REPEAT_TIME y se guarda el tiempo por llamada de cada repetición.
+
+Los resultados se guardan en JSON (por defecto en benchmarks/results/) para comparar
+corridas. El benchmark de base de datos solo corre con CORTE_BENCH_DATABASE_URL
+apuntando a un PostgreSQL de pruebas, porque escribe y borra filas.
+
+Uso, desde CortePerfecto:  python benchmarks/suite.py [-k filtro] [--repeats 7] [--output archivo.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+DEFAULT_REPEATS = 7
+
+# Segundos mínimos por repetición (se ajusta la cantidad de llamadas por repetición)
+MIN_REPEAT_TIME = 0.05
+
+# Base de datos de pruebas para el benchmark de escrituras (nunca la de producción)
+DATABASE_ENV = 'CORTE_BENCH_DATABASE_URL'
+
+
+class SkipBenchmark(Exception):
+    """El benchmark no puede correr en este entorno (falta un servicio o una biblioteca)"""
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Registra una función de preparación: devuelve la llamada (sin argumentos) que se mide"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# -------------------- CALCULADORA --------------------
+
+def _uncached_calculator():
+    from utils.calculator import CuttingCalculator
+    from utils.result_cache import ResultCache
+
+    return CuttingCalculator(ResultCache(0))
+
+
+@benchmark('calculator.optimal_grid')
+def optimal_grid():
+    calculator = _uncached_calculator()
+    return lambda: calculator.calculate_optimal(100, 70, 9.3, 6.1, 5000, 300, kerf=0.2, trim=0.5, gripper=1.0)
+
+
+@benchmark('calculator.optimal_grid_cached')
+def optimal_grid_cached():
+    from utils.calculator import CuttingCalculator
+    from utils.result_cache import ResultCache
+
+    calculator = CuttingCalculator(ResultCache(16))
+    return lambda: calculator.calculate_optimal(100, 70, 9.3, 6.1, 5000, 300)
+
+
+@benchmark('calculator.optimal_guillotine')
+def optimal_guillotine():
+    calculator = _uncached_calculator()
+    return lambda: calculator.calculate_optimal(100, 70, 9.3, 6.1, 5000, 300, mode='guillotine')
+
+
+@benchmark('calculator.optimal_guillotine3')
+def optimal_guillotine3():
+    calculator = _uncached_calculator()
+    return lambda: calculator.calculate_optimal(100, 70, 9.3, 6.1, 5000, 300, mode='guillotine3')
+
+
+def _batch_jobs(rows, distinct):
+    """Pedidos de un día: `rows` trabajos sobre `distinct` geometrías distintas"""
+    rng = np.random.default_rng(0)
+    geometry = rng.integers(0, distinct, rows)
+    sheets = np.array([(70.0, 100.0), (64.0, 88.0), (100.0, 70.0)])[rng.integers(0, 3, distinct)]
+    cuts = rng.integers(50, 300, (distinct, 2)) / 10
+    return {
+        'sheet_width': sheets[geometry, 0], 'sheet_height': sheets[geometry, 1],
+        'cut_width': cuts[geometry, 0], 'cut_height': cuts[geometry, 1],
+        'quantity': rng.integers(1, 20000, rows), 'grammage': np.full(rows, 300.0)
+    }
+
+
+@benchmark('calculator.batch_100k')
+def batch_100k():
+    calculator = _uncached_calculator()
+    jobs = _batch_jobs(100_000, 100_000)
+    return lambda: calculator.calculate_batch(jobs, use_cache=False)
+
+
+@benchmark('calculator.batch_100k_cached')
+def batch_100k_cached():
+    from utils.calculator import CuttingCalculator
+    from utils.result_cache import ResultCache
+
+    calculator = CuttingCalculator(ResultCache(4096))
+    jobs = _batch_jobs(100_000, 2000)
+    return lambda: calculator.calculate_batch(jobs)
+
+
+# -------------------- ACOMODO DE PIEZAS --------------------
+
+def _mixed_pieces(count):
+    """Lista de corte con `count` piezas de medidas distintas (2 a 30 cm, rotables)"""
+    rng = np.random.default_rng(0)
+    sizes = rng.integers(20, 301, (count, 2)) / 10
+    return [(width, height, 1, True) for width, height in sizes.tolist()]
+
+
+# Dos tamaños: el cociente entre ambos muestra si el acomodo crece más que linealmente
+@benchmark('nesting.pack_mixed_2k')
+def pack_mixed_2k():
+    from utils.nesting import RectanglePacker
+
+    items = _mixed_pieces(2000)
+    return lambda: RectanglePacker(100, 70, 0.2).pack(items)
+
+
+@benchmark('nesting.pack_mixed_8k')
+def pack_mixed_8k():
+    from utils.nesting import RectanglePacker
+
+    items = _mixed_pieces(8000)
+    return lambda: RectanglePacker(100, 70, 0.2).pack(items)
+
+
+# -------------------- CAJAS --------------------
+
+@benchmark('boxes.tapa_libro')
+def tapa_libro():
+    from utils.box_calculator import CalculadorasCajas
+
+    return lambda: CalculadorasCajas.calcular_tapa_libro(0.2, 30.0, 20.0, 8.0)
+
+
+@benchmark('boxes.tapa_suelta')
+def tapa_suelta():
+    from utils.box_calculator import CalculadorasCajas
+
+    return lambda: CalculadorasCajas.calcular_tapa_suelta(0.2, 30.0, 20.0, 8.0)
+
+
+@benchmark('boxes.redonda')
+def redonda():
+    from utils.box_calculator import CalculadorasCajas
+
+    return lambda: CalculadorasCajas.calcular_redonda(0.2, 15.0, 8.0, 3.0)
+
+
+@benchmark('boxes.catalogue_10k')
+def catalogue_10k():
+    from utils.box_calculator import CalculadorasCajas
+
+    rng = np.random.default_rng(0)
+    sizes = {'largo': rng.uniform(10, 40, 10_000), 'ancho': rng.uniform(10, 30, 10_000),
+             'alto': rng.uniform(3, 12, 10_000)}
+    return lambda: CalculadorasCajas.calcular_catalogo('tapa_libro', espesor=0.2, **sizes)
+
+
+# -------------------- VISTA PREVIA Y EXPORTACIONES --------------------
+
+def _result(cut_width=9.3, cut_height=6.1):
+    return _uncached_calculator().calculate_optimal(100, 70, cut_width, cut_height, 5000, 300)
+
+
+def _import_app():
+    try:
+        import app
+    except ImportError as error:
+        raise SkipBenchmark(f"No se puede importar app.py: {error}")
+    return app
+
+
+@benchmark('preview.figure_48')
+def preview_figure_48():
+    app = _import_app()
+    result = _result(12.5, 11.6)
+    return lambda: app.cutting_preview_figure(result)
+
+
+@benchmark('preview.figure_1750')
+def preview_figure_1750():
+    app = _import_app()
+    # Etiquetas de 2 x 2 cm en una hoja de 100 x 70: 1750 piezas
+    result = _result(2.0, 2.0)
+    return lambda: app.cutting_preview_figure(result)
+
+
+@benchmark('preview.figure_77k')
+def preview_figure_77k():
+    app = _import_app()
+    # Más piezas que PREVIEW_DETAIL_LIMIT: vista simplificada por bloques
+    result = _result(0.3, 0.3)
+    return lambda: app.cutting_preview_figure(result)
+
+
+@benchmark('app.rerun')
+def app_rerun():
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError as error:
+        raise SkipBenchmark(f"Falta streamlit.testing: {error}")
+    # Rerun completo del script con un cálculo hecho (lo que pasa en cada interacción)
+    app_test = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=120)
+    app_test.run()
+    next(button for button in app_test.button if 'Calcular Óptimo' in button.label).click().run()
+    if app_test.exception:
+        raise SkipBenchmark(f"La app falló: {app_test.exception[0].value}")
+    return app_test.run
+
+
+@benchmark('export.to_excel')
+def export_excel():
+    from utils.export_utils import ExportUtils
+
+    result = _result()
+    return lambda: ExportUtils().to_excel(result)
+
+
+@benchmark('export.to_pdf')
+def export_pdf():
+    from utils.export_utils import ExportUtils
+
+    result = _result()
+    return lambda: ExportUtils().to_pdf(result)
+
+
+# -------------------- BASE DE DATOS --------------------
+
+def _bench_database():
+    url = os.getenv(DATABASE_ENV)
+    if not url:
+        raise SkipBenchmark(f"Definir {DATABASE_ENV} con un PostgreSQL de pruebas")
+    from utils.database import DatabaseManager
+
+    # DatabaseManager toma la conexión de DATABASE_URL
+    previous = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = url
+    try:
+        return DatabaseManager()
+    finally:
+        if previous is None:
+            del os.environ['DATABASE_URL']
+        else:
+            os.environ['DATABASE_URL'] = previous
+
+
+@benchmark('database.save_history')
+def database_save_history():
+    database = _bench_database()
+    database.clear_calculation_history()
+    result = _result()
+    return lambda: database.save_calculation_to_history(result, cost_per_sheet=1.5)
+
+
+@benchmark('database.add_remnants_100')
+def database_add_remnants():
+    database = _bench_database()
+    remnants = [{'width': 20.0 + index % 30, 'height': 15.0, 'grammage': 300, 'source': 'benchmark'}
+                for index in range(100)]
+    return lambda: database.add_remnants(remnants)
+
+
+# -------------------- EJECUCIÓN --------------------
+
+def time_call(call, repeats=DEFAULT_REPEATS, min_repeat_time=MIN_REPEAT_TIME):
+    """Segundos por llamada de cada repetición y llamadas por repetición"""
+    call()  # calentamiento: importaciones perezosas y cachés de primera vez
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_repeat_time:
+            break
+        number *= 10 if elapsed < min_repeat_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        times.append((time.perf_counter() - start) / number)
+    return times, number
+
+
+def summarize(times):
+    """Mediana, cuartiles e IQR (rango intercuartil) de los tiempos por llamada"""
+    if len(times) > 1:
+        q1, median, q3 = statistics.quantiles(times, n=4, method='inclusive')
+    else:
+        q1 = median = q3 = times[0]
+    return {'median': median, 'q1': q1, 'q3': q3, 'iqr': q3 - q1, 'min': min(times), 'max': max(times)}
+
+
+def run_suite(pattern=None, repeats=DEFAULT_REPEATS, report=None):
+    """Corre los benchmarks cuyo nombre contiene `pattern` y devuelve el documento de resultados"""
+    benchmarks = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        try:
+            times, number = time_call(setup(), repeats)
+        except SkipBenchmark as reason:
+            benchmarks[name] = {'skipped': str(reason)}
+        else:
+            benchmarks[name] = dict(summarize(times), unit='s', number=number, times=times)
+        if report:
+            report(name, benchmarks[name])
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                    'platform': platform.platform(), 'processor': platform.processor(),
+                    'cpu_count': os.cpu_count()},
+        'repeats': repeats,
+        'benchmarks': benchmarks
+    }
+
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def print_result(name, result):
+    if 'skipped' in result:
+        print(f"{name:34} omitido: {result['skipped']}")
+    else:
+        print(f"{name:34} {format_time(result['median']):>10}  IQR {format_time(result['iqr']):>10}"
+              f"  ({result['number']} llamadas x {len(result['times'])})")
+
+
+def save_results(results, path=None):
+    """Guarda los resultados en JSON; sin ruta usa benchmarks/results/<fecha>.json"""
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, results['created'].replace(':', '') + '.json')
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(results, output, indent=2, ensure_ascii=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', help="Solo los benchmarks cuyo nombre contiene este texto")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--output', help="Archivo JSON de resultados")
+    parser.add_argument('--list', action='store_true', help="Lista los benchmarks y sale")
+    args = parser.parse_args(argv)
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return 0
+
+    results = run_suite(args.pattern, max(1, args.repeats), print_result)
+    print(f"Resultados en {save_results(results, args.output)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
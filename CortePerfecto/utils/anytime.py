@@ -0,0 +1,114 @@
+import math
+import time
+
+from utils.guillotine import EPSILON, TimeBudgetExceeded, solve_guillotine
+from utils.nesting import PACKING_ORDERS, RectanglePacker
+
+# Etapas de la búsqueda progresiva, de la más barata a la más cara
+# (nombre, etapas guillotina; None es la cuadrícula uniforme)
+ANYTIME_STAGES = (('grid', None), ('guillotine', 2), ('guillotine3', 3))
+
+
+def _grid_layout(sheet_width, sheet_height, cut_width, cut_height):
+    """Mejor cuadrícula uniforme (normal o rotada) con el mismo formato que solve_guillotine"""
+    best = None
+    for orientation, piece_width, piece_height in (('normal', cut_width, cut_height),
+                                                   ('rotated', cut_height, cut_width)):
+        columns = int((sheet_width + EPSILON) // piece_width)
+        rows = int((sheet_height + EPSILON) // piece_height)
+        if best is None or columns * rows > best['cuts_per_sheet']:
+            segments = [{
+                'x': 0.0, 'y': 0.0,
+                'piece_width': piece_width, 'piece_height': piece_height,
+                'columns': columns, 'rows': rows,
+                'orientation': orientation, 'count': columns * rows
+            }] if columns * rows else []
+            best = {
+                'cuts_per_sheet': columns * rows,
+                'cuts_horizontal': columns,
+                'cuts_vertical': rows,
+                'orientation': orientation,
+                'strip_direction': 'horizontal',
+                'stages': 1,
+                'strips': [{
+                    'x': 0.0, 'y': 0.0, 'width': sheet_width, 'height': sheet_height,
+                    'count': columns * rows, 'segments': segments
+                }] if segments else []
+            }
+    return best
+
+
+def anytime_layouts(sheet_width, sheet_height, cut_width, cut_height, time_budget=2.0):
+    """Busca el mejor patrón para una hoja entregando cada mejora apenas se encuentra
+
+    Generador: recorre ANYTIME_STAGES de la más barata a la más cara y cada vez que
+    una etapa mejora las piezas por hoja entrega el patrón (formato de solve_guillotine)
+    con la cota inferior (mejor encontrado), la cota superior (área de la hoja / área
+    del corte), la brecha relativa entre ambas y el tiempo transcurrido. Se detiene al
+    cerrar la brecha o al agotar `time_budget` segundos; una etapa interrumpida por
+    tiempo no entrega nada.
+    """
+    if sheet_width <= 0 or sheet_height <= 0 or cut_width <= 0 or cut_height <= 0:
+        raise ValueError("Todas las dimensiones deben ser mayores que cero")
+
+    start = time.perf_counter()
+    deadline = start + time_budget
+    upper_bound = int((sheet_width * sheet_height + EPSILON) // (cut_width * cut_height))
+    best = -1
+
+    for stage, stages in ANYTIME_STAGES:
+        if time.perf_counter() > deadline:
+            break
+        if stages is None:
+            layout = _grid_layout(sheet_width, sheet_height, cut_width, cut_height)
+        else:
+            try:
+                layout = solve_guillotine(sheet_width, sheet_height, cut_width, cut_height, stages, deadline)
+            except TimeBudgetExceeded:
+                break
+
+        if layout['cuts_per_sheet'] <= best:
+            continue
+        best = layout['cuts_per_sheet']
+        layout['stage'] = stage
+        layout['lower_bound'] = best
+        layout['upper_bound'] = upper_bound
+        layout['gap'] = (upper_bound - best) / upper_bound if upper_bound else 0.0
+        layout['elapsed'] = time.perf_counter() - start
+        yield layout
+        if best >= upper_bound:
+            break
+
+
+def anytime_pack(sheet_width, sheet_height, items, kerf=0.0, time_budget=2.0):
+    """Acomoda una lista de piezas mixta probando distintos órdenes dentro del tiempo límite
+
+    Generador: entrega cada acomodo de RectanglePacker que use menos hojas (o deje menos
+    piezas fuera) que el anterior, con la cota superior (hojas del mejor acomodo), la
+    cota inferior por área y la brecha relativa entre ambas.
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    packer = RectanglePacker(sheet_width, sheet_height, kerf)
+
+    piece_area = sum((item[0] + kerf) * (item[1] + kerf) * item[2] for item in items)
+    lower_bound = math.ceil(piece_area / ((sheet_width + kerf) * (sheet_height + kerf)) - EPSILON)
+    best = None
+
+    for order in PACKING_ORDERS:
+        if time.perf_counter() > deadline:
+            break
+        packed = packer.pack(items, order)
+        score = (len(packed['unplaced']), packed['sheets_used'])
+        if best is not None and score >= best:
+            continue
+        best = score
+        packed['order'] = order
+        packed['lower_bound'] = lower_bound
+        packed['upper_bound'] = packed['sheets_used']
+        packed['gap'] = ((packed['sheets_used'] - lower_bound) / packed['sheets_used']
+                         if packed['sheets_used'] else 0.0)
+        packed['elapsed'] = time.perf_counter() - start
+        yield packed
+        if not packed['unplaced'] and packed['sheets_used'] <= lower_bound:
+            break
@@ -0,0 +1,151 @@
+import base64
+import hashlib
+import io
+import os
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+
+# Carpeta que Streamlit sirve como app/static/ con server.enableStaticServing
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+STATIC_URL = 'app/static'
+GENERATED_DIRNAME = 'generated'
+
+# Lado mayor (px) de las miniaturas: el doble del mayor tamaño en pantalla (100 px) para pantallas HiDPI
+THUMBNAIL_SIZE = 200
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+MIME_TYPES = {
+    '.png': 'image/png', '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.gif': 'image/gif',
+    '.svg': 'image/svg+xml', '.webp': 'image/webp'
+}
+
+
+class AssetPipeline:
+    """Imágenes de assets/ preparadas una sola vez por proceso
+
+    La primera vez que se pide una imagen se busca su archivo, se generan miniaturas
+    de THUMBNAIL_SIZE px en WebP y JPEG y se escriben en static/generated/ con el hash
+    del contenido en el nombre (un cambio de imagen cambia la URL, así el navegador
+    puede guardarlas en caché sin riesgo). Después cada pedido es una consulta a un
+    diccionario: `src` devuelve la URL estática o, si Streamlit no sirve archivos
+    estáticos, un único data URI ya codificado de la miniatura.
+    """
+
+    def __init__(self, assets_dir=ASSETS_DIR, static_dir=STATIC_DIR, size=THUMBNAIL_SIZE):
+        self.assets_dir = assets_dir
+        self.static_dir = static_dir
+        self.size = size
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename):
+        """Datos de la imagen preparada (None si el archivo no existe)"""
+        with self._lock:
+            if filename not in self._assets:
+                self._assets[filename] = self._build(filename)
+            return self._assets[filename]
+
+    def src(self, filename, static_serving=False):
+        """Valor para el atributo src de <img> (None si la imagen no existe)"""
+        asset = self.get(filename)
+        if asset is None:
+            return None
+        if static_serving and asset['url']:
+            return asset['url']
+        return asset['data_uri']
+
+    def report(self):
+        """Bytes del original, de la miniatura y de cada forma de referenciarla, por imagen"""
+        with self._lock:
+            return {
+                filename: {
+                    'source_bytes': asset['source_bytes'],
+                    'thumbnail_bytes': asset['thumbnail_bytes'],
+                    'data_uri_bytes': len(asset['data_uri']),
+                    'url_bytes': len(asset['url'] or '')
+                }
+                for filename, asset in self._assets.items() if asset is not None
+            }
+
+    def resolve(self, filename):
+        """Ruta del archivo: primero assets/, después la ruta tal cual"""
+        for path in (os.path.join(self.assets_dir, filename), filename):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _build(self, filename):
+        path = self.resolve(filename)
+        if path is None:
+            return None
+        with open(path, 'rb') as source:
+            original = source.read()
+
+        extension = os.path.splitext(filename)[1].lower()
+        variants = {} if extension == '.svg' else self._thumbnails(original)
+        if variants:
+            # WebP si Pillow lo admite; si no, la miniatura JPEG
+            extension = '.webp' if '.webp' in variants else '.jpeg'
+            content = variants[extension]
+        else:
+            # SVG o sin Pillow: se usa el archivo original
+            content = original
+            variants = {extension: original}
+
+        names = {variant: self._write(filename, variant, data) for variant, data in variants.items()}
+        name = names[extension]
+        mime_type = MIME_TYPES.get(extension, 'application/octet-stream')
+        return {
+            'path': path,
+            'source_bytes': len(original),
+            'thumbnail_bytes': len(content),
+            'files': {variant: name for variant, name in names.items() if name},
+            'url': f"{STATIC_URL}/{GENERATED_DIRNAME}/{name}" if name else None,
+            'data_uri': f"data:{mime_type};base64,{base64.b64encode(content).decode()}"
+        }
+
+    def _thumbnails(self, original):
+        """Miniaturas WebP y JPEG (vacío si Pillow no está o no puede abrir la imagen)"""
+        try:
+            from PIL import Image, features
+        except ImportError:
+            return {}
+        try:
+            image = Image.open(io.BytesIO(original))
+            image.thumbnail((self.size, self.size), Image.LANCZOS)
+        except (OSError, ValueError):
+            return {}
+        image = image.convert('RGB')
+        variants = {}
+        if features.check('webp'):
+            output = io.BytesIO()
+            image.save(output, 'WEBP', quality=WEBP_QUALITY, method=6)
+            variants['.webp'] = output.getvalue()
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        variants['.jpeg'] = output.getvalue()
+        return variants
+
+    def _write(self, filename, extension, content):
+        """Escribe la variante en static/generated/ con su hash; None si no se puede escribir"""
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        name = f"{stem}-{self.size}-{digest}{extension}"
+        directory = os.path.join(self.static_dir, GENERATED_DIRNAME)
+        path = os.path.join(directory, name)
+        try:
+            if not os.path.exists(path):
+                os.makedirs(directory, exist_ok=True)
+                # Se escribe aparte y se renombra: otro proceso nunca ve un archivo a medias
+                temporary = f"{path}.{os.getpid()}.tmp"
+                with open(temporary, 'wb') as output:
+                    output.write(content)
+                os.replace(temporary, path)
+        except OSError:
+            return None
+        return name
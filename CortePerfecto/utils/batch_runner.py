@@ -0,0 +1,261 @@
+"""Costeo por lotes desde la línea de comandos
+
+Lee trabajos de un CSV o JSONL fila por fila, los calcula por tramos (en serie o con
+un ParallelBackend) y escribe cada resultado apenas está listo, así la memoria no
+crece con el tamaño del archivo. Al terminar informa trabajos, errores y velocidad.
+
+Cada trabajo es un corte en pliego (sheet_width, sheet_height, cut_width, cut_height,
+quantity, grammage y opcionalmente mode, kerf, trim, gripper) o una caja (box_type y
+los parámetros de su calculadora; con box_quantity, sheet_width y sheet_height además
+se acomodan las piezas de cartón en pliegos). La columna 'id', si existe, se copia.
+Un trabajo con datos inválidos no detiene el lote; el código de salida es 1 si hubo
+alguno.
+
+Uso (desde CortePerfecto):
+  python -m utils.batch_runner trabajos.csv resultados.csv [--workers 0] [--chunk-size 2000]
+"""
+import argparse
+import csv
+import inspect
+import json
+import sys
+import time
+
+from utils.calculator import CuttingCalculator
+from utils.imposition import BOX_CALCULATORS, impose_boxes
+from utils.parallel import ParallelBackend
+
+# Trabajos que se leen, calculan y escriben de una vez
+DEFAULT_CHUNK_SIZE = 2000
+
+# Columnas de salida (en JSONL se omiten las vacías)
+OUTPUT_COLUMNS = (
+    'line', 'id', 'kind', 'mode', 'box_type', 'box_quantity',
+    'sheet_width', 'sheet_height', 'cut_width', 'cut_height', 'kerf', 'trim', 'gripper',
+    'quantity_requested', 'grammage', 'orientation', 'cuts_per_sheet', 'sheets_required',
+    'total_cuts', 'usable_cuts', 'total_boards', 'utilization_percentage', 'waste_percentage',
+    'final_weight', 'pieces', 'error'
+)
+
+SHEET_COLUMNS = ('sheet_width', 'sheet_height', 'cut_width', 'cut_height', 'quantity', 'grammage')
+
+MARGIN_COLUMNS = ('kerf', 'trim', 'gripper')
+
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+# Parámetros que acepta la calculadora de cada tipo de caja
+BOX_PARAMETERS = {
+    box_type: tuple(inspect.signature(calculate).parameters) for box_type, calculate in BOX_CALCULATORS.items()
+}
+
+
+def run_job(job, calculator=None):
+    """Calcula un trabajo (diccionario de la fila) y devuelve su fila de resultado
+
+    Los errores de datos no detienen el lote: quedan en la columna 'error'.
+    """
+    calculator = calculator or CuttingCalculator()
+    row = {'line': job.get('line'), 'id': _text(job.get('id'))}
+    try:
+        if _text(job.get('box_type')):
+            row.update(_run_box(job))
+        else:
+            row.update(_run_sheet(job, calculator))
+    except (ValueError, TypeError, KeyError, ArithmeticError) as error:
+        row['error'] = f"{type(error).__name__}: {error}"
+    return row
+
+
+def _run_sheet(job, calculator):
+    missing = [name for name in SHEET_COLUMNS if _text(job.get(name)) is None]
+    if missing:
+        raise ValueError(f"Faltan columnas: {', '.join(missing)}")
+    mode = _text(job.get('mode')) or 'grid'
+    measures = [_number(job[name]) for name in SHEET_COLUMNS[:4]]
+    quantity, grammage = int(_number(job['quantity'])), _number(job['grammage'])
+    margins = {name: _number(job[name]) for name in MARGIN_COLUMNS if _text(job.get(name)) is not None}
+    if mode == 'inline':
+        result = calculator.calculate_inline(*measures, quantity, grammage, **margins)
+    else:
+        result = calculator.calculate_optimal(*measures, quantity, grammage, mode, **margins)
+    result = {name: value for name, value in result.items() if name in OUTPUT_COLUMNS}
+    return dict(result, kind='sheet', mode=mode)
+
+
+def _run_box(job):
+    box_type = _text(job['box_type'])
+    if box_type not in BOX_CALCULATORS:
+        raise ValueError(f"Tipo de caja desconocido: {box_type}")
+    # Solo se pasan las columnas que son parámetros de la calculadora de ese tipo
+    parameters = {
+        name: _number(job[name]) for name in BOX_PARAMETERS[box_type] if _text(job.get(name)) is not None
+    }
+    pieces = BOX_CALCULATORS[box_type](**parameters)
+    row = {
+        'kind': 'box',
+        'box_type': box_type,
+        'pieces': pieces.to_records()
+    }
+
+    if all(_text(job.get(name)) is not None for name in ('box_quantity', 'sheet_width', 'sheet_height')):
+        kerf = _number(job['kerf']) if _text(job.get('kerf')) is not None else 0.0
+        imposition = impose_boxes(box_type, parameters, int(_number(job['box_quantity'])),
+                                  _number(job['sheet_width']), _number(job['sheet_height']), kerf)
+        if imposition['unplaced']:
+            raise ValueError("Hay piezas de cartón que no caben en el pliego")
+        row.update({name: imposition[name] for name in (
+            'box_quantity', 'sheet_width', 'sheet_height', 'kerf', 'total_boards',
+            'utilization_percentage', 'waste_percentage')})
+    return row
+
+
+def _run_chunk(jobs):
+    """Tarea de proceso: un tramo de trabajos con la caché de ese proceso"""
+    calculator = CuttingCalculator()
+    return [run_job(job, calculator) for job in jobs]
+
+
+def _text(value):
+    """Valor de una celda o None si está vacía"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _number(value):
+    return float(_text(value))
+
+
+def read_jobs(stream, file_format):
+    """Trabajos de un CSV o JSONL, uno a la vez, con su número de línea en 'line'"""
+    if file_format == 'jsonl':
+        for line, text in enumerate(stream, start=1):
+            if text.strip():
+                try:
+                    job = json.loads(text)
+                except json.JSONDecodeError as error:
+                    job = {'error': f"JSONDecodeError: {error}"}
+                yield dict(job, line=line) if isinstance(job, dict) else {'line': line, 'error': 'La línea no es un objeto'}
+    else:
+        for line, job in enumerate(csv.DictReader(stream), start=2):
+            yield dict(job, line=line)
+
+
+def chunked(jobs, chunk_size):
+    """Agrupa un iterador de trabajos en listas de hasta `chunk_size`"""
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ResultWriter:
+    """Escribe filas de resultado en CSV (columnas fijas) o JSONL a medida que llegan"""
+
+    def __init__(self, stream, file_format):
+        self.stream = stream
+        self.file_format = file_format
+        self._csv = None
+        if file_format == 'csv':
+            self._csv = csv.DictWriter(stream, fieldnames=OUTPUT_COLUMNS, extrasaction='ignore')
+            self._csv.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            row = {name: _plain(value) for name, value in row.items() if value is not None}
+            if self._csv is not None:
+                if 'pieces' in row:
+                    row['pieces'] = json.dumps(row['pieces'], ensure_ascii=False)
+                self._csv.writerow(row)
+            else:
+                self.stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+def _plain(value):
+    """Números de NumPy a tipos de Python para CSV y JSON"""
+    return value.item() if hasattr(value, 'item') and not isinstance(value, (list, dict)) else value
+
+
+def run_batch(jobs, writer, backend=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Calcula y escribe todos los trabajos por tramos; devuelve (trabajos, errores)"""
+    backend = backend or ParallelBackend(1)
+    calculator = CuttingCalculator()
+    total = errors = 0
+    for chunk in chunked(jobs, chunk_size):
+        pending = [job for job in chunk if 'error' not in job]
+        if backend.serial:
+            computed = [run_job(job, calculator) for job in pending]
+        else:
+            # Cada proceso recibe un sub-tramo; map devuelve los resultados en orden
+            step = max(1, len(pending) // backend.workers)
+            parts = backend.map(_run_chunk, [pending[start:start + step] for start in range(0, len(pending), step)])
+            computed = [row for part in parts for row in part]
+        computed = iter(computed)
+        rows = [
+            {'line': job['line'], 'id': _text(job.get('id')), 'error': job['error']} if 'error' in job
+            else next(computed)
+            for job in chunk
+        ]
+        writer.write(rows)
+        total += len(rows)
+        errors += sum(1 for row in rows if row.get('error'))
+    return total, errors
+
+
+def _file_format(path, requested):
+    if requested:
+        return requested
+    return 'jsonl' if path.lower().endswith(JSONL_SUFFIXES) else 'csv'
+
+
+def _open(path, mode):
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m utils.batch_runner', description=__doc__.splitlines()[0])
+    parser.add_argument('input', help="Archivo de trabajos (.csv o .jsonl; '-' es la entrada estándar)")
+    parser.add_argument('output', help="Archivo de resultados (.csv o .jsonl; '-' es la salida estándar)")
+    parser.add_argument('--input-format', choices=('csv', 'jsonl'))
+    parser.add_argument('--output-format', choices=('csv', 'jsonl'))
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos de cálculo (1 = en serie, 0 = todos los núcleos o CORTE_WORKERS)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size debe ser mayor que cero")
+    if args.workers < 0:
+        parser.error("--workers no puede ser negativo")
+
+    input_format = _file_format(args.input, args.input_format)
+    output_format = _file_format(args.output, args.output_format)
+    start = time.perf_counter()
+    with ParallelBackend(args.workers) as backend:
+        source, target = _open(args.input, 'r'), _open(args.output, 'w')
+        try:
+            total, errors = run_batch(read_jobs(source, input_format), ResultWriter(target, output_format),
+                                      backend, args.chunk_size)
+        finally:
+            for stream in (source, target):
+                if stream not in (sys.stdin, sys.stdout):
+                    stream.close()
+    elapsed = time.perf_counter() - start
+
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"{total} trabajos ({errors} con error) en {elapsed:.2f} s: {rate:,.0f} trabajos/s "
+          f"con {backend.workers} proceso(s)", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
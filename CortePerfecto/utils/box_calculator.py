@@ -0,0 +1,268 @@
+import numpy as np
+
+# Grupos de piezas dentro del resultado de una caja
+GRUPO_CARTON = 'carton'              # Cartón - método corte separado
+GRUPO_VINCO = 'carton_vinco'         # Cartón - método corte y vinco
+GRUPO_REVESTIMIENTO = 'revestimiento'  # Revestimiento de papel
+GRUPO_DATO = 'dato'                  # Medidas auxiliares (no son piezas)
+
+# Arreglo estructurado compacto: una fila por pieza, medidas en cm
+PIEZA_DTYPE = np.dtype([
+    ('pieza', 'U32'),
+    ('ancho', 'f8'),
+    ('alto', 'f8'),
+    ('cantidad', 'i4')
+])
+
+# Lados que se muestran tal como los ingresó el usuario (sin redondear a un decimal),
+# igual que las medidas que el formulario original imprimía directamente
+LADOS_CRUDOS = {
+    'tapa_libro': {
+        'base': ('ancho', 'alto'), 'lateral_largo': ('alto',),
+        'lateral_ancho': ('ancho', 'alto'), 'lomo': ('alto',)
+    },
+    'tapa_suelta': {
+        'base': ('ancho', 'alto'), 'lateral_largo': ('alto',),
+        'lateral_ancho': ('ancho', 'alto'), 'fondo_base': ('ancho', 'alto')
+    },
+    'redonda': {
+        'base': ('ancho',), 'banda_base': ('alto',), 'banda_tapa': ('alto',)
+    }
+}
+
+
+class Pieza:
+    """Una pieza de la caja con sus medidas numéricas en cm
+
+    `alto` es None cuando la medida es un solo valor (diámetros, canaleta).
+    Los lados listados en `crudos` son medidas ingresadas y se muestran sin redondear.
+    """
+    __slots__ = ('clave', 'descripcion', 'grupo', 'ancho', 'alto', 'cantidad', 'crudos')
+
+    def __init__(self, clave, descripcion, grupo, ancho, alto=None, cantidad=1, crudos=()):
+        self.clave = clave
+        self.descripcion = descripcion
+        self.grupo = grupo
+        self.ancho = ancho
+        self.alto = alto
+        self.cantidad = cantidad
+        self.crudos = crudos
+
+    def _texto(self, lado, decimales):
+        valor = getattr(self, lado)
+        if lado in self.crudos:
+            return f"{valor}"
+        return f"{valor:.{decimales}f}"
+
+    def medida(self, decimales=1):
+        """Texto de la medida para mostrar ("30 x 25.4"); solo se usa al presentar"""
+        if self.alto is None:
+            return self._texto('ancho', decimales)
+        return f"{self._texto('ancho', decimales)} x {self._texto('alto', decimales)}"
+
+    def __repr__(self):
+        return f"Pieza({self.clave!r}, {self.medida()}, cantidad={self.cantidad})"
+
+
+class ResultadoCaja:
+    """Resultado de una calculadora de cajas: lista ordenada de piezas"""
+    __slots__ = ('tipo', 'piezas')
+
+    def __init__(self, tipo, piezas):
+        self.tipo = tipo
+        self.piezas = piezas
+
+    def __iter__(self):
+        return iter(self.piezas)
+
+    def __len__(self):
+        return len(self.piezas)
+
+    def __getitem__(self, clave):
+        for pieza in self.piezas:
+            if pieza.clave == clave:
+                return pieza
+        raise KeyError(clave)
+
+    def por_grupo(self, grupo):
+        """Piezas de un grupo (por ejemplo GRUPO_CARTON para acomodarlas en pliegos)"""
+        return [pieza for pieza in self.piezas if pieza.grupo == grupo]
+
+    def to_array(self):
+        """Arreglo estructurado (pieza, ancho, alto, cantidad); alto es NaN si no aplica"""
+        return np.array(
+            [(pieza.clave, pieza.ancho, np.nan if pieza.alto is None else pieza.alto, pieza.cantidad)
+             for pieza in self.piezas],
+            dtype=PIEZA_DTYPE
+        )
+
+    def to_records(self):
+        """Lista de diccionarios por pieza (para JSON); alto es None si no aplica"""
+        return [
+            {'pieza': pieza.clave, 'descripcion': pieza.descripcion, 'grupo': pieza.grupo,
+             'ancho': pieza.ancho, 'alto': pieza.alto, 'cantidad': pieza.cantidad}
+            for pieza in self.piezas
+        ]
+
+
+class CalculadorasCajas:
+    """Fórmulas de medidas para cada tipo de caja
+
+    Las fórmulas solo usan aritmética, así que funcionan igual con números sueltos
+    (una caja) que con arreglos de NumPy (un catálogo completo de cajas).
+    """
+
+    @staticmethod
+    def _medidas_tapa_libro(espesor, largo, ancho, alto, acabado_virada=1.0, espacio_ranura=0.3):
+        """Medidas Tapa Libro - Basada en Excel 'Tampa Livro'"""
+        # Variables específicas de tapa libro
+        canaleta = ((espesor * 2) / 10) + 0.1
+
+        # Cálculos para tapa
+        tapa_largo = largo + canaleta + canaleta
+        tapa_ancho = ancho + ((espesor * 2) / 10) + acabado_virada
+
+        return [
+            # MEDIDAS CARTÓN - MÉTODO CORTE SEPARADO
+            ('base', 'Base - 1 pieza', GRUPO_CARTON, largo, ancho, 1),
+            ('lateral_largo', 'Lateral (largo) - 2 piezas', GRUPO_CARTON, largo + ((espesor/10)*2), alto, 2),
+            ('lateral_ancho', 'Lateral (ancho) - 2 piezas', GRUPO_CARTON, ancho, alto, 2),
+            ('tapa', 'Tapa - 2 piezas', GRUPO_CARTON, tapa_largo, tapa_ancho, 2),
+            ('lomo', 'Lomo tapa', GRUPO_CARTON, tapa_largo, alto, 1),
+
+            # MEDIDAS CARTÓN - MÉTODO CORTE Y VINCO
+            ('placa_base', 'Tamaño placa de cartón - BASE', GRUPO_VINCO,
+             largo + alto + alto, ancho + alto + alto, 1),
+
+            # MEDIDAS REVESTIMIENTO PAPEL
+            ('parte_interna_base', 'Parte interna base', GRUPO_REVESTIMIENTO,
+             largo + alto + alto, ancho + alto + alto + acabado_virada, 1),
+            ('parte_externa_base_banda', 'Parte externa base banda', GRUPO_REVESTIMIENTO,
+             (ancho + (espesor*2)/10) + largo + (ancho + (espesor*2)/10) + acabado_virada + acabado_virada,
+             alto + acabado_virada + acabado_virada, 1),
+            ('parte_externa_tapa', 'Parte externa tapa', GRUPO_REVESTIMIENTO,
+             tapa_largo + acabado_virada + acabado_virada,
+             tapa_ancho + alto + tapa_ancho + acabado_virada + acabado_virada + acabado_virada + acabado_virada, 1),
+            ('parte_interna_tapa', 'Parte interna tapa', GRUPO_REVESTIMIENTO,
+             largo + espesor*2/10, tapa_ancho + 2, 1),
+
+            ('canaleta', 'Canaleta (cm)', GRUPO_DATO, canaleta, None, 1)
+        ]
+
+    @staticmethod
+    def _medidas_tapa_suelta(espesor, largo, ancho, alto, altura_tapa=3.0, acabado_virada=1.5):
+        """Medidas Tapa Suelta - Basada en Excel 'Tampa de solta'"""
+        # CONSTANTE: 1 mm extra para todas las medidas de tapa (0.1 cm)
+        EXTRA_TAPA = 0.1
+
+        # Tampa - CON 1mm EXTRA
+        tapa_largo = largo + ((espesor * 3) / 10) + EXTRA_TAPA
+        tapa_ancho = ancho + ((espesor * 3) / 10) + EXTRA_TAPA
+
+        return [
+            # MEDIDAS CARTÓN - MÉTODO CORTE SEPARADO
+            ('base', 'Base - 1 pieza', GRUPO_CARTON, largo, ancho, 1),
+            ('lateral_largo', 'Lateral (largo) - 2 piezas', GRUPO_CARTON, largo + ((espesor/10)*2), alto, 2),
+            ('lateral_ancho', 'Lateral (ancho) - 2 piezas', GRUPO_CARTON, ancho, alto, 2),
+            ('tapa', 'Tapa - 1 pieza', GRUPO_CARTON, tapa_largo, tapa_ancho, 1),
+            ('tapa_lateral_largo', 'Tapa lateral (largo) - 2 piezas', GRUPO_CARTON,
+             tapa_largo + ((espesor/10)*2) + EXTRA_TAPA, altura_tapa + EXTRA_TAPA, 2),
+            ('tapa_lateral_ancho', 'Tapa lateral (ancho) - 2 piezas', GRUPO_CARTON,
+             tapa_ancho + EXTRA_TAPA, altura_tapa + EXTRA_TAPA, 2),
+
+            # MEDIDAS CARTÓN - MÉTODO CORTE Y VINCO - CON 1mm EXTRA
+            ('placa_base', 'Tamaño placa de cartón - BASE', GRUPO_VINCO,
+             largo + alto + alto, ancho + alto + alto, 1),
+            ('placa_tapa', 'Tamaño placa de cartón - TAPA', GRUPO_VINCO,
+             tapa_largo + altura_tapa + altura_tapa + EXTRA_TAPA,
+             tapa_ancho + altura_tapa + altura_tapa + EXTRA_TAPA, 1),
+
+            # MEDIDAS REVESTIMIENTO PAPEL - CON 1mm EXTRA
+            ('parte_interna_base', 'Parte interna base', GRUPO_REVESTIMIENTO,
+             largo + alto + alto, ancho + alto + alto, 1),
+            ('banda_externa_base', 'Banda externa base', GRUPO_REVESTIMIENTO,
+             (largo + ((espesor/10)*2)) + (largo + ((espesor/10)*2)) + (ancho) + (ancho) + (espesor*4/10),
+             alto + acabado_virada + acabado_virada, 1),
+            ('fondo_base', 'Fondo base', GRUPO_REVESTIMIENTO, largo, ancho, 1),
+            ('parte_interna_tapa', 'Parte interna tapa', GRUPO_REVESTIMIENTO,
+             tapa_largo + altura_tapa + altura_tapa + EXTRA_TAPA,
+             tapa_ancho + altura_tapa + altura_tapa + EXTRA_TAPA, 1),
+            ('parte_externa_tapa', 'Parte externa tapa', GRUPO_REVESTIMIENTO,
+             tapa_largo + acabado_virada + acabado_virada + EXTRA_TAPA,
+             tapa_ancho + acabado_virada + acabado_virada + EXTRA_TAPA, 1)
+        ]
+
+    @staticmethod
+    def _medidas_redonda(espesor_banda, diametro_base, altura_banda_base, altura_banda_tapa):
+        """Medidas Caja Redonda - Basada en Excel 'Caja Redonda'"""
+        diametro_tapa = diametro_base + espesor_banda*3/10 + 0.1
+
+        return [
+            # MEDIDAS CARTÓN
+            ('base', 'Base circular (diámetro)', GRUPO_CARTON, diametro_base, None, 1),
+            ('banda_base', 'Banda base', GRUPO_CARTON, (diametro_base * 3.14) + 1, altura_banda_base, 1),
+            ('tapa', 'Tapa circular (diámetro)', GRUPO_CARTON, diametro_tapa, None, 1),
+            ('banda_tapa', 'Banda tapa', GRUPO_CARTON, (diametro_tapa * 3.14) + 1, altura_banda_tapa, 1)
+        ]
+
+    @staticmethod
+    def _resultado(tipo, medidas):
+        """Convierte la lista de medidas de una caja en un ResultadoCaja
+
+        Los lados crudos conservan el valor ingresado para mostrarlo igual que el formulario.
+        """
+        crudos = LADOS_CRUDOS.get(tipo, {})
+        piezas = []
+        for clave, descripcion, grupo, ancho, alto, cantidad in medidas:
+            lados = crudos.get(clave, ())
+            if 'ancho' not in lados:
+                ancho = float(ancho)
+            if alto is not None and 'alto' not in lados:
+                alto = float(alto)
+            piezas.append(Pieza(clave, descripcion, grupo, ancho, alto, cantidad, lados))
+        return ResultadoCaja(tipo, piezas)
+
+    @staticmethod
+    def calcular_tapa_libro(espesor, largo, ancho, alto, acabado_virada=1.0, espacio_ranura=0.3):
+        """Calculadora Tapa Libro - Basada en Excel 'Tampa Livro'"""
+        return CalculadorasCajas._resultado('tapa_libro', CalculadorasCajas._medidas_tapa_libro(
+            espesor, largo, ancho, alto, acabado_virada, espacio_ranura))
+
+    @staticmethod
+    def calcular_tapa_suelta(espesor, largo, ancho, alto, altura_tapa=3.0, acabado_virada=1.5):
+        """Calculadora Tapa Suelta - Basada en Excel 'Tampa de solta'"""
+        return CalculadorasCajas._resultado('tapa_suelta', CalculadorasCajas._medidas_tapa_suelta(
+            espesor, largo, ancho, alto, altura_tapa, acabado_virada))
+
+    @staticmethod
+    def calcular_redonda(espesor_banda, diametro_base, altura_banda_base, altura_banda_tapa):
+        """Calculadora Redonda - Basada en Excel 'Caja Redonda'"""
+        return CalculadorasCajas._resultado('redonda', CalculadorasCajas._medidas_redonda(
+            espesor_banda, diametro_base, altura_banda_base, altura_banda_tapa))
+
+    @staticmethod
+    def calcular_catalogo(tipo, **parametros):
+        """Calcula las piezas de todo un catálogo de cajas en una sola llamada
+
+        Cada parámetro puede ser un número o un arreglo (una posición por SKU). Devuelve un
+        arreglo estructurado PIEZA_DTYPE de forma (cantidad de SKUs, piezas por caja).
+        """
+        medidas = {
+            'tapa_libro': CalculadorasCajas._medidas_tapa_libro,
+            'tapa_suelta': CalculadorasCajas._medidas_tapa_suelta,
+            'redonda': CalculadorasCajas._medidas_redonda
+        }
+        if tipo not in medidas:
+            raise ValueError(f"Tipo de caja desconocido: {tipo}")
+
+        columnas = {nombre: np.asarray(valor, dtype=np.float64) for nombre, valor in parametros.items()}
+        skus = np.broadcast_shapes(*(columna.shape for columna in columnas.values()))
+        filas = medidas[tipo](**columnas)
+
+        catalogo = np.empty(skus + (len(filas),), dtype=PIEZA_DTYPE)
+        for posicion, (clave, _, _, ancho, alto, cantidad) in enumerate(filas):
+            catalogo['pieza'][..., posicion] = clave
+            catalogo['ancho'][..., posicion] = np.broadcast_to(ancho, skus)
+            catalogo['alto'][..., posicion] = np.nan if alto is None else np.broadcast_to(alto, skus)
+            catalogo['cantidad'][..., posicion] = cantidad
+        return catalogo
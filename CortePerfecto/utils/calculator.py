@@ -1,46 +1,498 @@
+import heapq
 import math
 
+import numpy as np
+
+from utils.anytime import anytime_layouts
+from utils.fixed_point import from_micrometres, grid_fit, guillotine_area, offset_layout, to_micrometres
+from utils.guillotine import solve_guillotine
+from utils.layout import Layout
+from utils.remnants import MIN_REMNANT_SIDE, layout_offcuts, partial_layout
+from utils.result_cache import KEY_RESOLUTION, RESULT_CACHE, ResultCache, length_key
+
+# Etapas del optimizador guillotina según el modo de cálculo
+GUILLOTINE_STAGES = {'guillotine': 2, 'guillotine3': 3}
+
+# Orden de los criterios para clasificar los pliegos del catálogo
+STOCK_RANKINGS = {
+    'sheets': ('sheets_required', 'waste_area', 'total_cost'),
+    'waste': ('waste_area', 'sheets_required', 'total_cost'),
+    'cost': ('total_cost', 'sheets_required', 'waste_area')
+}
+
+# Columnas de entrada esperadas por el cálculo por lotes
+BATCH_COLUMNS = ('sheet_width', 'sheet_height', 'cut_width', 'cut_height', 'quantity', 'grammage')
+
+# Modos de la etapa geométrica (calculate_layout)
+LAYOUT_MODES = ('grid', 'inline') + tuple(GUILLOTINE_STAGES)
+
+# Claves del patrón elegido que pasan al resultado
+LAYOUT_KEYS = ('orientation', 'strip_direction', 'stages', 'strips')
+
+# Columnas opcionales del lote con los márgenes de corte en cm (si faltan valen 0)
+BATCH_MARGINS = ('kerf', 'trim', 'gripper')
+
 class CuttingCalculator:
     """Calculadora para optimizar cortes en hojas de papel"""
     
-    def __init__(self):
-        pass
+    def __init__(self, cache=None):
+        # Por defecto se usa la caché compartida por todo el proceso
+        self.cache = RESULT_CACHE if cache is None else cache
     
-    def calculate_optimal(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage):
-        """Calcula el corte óptimo considerando las dos orientaciones posibles"""
+    def calculate_optimal(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage, mode='grid',
+                          kerf=0.0, trim=0.0, gripper=0.0):
+        """Calcula el corte óptimo considerando las dos orientaciones posibles
         
-        # Calcular cortes en orientación normal
-        normal_result = self._calculate_cuts(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage)
+        Con mode='grid' se prueba una cuadrícula uniforme (todas normales o todas rotadas).
+        Con mode='guillotine' (2 etapas) o 'guillotine3' (3 etapas) se mezclan orientaciones
+        dentro de la hoja y el resultado incluye el detalle por tira en 'strips'.
+        Las medidas se redondean a 0.1 mm y el patrón se guarda en la caché sin la
+        cantidad ni el gramaje: si solo cambian esos valores se recalculan los totales
+        (cost_layout) sin volver a armar el patrón (calculate_layout).
+        `kerf` es el corte de cuchilla entre piezas vecinas, `trim` el refile de cada
+        borde y `gripper` la pinza del borde inferior, todo en cm.
+        """
         
-        # Calcular cortes en orientación rotada (90 grados)
-        rotated_result = self._calculate_cuts(sheet_width, sheet_height, cut_height, cut_width, quantity, grammage)
+        if mode != 'grid' and mode not in GUILLOTINE_STAGES:
+            raise ValueError(f"Modo de cálculo desconocido: {mode}")
         
-        # Elegir la mejor opción (mayor utilización)
-        if normal_result['utilization_percentage'] >= rotated_result['utilization_percentage']:
-            result = normal_result
-            result['orientation'] = 'normal'
+        layout = self.calculate_layout(sheet_width, sheet_height, cut_width, cut_height, mode,
+                                       kerf, trim, gripper)
+        return self.cost_layout(layout, quantity, grammage)
+    
+    def calculate_inline(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                         kerf=0.0, trim=0.0, gripper=0.0):
+        """Calcula cortes en línea (sin rotación)"""
+        layout = self.calculate_layout(sheet_width, sheet_height, cut_width, cut_height, 'inline',
+                                       kerf, trim, gripper)
+        return self.cost_layout(layout, quantity, grammage)
+    
+    def calculate_layout(self, sheet_width, sheet_height, cut_width, cut_height, mode='grid',
+                         kerf=0.0, trim=0.0, gripper=0.0):
+        """Etapa geométrica: patrones de corte de una hoja (se guardan en la caché)
+        
+        Solo depende de las medidas, el modo y los márgenes. Devuelve las medidas en cm
+        y en 'candidates' los patrones que compara cost_layout: las dos orientaciones
+        de la cuadrícula, la única del modo 'inline' o el patrón de la guillotina.
+        """
+        
+        if mode not in LAYOUT_MODES:
+            raise ValueError(f"Modo de cálculo desconocido: {mode}")
+        if not all(math.isfinite(value) for value in (sheet_width, sheet_height, cut_width, cut_height,
+                                                       kerf, trim, gripper)):
+            raise ValueError("Las medidas deben ser números finitos")
+        if kerf < 0 or trim < 0 or gripper < 0:
+            raise ValueError("El kerf, el refile y la pinza no pueden ser negativos")
+        
+        key = self.cache_key(mode, sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper)
+        # Se mira la clave: una medida que se redondea a 0 también dividiría por cero
+        if min(key[1:5]) <= 0:
+            raise ValueError("Todas las dimensiones deben ser mayores que cero")
+        return self.cache.get_or_compute(key, lambda: self._calculate_layout(*self._key_arguments(key), mode))
+    
+    def cost_layout(self, layout, quantity, grammage):
+        """Etapa de costeo: hojas, utilización y peso de un patrón para una cantidad
+        
+        Entre los candidatos del patrón gana el de mayor utilización (el primero si
+        empatan). Es barata: no vuelve a calcular la geometría.
+        """
+        best = None
+        for candidate in layout['candidates']:
+            result = self._calculate_totals(layout['sheet_width'], layout['sheet_height'],
+                                            layout['cut_width'], layout['cut_height'],
+                                            candidate['cuts_horizontal'], candidate['cuts_vertical'],
+                                            candidate['cuts_per_sheet'], quantity, grammage)
+            if best is None or result['utilization_percentage'] > best[0]['utilization_percentage']:
+                best = (result, candidate)
+        
+        result, candidate = best
+        for key in LAYOUT_KEYS:
+            if key in candidate:
+                result[key] = candidate[key]
+        result.update(kerf=layout['kerf'], trim=layout['trim'], gripper=layout['gripper'])
+        return result
+    
+    def piece_layout(self, result):
+        """Posiciones de las piezas de una hoja del resultado (Layout, generadas bajo demanda)"""
+        return Layout.from_result(result)
+    
+    def _calculate_layout(self, sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper, mode):
+        """Calcula el patrón sin pasar por la caché"""
+        
+        if mode in GUILLOTINE_STAGES:
+            candidates = [self._calculate_guillotine(sheet_width, sheet_height, cut_width, cut_height,
+                                                     GUILLOTINE_STAGES[mode], kerf, trim, gripper)]
         else:
-            result = rotated_result
-            result['orientation'] = 'rotated'
-            result['cut_width'], result['cut_height'] = result['cut_height'], result['cut_width']
+            # Piezas por dimensión con enteros en micrómetros (pisos exactos)
+            sheet_units = (to_micrometres(sheet_width), to_micrometres(sheet_height))
+            cut_units = (to_micrometres(cut_width), to_micrometres(cut_height))
+            margin_units = (to_micrometres(kerf), to_micrometres(trim), to_micrometres(gripper))
+            if mode == 'inline':
+                counts = [('inline', *grid_fit(*sheet_units, *cut_units, *margin_units))]
+            else:
+                # Orientación normal y rotada (90 grados)
+                counts = [('normal', *grid_fit(*sheet_units, *cut_units, *margin_units)),
+                          ('rotated', *grid_fit(*sheet_units, *cut_units[::-1], *margin_units))]
+            candidates = [self._grid_candidate(*count) for count in counts]
         
+        return self._layout(sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper, candidates)
+    
+    def _layout(self, sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper, candidates):
+        """Arma el patrón que se guarda en la caché"""
+        return {
+            'sheet_width': sheet_width,
+            'sheet_height': sheet_height,
+            'cut_width': cut_width,
+            'cut_height': cut_height,
+            'kerf': kerf,
+            'trim': trim,
+            'gripper': gripper,
+            'candidates': tuple(candidates)
+        }
+    
+    def _grid_candidate(self, orientation, cuts_horizontal, cuts_vertical):
+        """Candidato de cuadrícula uniforme"""
+        return {
+            'orientation': orientation,
+            'cuts_horizontal': int(cuts_horizontal),
+            'cuts_vertical': int(cuts_vertical),
+            'cuts_per_sheet': int(cuts_horizontal * cuts_vertical)
+        }
+    
+    def plan_with_remnants(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                           remnants, mode='grid', min_remnant_side=MIN_REMNANT_SIDE):
+        """Planifica un trabajo usando primero los sobrantes y después hojas nuevas
+        
+        `remnants` es un RemnantIndex. Se toma cada vez el sobrante de menor área donde
+        cabe el corte (mismo gramaje) hasta cubrir la cantidad o quedarse sin sobrantes;
+        lo que falta va a hojas nuevas de sheet_width x sheet_height. El índice no se
+        modifica: el plan se registra con RemnantStore.apply_plan al terminar el trabajo.
+        'new_remnants' son los recortes de cada hoja y sobrante usados (la última hoja
+        y los sobrantes a medio usar solo con las filas o tiras que llevan piezas) cuyos
+        lados miden al menos `min_remnant_side`.
+        """
+        remaining = quantity
+        remnants_used = []
+        new_remnants = []
+        chosen = set()
+        
+        while remaining > 0:
+            remnant = remnants.best_fit(cut_width, cut_height, grammage, chosen)
+            if remnant is None:
+                break
+            chosen.add(remnant['id'])
+            result = self.calculate_optimal(float(remnant['width']), float(remnant['height']),
+                                            cut_width, cut_height, remaining, grammage, mode)
+            if result['cuts_per_sheet'] == 0:
+                continue
+            pieces = min(result['cuts_per_sheet'], remaining)
+            remaining -= pieces
+            remnants_used.append({'remnant': remnant, 'pieces': pieces, 'result': result})
+            new_remnants += layout_offcuts(partial_layout(result, pieces), min_remnant_side)
+        
+        new_sheets = None
+        if remaining > 0:
+            new_sheets = self.calculate_optimal(sheet_width, sheet_height, cut_width, cut_height,
+                                                remaining, grammage, mode)
+            sheets = new_sheets['sheets_required']
+            if sheets:
+                # Las hojas llenas repiten el patrón; la última solo lleva las piezas que faltan
+                last_pieces = remaining - (sheets - 1) * new_sheets['cuts_per_sheet']
+                new_remnants += layout_offcuts(new_sheets, min_remnant_side) * (sheets - 1)
+                new_remnants += layout_offcuts(partial_layout(new_sheets, last_pieces), min_remnant_side)
+        
+        return {
+            'quantity': quantity,
+            'grammage': grammage,
+            'remnants_used': remnants_used,
+            'pieces_from_remnants': quantity - remaining,
+            'new_sheets': new_sheets,
+            'sheets_required': new_sheets['sheets_required'] if new_sheets else 0,
+            'new_remnants': new_remnants
+        }
+    
+    def calculate_anytime(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage, time_budget=2.0,
+                          kerf=0.0, trim=0.0, gripper=0.0):
+        """Versión progresiva de calculate_optimal con tiempo límite
+        
+        Generador: entrega un resultado completo (mismas claves que calculate_optimal más
+        'stage', 'lower_bound', 'upper_bound', 'gap' y 'elapsed') cada vez que la búsqueda
+        encuentra un patrón con más piezas por hoja. El último entregado es el mejor.
+        """
+        area = guillotine_area(sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper)
+        for layout in anytime_layouts(*area, time_budget):
+            layout = offset_layout(layout, kerf, trim, gripper)
+            result = self._calculate_totals(sheet_width, sheet_height, cut_width, cut_height,
+                                            layout['cuts_horizontal'], layout['cuts_vertical'],
+                                            layout['cuts_per_sheet'], quantity, grammage)
+            for key in ('orientation', 'strip_direction', 'stages', 'strips',
+                        'stage', 'lower_bound', 'upper_bound', 'gap', 'elapsed'):
+                result[key] = layout[key]
+            result.update(kerf=kerf, trim=trim, gripper=gripper)
+            yield result
+    
+    def calculate_batch(self, jobs, use_cache=True):
+        """Calcula el corte óptimo para muchos trabajos a la vez (forma vectorizada)
+        
+        `jobs` puede ser un DataFrame de pandas o un diccionario de arreglos con las
+        columnas de BATCH_COLUMNS (y opcionalmente las de BATCH_MARGINS). Devuelve el
+        mismo tipo de contenedor, con una fila por trabajo y las mismas claves que
+        `calculate_optimal`.
+        Con use_cache los patrones de cada geometría distinta se consultan y se guardan
+        en la misma caché que usa `calculate_optimal`, así se calculan una sola vez.
+        """
+        columns = {name: np.asarray(jobs[name]) for name in BATCH_COLUMNS}
+        if not all(np.all(np.isfinite(columns[name].astype(np.float64))) for name in BATCH_COLUMNS[:4]):
+            raise ValueError("Las medidas deben ser números finitos")
+        sheet_width = self._normalize_batch(columns['sheet_width'])
+        sheet_height = self._normalize_batch(columns['sheet_height'])
+        cut_width = self._normalize_batch(columns['cut_width'])
+        cut_height = self._normalize_batch(columns['cut_height'])
+        
+        if np.any(sheet_width <= 0) or np.any(sheet_height <= 0) or np.any(cut_width <= 0) or np.any(cut_height <= 0):
+            raise ValueError("Todas las dimensiones deben ser mayores que cero")
+        
+        # Márgenes opcionales: kerf, refile y pinza (0 si la columna no está)
+        margins = [
+            self._normalize_batch(np.asarray(jobs[name]) if name in jobs else np.zeros(len(sheet_width)))
+            for name in BATCH_MARGINS
+        ]
+        if any(np.any(margin < 0) for margin in margins):
+            raise ValueError("El kerf, el refile y la pinza no pueden ser negativos")
+        
+        quantity = columns['quantity']
+        grammage = columns['grammage']
+        
+        if use_cache and self.cache.maxsize > 0 and len(sheet_width):
+            result = self._calculate_batch_cached(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                                                  *margins)
+        else:
+            result = self._calculate_batch(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                                           *margins)
+        
+        if hasattr(jobs, 'columns'):
+            return type(jobs)(result, index=jobs.index)
         return result
     
-    def calculate_inline(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage):
-        """Calcula cortes en línea (sin rotación)"""
-        result = self._calculate_cuts(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage)
-        result['orientation'] = 'inline'
+    def select_stock(self, cut_width, cut_height, quantity, stock_sheets, cost_per_sheet=0,
+                     mode='grid', rank_by='sheets', top=5, backend=None):
+        """Elige los mejores pliegos del catálogo para un corte y una cantidad
+        
+        `stock_sheets` es una lista de diccionarios como los de la tabla `templates`
+        (sheet_width, sheet_height y opcionalmente name, grammage y cost_per_sheet; si
+        no traen costo se usa `cost_per_sheet`). Cada pliego se evalúa en sus dos
+        orientaciones, que en calculate_optimal equivale a rotar la pieza.
+        
+        Antes de calcular un pliego se acota su mejor resultado posible por área (piezas
+        por hoja <= área del pliego / área del corte) y los pliegos se recorren de mejor
+        a peor cota: en cuanto una cota ya no mejora el último de los `top` mejores, el
+        resto del catálogo se descarta sin calcularlo.
+        
+        Devuelve las opciones ordenadas según `rank_by` ('sheets', 'waste' o 'cost')
+        junto con cuántos pliegos se evaluaron y cuántos se descartaron. Con un
+        `backend` (ParallelBackend) los pliegos se calculan por rondas en varios
+        procesos y el resultado es el mismo que en serie.
+        """
+        if rank_by not in STOCK_RANKINGS:
+            raise ValueError(f"Criterio de clasificación desconocido: {rank_by}")
+        if cut_width <= 0 or cut_height <= 0 or quantity <= 0:
+            raise ValueError("Las dimensiones del corte y la cantidad deben ser mayores que cero")
+        
+        criteria = STOCK_RANKINGS[rank_by]
+        cut_area = cut_width * cut_height
+        short_side, long_side = sorted((cut_width, cut_height))
+        
+        candidates = []
+        for index, stock in enumerate(stock_sheets):
+            sheet_width = float(stock['sheet_width'])
+            sheet_height = float(stock['sheet_height'])
+            sheet_short, sheet_long = sorted((sheet_width, sheet_height))
+            max_cuts = int(sheet_width * sheet_height // cut_area)
+            if short_side > sheet_short or long_side > sheet_long or max_cuts == 0:
+                continue
+            
+            cost = stock.get('cost_per_sheet')
+            cost = float(cost_per_sheet if cost is None else cost)
+            sheets_bound = math.ceil(quantity / max_cuts)
+            bound = {
+                'sheets_required': sheets_bound,
+                'waste_area': sheets_bound * sheet_width * sheet_height - quantity * cut_area,
+                'total_cost': sheets_bound * cost
+            }
+            candidates.append((tuple(bound[name] for name in criteria), index, stock, cost))
+        candidates.sort(key=lambda candidate: candidate[:2])
+        
+        best = []  # montículo con las `top` mejores opciones (clave negada)
+        evaluated = 0
+        position = 0
+        # La cuadrícula tarda microsegundos por pliego: repartirla entre procesos no compensa
+        if mode == 'grid':
+            backend = None
+        # En paralelo se evalúan rondas de varios pliegos; en serie, de a uno
+        round_size = 1 if backend is None or backend.serial else backend.workers * 4
+        while position < len(candidates):
+            batch = []
+            while position < len(candidates) and len(batch) < round_size:
+                if len(best) >= top and candidates[position][0] > tuple(-value for value in best[0][0]):
+                    break
+                batch.append(candidates[position])
+                position += 1
+            if not batch:
+                break
+            evaluated += len(batch)
+            
+            tasks = [
+                (float(stock['sheet_width']), float(stock['sheet_height']), cut_width, cut_height,
+                 quantity, stock.get('grammage') or 0, mode)
+                for _, _, stock, _ in batch
+            ]
+            # Los resultados llegan en el orden de las tareas: la mezcla es determinista
+            for (_, index, stock, cost), result in zip(batch, self._calculate_tasks(tasks, backend)):
+                if result['cuts_per_sheet'] == 0:
+                    continue
+                result['waste_area'] = (result['sheets_required'] * result['sheet_width'] * result['sheet_height']
+                                        - quantity * cut_area)
+                result['cost_per_sheet'] = cost
+                result['total_cost'] = result['sheets_required'] * cost
+                result['stock'] = stock
+                key = tuple(result[name] for name in criteria)
+                entry = (tuple(-value for value in key), -index, result)
+                if len(best) < top:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+        
+        options = [result for _, _, result in sorted(best, key=lambda entry: entry[:2], reverse=True)]
+        return {
+            'rank_by': rank_by,
+            'options': options,
+            'candidates': len(candidates),
+            'evaluated': evaluated,
+            'pruned': len(candidates) - evaluated
+        }
+    
+    def _calculate_tasks(self, tasks, backend=None):
+        """Calcula varias llamadas a calculate_optimal, en paralelo si hay backend
+        
+        A los procesos solo va la etapa geométrica de los patrones que no están en la
+        caché; los patrones calculados se guardan en la caché de este proceso y el
+        costeo se hace aquí.
+        """
+        if backend is None or backend.serial:
+            return [self.calculate_optimal(*task) for task in tasks]
+        
+        keys = [self.cache_key(task[6], *task[:4]) for task in tasks]
+        layouts = [self.cache.get(key) for key in keys]
+        missing = [index for index, layout in enumerate(layouts) if layout is None]
+        for index, layout in zip(missing, backend.map(_layout_task, [tasks[index] for index in missing])):
+            self.cache.put(keys[index], layout)
+            layouts[index] = layout
+        return [self.cost_layout(layout, task[4], task[5]) for layout, task in zip(layouts, tasks)]
+    
+    def _calculate_batch(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                         kerf, trim, gripper):
+        """Calcula el lote completo sin pasar por la caché (medidas en micrómetros enteros)"""
+        
+        # Ambas orientaciones para todas las filas
+        normal = grid_fit(sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper)
+        rotated = grid_fit(sheet_width, sheet_height, cut_height, cut_width, kerf, trim, gripper)
+        return self._cost_batch(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                                kerf, trim, gripper, normal, rotated)
+    
+    def _calculate_batch_cached(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                                kerf, trim, gripper):
+        """Calcula el lote consultando la caché de patrones una vez por geometría distinta
+        
+        La cantidad y el gramaje no forman parte de la clave, así que los trabajos que
+        solo difieren en esos valores comparten patrón. Si el lote tiene más geometrías
+        distintas que la caché, guardarlas solo desplazaría los patrones de las sesiones
+        interactivas: se calculan sin pasar por ella.
+        """
+        
+        geometry = np.column_stack([sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper])
+        unique, inverse = np.unique(geometry, axis=0, return_inverse=True)
+        if len(unique) > self.cache.maxsize:
+            return self._calculate_batch(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                                         kerf, trim, gripper)
+        
+        # Mismas claves que calculate_layout: las medidas son enteros de micrómetros
+        keys = [('grid',) + tuple(row) for row in unique.tolist()]
+        
+        layouts = [self.cache.get(key) for key in keys]
+        missing = [index for index, layout in enumerate(layouts) if layout is None]
+        if missing:
+            rows = unique[missing]
+            normal = grid_fit(*rows.T)
+            rotated = grid_fit(rows[:, 0], rows[:, 1], rows[:, 3], rows[:, 2], rows[:, 4], rows[:, 5], rows[:, 6])
+            for position, index in enumerate(missing):
+                candidates = [self._grid_candidate('normal', normal[0][position], normal[1][position]),
+                              self._grid_candidate('rotated', rotated[0][position], rotated[1][position])]
+                layouts[index] = self._layout(*from_micrometres(rows[position]).tolist(), candidates)
+                self.cache.put(keys[index], layouts[index])
+        
+        # (geometría, orientación, columnas/filas) llevado a cada fila del lote
+        counts = np.array([
+            [(candidate['cuts_horizontal'], candidate['cuts_vertical']) for candidate in layout['candidates']]
+            for layout in layouts
+        ], dtype=np.int64)[inverse.ravel()]
+        return self._cost_batch(sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                                kerf, trim, gripper, (counts[:, 0, 0], counts[:, 0, 1]),
+                                (counts[:, 1, 0], counts[:, 1, 1]))
+    
+    def _cost_batch(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage,
+                    kerf, trim, gripper, normal, rotated):
+        """Versión vectorizada de cost_layout para la cuadrícula
+        
+        Recibe las medidas en micrómetros enteros y las (columnas, filas) de cada
+        orientación; devuelve las medidas en cm.
+        """
+        
+        sheet_width, sheet_height = from_micrometres(sheet_width), from_micrometres(sheet_height)
+        cut_width, cut_height = from_micrometres(cut_width), from_micrometres(cut_height)
+        normal = self._calculate_totals_batch(sheet_width, sheet_height, cut_width, cut_height, *normal,
+                                              quantity, grammage)
+        rotated = self._calculate_totals_batch(sheet_width, sheet_height, cut_width, cut_height, *rotated,
+                                               quantity, grammage)
+        
+        # Misma regla de desempate que calculate_optimal: gana la normal si empata
+        use_normal = normal['utilization_percentage'] >= rotated['utilization_percentage']
+        result = {key: np.where(use_normal, normal[key], rotated[key]) for key in normal}
+        
+        result['orientation'] = np.where(use_normal, 'normal', 'rotated')
+        result['kerf'] = from_micrometres(kerf)
+        result['trim'] = from_micrometres(trim)
+        result['gripper'] = from_micrometres(gripper)
         return result
     
-    def _calculate_cuts(self, sheet_width, sheet_height, cut_width, cut_height, quantity, grammage):
-        """Realiza los cálculos básicos de corte"""
+    def cache_key(self, mode, sheet_width, sheet_height, cut_width, cut_height, kerf=0.0, trim=0.0, gripper=0.0):
+        """Clave de caché del patrón: modo y medidas en micrómetros enteros redondeadas a 0.1 mm"""
+        return (mode, length_key(sheet_width), length_key(sheet_height), length_key(cut_width),
+                length_key(cut_height), length_key(kerf), length_key(trim), length_key(gripper))
+    
+    def _key_arguments(self, key):
+        """Medidas en cm a partir de una clave de caché"""
+        return tuple(from_micrometres(value) for value in key[1:])
+    
+    def _normalize_batch(self, values):
+        """Versión vectorizada de length_key: micrómetros enteros redondeados a 0.1 mm"""
+        return to_micrometres(np.rint(values.astype(np.float64) * KEY_RESOLUTION) / KEY_RESOLUTION)
+    
+    def _calculate_guillotine(self, sheet_width, sheet_height, cut_width, cut_height, stages,
+                              kerf=0.0, trim=0.0, gripper=0.0):
+        """Patrón del optimizador guillotina (orientaciones mezcladas)"""
         
-        # Calcular cuántos cortes caben por dimensión
-        cuts_horizontal = int(sheet_width // cut_width)
-        cuts_vertical = int(sheet_height // cut_height)
+        # Con kerf se resuelve con piezas y área infladas y después se lleva el patrón al pliego
+        area = guillotine_area(sheet_width, sheet_height, cut_width, cut_height, kerf, trim, gripper)
+        layout = solve_guillotine(*area, stages)
+        layout = offset_layout(layout, kerf, trim, gripper)
         
-        # Cortes por hoja
-        cuts_per_sheet = cuts_horizontal * cuts_vertical
+        candidate = {key: layout[key] for key in ('cuts_horizontal', 'cuts_vertical', 'cuts_per_sheet')}
+        candidate.update((key, layout[key]) for key in LAYOUT_KEYS)
+        return candidate
+    
+    def _calculate_totals(self, sheet_width, sheet_height, cut_width, cut_height,
+                          cuts_horizontal, cuts_vertical, cuts_per_sheet, quantity, grammage):
+        """Calcula hojas, utilización y peso a partir de los cortes por hoja"""
         
         # Hojas requeridas
         sheets_required = math.ceil(quantity / cuts_per_sheet) if cuts_per_sheet > 0 else 0
@@ -80,3 +532,50 @@ class CuttingCalculator:
             'grammage': grammage,
             'quantity_requested': quantity
         }
+    
+    def _calculate_totals_batch(self, sheet_width, sheet_height, cut_width, cut_height,
+                                cuts_horizontal, cuts_vertical, quantity, grammage):
+        """Versión vectorizada de _calculate_totals (mismas operaciones, mismo orden)"""
+        
+        cuts_per_sheet = cuts_horizontal * cuts_vertical
+        
+        has_cuts = cuts_per_sheet > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sheets_required = np.where(has_cuts, np.ceil(quantity / np.where(has_cuts, cuts_per_sheet, 1)), 0).astype(np.int64)
+        
+        total_cuts = sheets_required * cuts_per_sheet
+        usable_cuts = np.minimum(quantity, total_cuts)
+        
+        area_per_cut = cut_width * cut_height
+        total_used_area = usable_cuts * area_per_cut
+        sheet_area = sheet_width * sheet_height
+        total_sheet_area = sheets_required * sheet_area
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization_percentage = np.where(total_sheet_area > 0, total_used_area / total_sheet_area * 100, 0.0)
+        
+        total_used_area_m2 = total_used_area / 10000  # cm² a m²
+        final_weight = total_used_area_m2 * grammage
+        
+        return {
+            'sheet_width': sheet_width,
+            'sheet_height': sheet_height,
+            'cut_width': cut_width,
+            'cut_height': cut_height,
+            'cuts_horizontal': cuts_horizontal,
+            'cuts_vertical': cuts_vertical,
+            'cuts_per_sheet': cuts_per_sheet,
+            'sheets_required': sheets_required,
+            'total_cuts': total_cuts,
+            'usable_cuts': usable_cuts,
+            'utilization_percentage': utilization_percentage,
+            'final_weight': final_weight,
+            'grammage': grammage,
+            'quantity_requested': quantity
+        }
+
+
+def _layout_task(task):
+    """Tarea de proceso: calculate_layout sin caché (la guarda el proceso principal)"""
+    sheet_width, sheet_height, cut_width, cut_height, _, _, mode = task
+    return CuttingCalculator(ResultCache(0)).calculate_layout(sheet_width, sheet_height, cut_width, cut_height, mode)
@@ -0,0 +1,195 @@
+import math
+
+import numpy as np
+
+from utils.box_calculator import CalculadorasCajas
+
+# Tolerancia para comparar medidas en centímetros con decimales
+EPSILON = 1e-9
+
+# Orden de preferencia cuando dos acomodos dan los mismos discos (el más simple de cortar primero)
+ARRANGEMENTS = ('square', 'hexagonal', 'mixed')
+
+# Separación vertical entre filas desplazadas (en pasos de disco)
+HEX_ROW_SPACING = math.sqrt(3) / 2
+
+
+def _row_counts(length, breadth, pitch):
+    """Discos por acomodo con filas a lo largo de `length` apiladas en `breadth`
+
+    Vectorizado sobre `pitch` (diámetro + separación). El acomodo mixto pone k filas
+    alineadas (cuadrícula) y sigue con filas alternadas desplazadas medio paso; k=1
+    es el hexagonal puro. Devuelve (cuadrícula, hexagonal, mixto, k del mixto).
+    """
+    aligned = np.floor((length + EPSILON) / pitch)
+    shifted = np.floor((length - pitch / 2 + EPSILON) / pitch).clip(min=0)
+    max_rows = np.floor((breadth + EPSILON) / pitch)
+    spacing = pitch * HEX_ROW_SPACING
+
+    square = aligned * max_rows
+
+    # Todas las cantidades de filas alineadas a la vez: (diámetros, k)
+    k = np.arange(1, int(max_rows.max(initial=0)) + 1)
+    valid = k[None, :] <= max_rows[:, None]
+    rest = breadth - k[None, :] * pitch[:, None]
+    shifted_rows = np.where(valid, np.floor((rest + EPSILON) / spacing[:, None]), 0).clip(min=0)
+    mixed_all = np.where(
+        valid,
+        k[None, :] * aligned[:, None]
+        + np.ceil(shifted_rows / 2) * shifted[:, None]
+        + np.floor(shifted_rows / 2) * aligned[:, None],
+        0
+    )
+
+    if mixed_all.shape[1]:
+        hexagonal = mixed_all[:, 0]
+        best_k = np.argmax(mixed_all, axis=1)
+        mixed = mixed_all[np.arange(len(pitch)), best_k]
+        best_k = best_k + 1
+    else:
+        hexagonal = mixed = np.zeros(len(pitch))
+        best_k = np.zeros(len(pitch), dtype=np.int64)
+    return square, hexagonal, mixed, best_k
+
+
+def disc_sweep(sheet_width, sheet_height, diameters, kerf=0.0):
+    """Discos por pliego para muchos diámetros a la vez (tabla de referencia)
+
+    Compara cuadrícula, hexagonal y filas mixtas, con las filas a lo largo del ancho o
+    del alto del pliego, dejando `kerf` entre discos. Devuelve un diccionario de
+    arreglos (uno por diámetro) con los discos de cada acomodo, el mejor, su nombre,
+    la dirección de las filas y la utilización.
+    """
+    diameters = np.atleast_1d(np.asarray(diameters, dtype=np.float64))
+    if np.any(diameters <= 0):
+        raise ValueError("Los diámetros deben ser mayores que cero")
+    pitch = diameters + kerf
+    # La separación se suma a cada disco y una vez al pliego
+    width, height = sheet_width + kerf, sheet_height + kerf
+
+    along_width = _row_counts(width, height, pitch)
+    along_height = _row_counts(height, width, pitch)
+
+    counts, directions, square_rows = {}, {}, {}
+    for index, name in enumerate(ARRANGEMENTS):
+        use_width = along_width[index] >= along_height[index]
+        counts[name] = np.where(use_width, along_width[index], along_height[index]).astype(np.int64)
+        directions[name] = np.where(use_width, 'horizontal', 'vertical')
+        if name == 'mixed':
+            square_rows = np.where(use_width, along_width[3], along_height[3])
+
+    stacked = np.stack([counts[name] for name in ARRANGEMENTS])
+    best_index = np.argmax(stacked, axis=0)  # en empate gana el primero de ARRANGEMENTS
+    best = stacked[best_index, np.arange(len(diameters))]
+    rows_direction = np.stack([directions[name] for name in ARRANGEMENTS])[best_index, np.arange(len(diameters))]
+
+    disc_area = np.pi * diameters ** 2 / 4
+    return {
+        'diameter': diameters,
+        'square': counts['square'],
+        'hexagonal': counts['hexagonal'],
+        'mixed': counts['mixed'],
+        'mixed_square_rows': square_rows.astype(np.int64),
+        'best': best,
+        'arrangement': np.array(ARRANGEMENTS)[best_index],
+        'rows_direction': rows_direction,
+        'utilization_percentage': best * disc_area / (sheet_width * sheet_height) * 100
+    }
+
+
+def pack_discs(sheet_width, sheet_height, diameter, kerf=0.0):
+    """Mejor acomodo de discos de un diámetro en el pliego, con la posición de cada fila"""
+    sweep = disc_sweep(sheet_width, sheet_height, [diameter], kerf)
+    result = {name: values[0].item() for name, values in sweep.items()}
+    result['rows'] = disc_rows(sheet_width, sheet_height, diameter, kerf, result['arrangement'],
+                               result['rows_direction'], result['mixed_square_rows'])
+    return result
+
+
+def disc_rows(sheet_width, sheet_height, diameter, kerf, arrangement, rows_direction='horizontal', square_rows=1):
+    """Filas de discos de un acomodo: centro de la primera (x, y), cantidad y paso
+
+    Con rows_direction='vertical' las filas corren a lo largo del alto del pliego.
+    """
+    pitch = diameter + kerf
+    length, breadth = (sheet_width, sheet_height) if rows_direction == 'horizontal' else (sheet_height, sheet_width)
+    aligned = int((length + kerf + EPSILON) // pitch)
+    shifted = max(int((length + kerf - pitch / 2 + EPSILON) // pitch), 0)
+    max_rows = int((breadth + kerf + EPSILON) // pitch)
+
+    if arrangement == 'square':
+        square_rows = max_rows
+    elif arrangement == 'hexagonal':
+        square_rows = min(1, max_rows)
+    square_rows = min(square_rows, max_rows)
+
+    rows = []
+    position = diameter / 2
+    for _ in range(square_rows):
+        rows.append((position, 0.0, aligned))
+        position += pitch
+    if arrangement != 'square' and square_rows:
+        position -= pitch
+        offset = True
+        while position + pitch * HEX_ROW_SPACING + diameter / 2 <= breadth + EPSILON:
+            position += pitch * HEX_ROW_SPACING
+            rows.append((position, pitch / 2 if offset else 0.0, shifted if offset else aligned))
+            offset = not offset
+
+    result = []
+    for across, start, count in rows:
+        if count == 0:
+            continue
+        along = diameter / 2 + start
+        if rows_direction == 'horizontal':
+            result.append({'x': along, 'y': across, 'count': count, 'step_x': pitch, 'step_y': 0.0})
+        else:
+            result.append({'x': across, 'y': along, 'count': count, 'step_x': 0.0, 'step_y': pitch})
+    return result
+
+
+def impose_round_box(parameters, box_quantity, sheet_width, sheet_height, kerf=0.0):
+    """Pliegos para las bases y tapas circulares de una tirada de cajas redondas
+
+    Compara acomodar bases y tapas en pliegos separados contra acomodar todos los
+    discos juntos con el diámetro de la tapa (el mayor), y se queda con el que use
+    menos pliegos. También informa cuántos pliegos harían falta con una cuadrícula
+    simple para ver el ahorro.
+    """
+    if box_quantity < 0:
+        raise ValueError("La cantidad de cajas no puede ser negativa")
+    pieces = CalculadorasCajas.calcular_redonda(**parameters)
+    base_diameter = pieces['base'].ancho
+    lid_diameter = pieces['tapa'].ancho
+    sweep = disc_sweep(sheet_width, sheet_height, [base_diameter, lid_diameter], kerf)
+    base, lid = (
+        {name: values[index].item() for name, values in sweep.items()} for index in range(2)
+    )
+
+    boards, shared = _round_box_boards(box_quantity, base['best'], lid['best'])
+    square_boards, _ = _round_box_boards(box_quantity, base['square'], lid['square'])
+    return {
+        'box_quantity': box_quantity,
+        'sheet_width': sheet_width,
+        'sheet_height': sheet_height,
+        'kerf': kerf,
+        'base': base,
+        'lid': lid,
+        'shared_sheets': shared,
+        'boards_required': boards,
+        'square_boards_required': square_boards
+    }
+
+
+def _round_box_boards(box_quantity, base_per_sheet, lid_per_sheet):
+    """Pliegos para bases y tapas: (pliegos, si conviene juntarlos) o (None, False) si no caben
+
+    Juntos se usa el acomodo de la tapa, que es el disco mayor.
+    """
+    if box_quantity == 0:
+        return 0, False
+    if not lid_per_sheet:
+        return None, False
+    shared = math.ceil(2 * box_quantity / lid_per_sheet)
+    separate = math.ceil(box_quantity / base_per_sheet) + math.ceil(box_quantity / lid_per_sheet)
+    return (shared, True) if shared < separate else (separate, False)
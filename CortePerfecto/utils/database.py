@@ -5,6 +5,19 @@ from datetime import datetime
 from typing import List, Dict, Optional
 import json
 
+# Plantillas de pliegos que se cargan en una base de datos nueva
+# (nombre, descripción, ancho, alto, gramaje)
+DEFAULT_TEMPLATES = [
+    ('A4', 'Papel A4 estándar', 21.0, 29.7, 80),
+    ('A3', 'Papel A3 grande', 29.7, 42.0, 80),
+    ('Carta', 'Papel Carta US', 21.6, 27.9, 80),
+    ('Legal', 'Papel Legal US', 21.6, 35.6, 80),
+    ('Tabloid', 'Papel Tabloid/A3+', 27.9, 43.2, 80),
+    ('A5', 'Papel A5 pequeño', 14.8, 21.0, 80),
+    ('A2', 'Papel A2 extra grande', 42.0, 59.4, 80),
+    ('Oficio', 'Papel Oficio', 21.6, 33.0, 80)
+]
+
 class DatabaseManager:
     """Gestor de base de datos para la calculadora de cortes"""
     
@@ -83,6 +96,30 @@ class DatabaseManager:
                     );
                 """)
                 
+                # Tabla de sobrantes (recortes reutilizables); consumed_at marca los ya usados
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS remnants (
+                        id SERIAL PRIMARY KEY,
+                        width DECIMAL(10,2) NOT NULL,
+                        height DECIMAL(10,2) NOT NULL,
+                        grammage DECIMAL(10,2) NOT NULL,
+                        source VARCHAR(100),
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        consumed_at TIMESTAMP
+                    );
+                """)
+                # Tablas creadas con gramaje entero: se pasa a decimal como el índice en memoria
+                cursor.execute("""
+                    SELECT data_type FROM information_schema.columns
+                    WHERE table_name = 'remnants' AND column_name = 'grammage';
+                """)
+                if cursor.fetchone()[0] == 'integer':
+                    cursor.execute("ALTER TABLE remnants ALTER COLUMN grammage TYPE DECIMAL(10,2);")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS remnants_available_idx
+                    ON remnants (width, height) WHERE consumed_at IS NULL;
+                """)
+                
                 conn.commit()
                 
                 # Insertar plantillas predefinidas si no existen
@@ -93,18 +130,7 @@ class DatabaseManager:
         """Inserta plantillas predefinidas si no existen"""
         cursor.execute("SELECT COUNT(*) FROM templates")
         if cursor.fetchone()[0] == 0:
-            templates = [
-                ('A4', 'Papel A4 estándar', 21.0, 29.7, 80),
-                ('A3', 'Papel A3 grande', 29.7, 42.0, 80),
-                ('Carta', 'Papel Carta US', 21.6, 27.9, 80),
-                ('Legal', 'Papel Legal US', 21.6, 35.6, 80),
-                ('Tabloid', 'Papel Tabloid/A3+', 27.9, 43.2, 80),
-                ('A5', 'Papel A5 pequeño', 14.8, 21.0, 80),
-                ('A2', 'Papel A2 extra grande', 42.0, 59.4, 80),
-                ('Oficio', 'Papel Oficio', 21.6, 33.0, 80)
-            ]
-            
-            for name, description, width, height, grammage in templates:
+            for name, description, width, height, grammage in DEFAULT_TEMPLATES:
                 cursor.execute("""
                     INSERT INTO templates (name, description, sheet_width, sheet_height, grammage)
                     VALUES (%s, %s, %s, %s, %s)
@@ -205,6 +231,49 @@ class DatabaseManager:
                 cursor.execute("DELETE FROM calculation_history")
                 return cursor.rowcount > 0
     
+    def add_remnants(self, remnants: List[Dict]) -> List[int]:
+        """Guarda sobrantes nuevos (width, height, grammage y opcionalmente source)"""
+        ids = []
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                for remnant in remnants:
+                    cursor.execute("""
+                        INSERT INTO remnants (width, height, grammage, source)
+                        VALUES (%s, %s, %s, %s)
+                        RETURNING id
+                    """, (
+                        remnant['width'],
+                        remnant['height'],
+                        remnant['grammage'],
+                        remnant.get('source')
+                    ))
+                    ids.append(cursor.fetchone()[0])
+        return ids
+    
+    def get_available_remnants(self) -> List[Dict]:
+        """Obtiene los sobrantes que todavía no se usaron"""
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute("""
+                    SELECT id, width, height, grammage, source, created_at
+                    FROM remnants
+                    WHERE consumed_at IS NULL
+                    ORDER BY id
+                """)
+                return [dict(row) for row in cursor.fetchall()]
+    
+    def consume_remnants(self, remnant_ids: List[int]) -> int:
+        """Marca sobrantes como usados y devuelve cuántos se marcaron"""
+        if not remnant_ids:
+            return 0
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE remnants SET consumed_at = CURRENT_TIMESTAMP
+                    WHERE id = ANY(%s) AND consumed_at IS NULL
+                """, (list(remnant_ids),))
+                return cursor.rowcount
+    
     def get_statistics(self) -> Dict:
         """Obtiene estadísticas generales"""
         with self.get_connection() as conn:
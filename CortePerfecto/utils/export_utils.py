@@ -1,11 +1,4 @@
-import pandas as pd
 from io import BytesIO
-import xlsxwriter
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
 from datetime import datetime
 
 class ExportUtils:
@@ -16,6 +9,9 @@ class ExportUtils:
     
     def to_excel(self, calculation_result):
         """Exporta los resultados a formato Excel"""
+        # xlsxwriter y reportlab se importan al exportar para que el cálculo no los cargue
+        import xlsxwriter
+        
         output = BytesIO()
         
         # Crear workbook y worksheet
@@ -97,6 +93,11 @@ class ExportUtils:
     
     def to_pdf(self, calculation_result):
         """Exporta los resultados a formato PDF"""
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib import colors
+        
         buffer = BytesIO()
         
         # Crear documento PDF
@@ -153,8 +154,9 @@ class ExportUtils:
         results_data = [
             ['RESULTADOS', ''],
             ['Cortes por hoja', str(calculation_result['cuts_per_sheet'])],
-            ['Cortes horizontales', str(calculation_result['cuts_horizontal'])],
-            ['Cortes verticales', str(calculation_result['cuts_vertical'])],
+            # En patrones guillotina mezclados no hay filas/columnas uniformes
+            ['Cortes horizontales', '—' if calculation_result['cuts_horizontal'] is None else str(calculation_result['cuts_horizontal'])],
+            ['Cortes verticales', '—' if calculation_result['cuts_vertical'] is None else str(calculation_result['cuts_vertical'])],
             ['Hojas requeridas', str(calculation_result['sheets_required'])],
             ['Total de cortes', str(calculation_result['total_cuts'])],
             ['Cortes utilizables', str(calculation_result['usable_cuts'])],
@@ -0,0 +1,81 @@
+import numpy as np
+
+# Las medidas se calculan en micrómetros enteros: 1 cm = 10000 µm
+MICROMETRES_PER_CM = 10000
+
+
+def to_micrometres(length):
+    """Medida en cm a micrómetros enteros (número o arreglo de NumPy)"""
+    if isinstance(length, np.ndarray):
+        return np.rint(length.astype(np.float64) * MICROMETRES_PER_CM).astype(np.int64)
+    return int(round(length * MICROMETRES_PER_CM))
+
+
+def from_micrometres(units):
+    """Micrómetros a cm (número o arreglo de NumPy)"""
+    return units / MICROMETRES_PER_CM
+
+
+def usable_size(sheet_width, sheet_height, trim=0, gripper=0):
+    """Ancho y alto aprovechables (µm) quitando el refile de los cuatro bordes y la pinza
+
+    La pinza se descuenta del alto: es el margen del borde inferior por donde la
+    máquina toma el pliego.
+    """
+    width = sheet_width - 2 * trim
+    height = sheet_height - 2 * trim - gripper
+    if isinstance(width, np.ndarray) or isinstance(height, np.ndarray):
+        return np.maximum(width, 0), np.maximum(height, 0)
+    return max(width, 0), max(height, 0)
+
+
+def pieces_along(length, piece, kerf=0):
+    """Piezas que entran en `length` (µm) dejando `kerf` entre piezas vecinas
+
+    Cada pieza ocupa piece + kerf salvo la última, que no necesita corte después.
+    Con enteros el piso es exacto: 21.0 / 0.7 da 30 y no 29.
+    """
+    return (length + kerf) // (piece + kerf)
+
+
+def grid_fit(sheet_width, sheet_height, cut_width, cut_height, kerf=0, trim=0, gripper=0):
+    """Columnas y filas de una cuadrícula uniforme en el área aprovechable (todo en µm)"""
+    width, height = usable_size(sheet_width, sheet_height, trim, gripper)
+    return pieces_along(width, cut_width, kerf), pieces_along(height, cut_height, kerf)
+
+
+def guillotine_area(sheet_width, sheet_height, cut_width, cut_height, kerf=0.0, trim=0.0, gripper=0.0):
+    """Medidas (cm) para resolver la guillotina con separación entre piezas
+
+    Sumar el kerf a cada pieza y una vez al área aprovechable convierte un patrón sin
+    separación en uno con `kerf` entre piezas vecinas. Devuelve (ancho, alto, ancho de
+    pieza, alto de pieza) ya inflados; el patrón se lleva al pliego con offset_layout.
+    """
+    kerf_units = to_micrometres(kerf)
+    width, height = usable_size(to_micrometres(sheet_width), to_micrometres(sheet_height),
+                                to_micrometres(trim), to_micrometres(gripper))
+    return (from_micrometres(width + kerf_units), from_micrometres(height + kerf_units),
+            from_micrometres(to_micrometres(cut_width) + kerf_units),
+            from_micrometres(to_micrometres(cut_height) + kerf_units))
+
+
+def offset_layout(layout, kerf=0.0, trim=0.0, gripper=0.0):
+    """Lleva un patrón resuelto con guillotine_area a coordenadas del pliego
+
+    Quita el kerf de las medidas de cada pieza (el paso entre piezas pasa a ser
+    medida + kerf) y desplaza tiras y bloques al origen del área aprovechable.
+    """
+    if not (kerf or trim or gripper):
+        return layout
+    origin_x, origin_y = trim, trim + gripper
+    strips = []
+    for strip in layout['strips']:
+        segments = [
+            dict(segment,
+                 x=segment['x'] + origin_x, y=segment['y'] + origin_y,
+                 piece_width=round(segment['piece_width'] - kerf, 4),
+                 piece_height=round(segment['piece_height'] - kerf, 4))
+            for segment in strip['segments']
+        ]
+        strips.append(dict(strip, x=strip['x'] + origin_x, y=strip['y'] + origin_y, segments=segments))
+    return dict(layout, strips=strips)
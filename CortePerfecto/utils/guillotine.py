@@ -0,0 +1,270 @@
+import time
+from functools import lru_cache
+
+# Tolerancia para comparar medidas en centímetros con decimales
+EPSILON = 1e-9
+
+
+# Direcciones de las tiras que se prueban en cada hoja
+STRIP_DIRECTIONS = ('horizontal', 'vertical')
+
+
+class TimeBudgetExceeded(Exception):
+    """La búsqueda superó el tiempo límite antes de terminar"""
+
+
+def _key(value):
+    """Normaliza una longitud para usarla como clave de memoización"""
+    return round(value, 6)
+
+
+def _check_deadline(deadline):
+    """Lanza TimeBudgetExceeded si ya pasó el tiempo límite"""
+    if deadline is not None and time.perf_counter() > deadline:
+        raise TimeBudgetExceeded()
+
+
+def _raster_points(length, sizes, deadline=None):
+    """Todas las combinaciones de medidas que caben en la longitud dada"""
+    points = {0.0}
+    frontier = [0.0]
+    while frontier:
+        next_frontier = []
+        for point in frontier:
+            _check_deadline(deadline)
+            for size in sizes:
+                candidate = _key(point + size)
+                if candidate <= length + EPSILON and candidate not in points:
+                    points.add(candidate)
+                    next_frontier.append(candidate)
+        frontier = next_frontier
+    return sorted(points)
+
+
+@lru_cache(maxsize=4096)
+def _knapsack(length, items):
+    """Mochila sin límite sobre una tira: maximiza el valor de los elementos (medida, valor)
+
+    Programación dinámica con memoización sobre la longitud restante de la tira.
+    Devuelve (valor total, cantidad usada de cada elemento).
+    """
+    return _knapsack_search(length, items)
+
+
+def _knapsack_search(length, items, deadline=None):
+    """Programación dinámica de _knapsack, sin memoizar y con tiempo límite opcional"""
+    sizes = sorted({size for size, _ in items})
+    remaining = sorted({_key(length - point) for point in _raster_points(length, sizes, deadline)})
+
+    best = {}
+    for rest in remaining:
+        _check_deadline(deadline)
+        value, choice = 0, None
+        for index, (size, item_value) in enumerate(items):
+            if item_value <= 0 or size > rest + EPSILON:
+                continue
+            previous = best.get(_key(rest - size))
+            if previous is None:
+                continue
+            candidate = item_value + previous[0]
+            if candidate > value:
+                value, choice = candidate, index
+        best[rest] = (value, choice)
+
+    # Reconstruir cuántas veces se usa cada elemento
+    counts = [0] * len(items)
+    rest = _key(length)
+    while best[rest][1] is not None:
+        index = best[rest][1]
+        counts[index] += 1
+        rest = _key(rest - items[index][0])
+
+    return best[_key(length)][0], tuple(counts)
+
+
+def _strip_frontier(length, pieces):
+    """Combinaciones máximas de columnas (una cantidad por orientación) que llenan la tira
+
+    Con dos orientaciones basta con recorrer cuántas columnas hay de la primera: el resto
+    de la tira se llena con la segunda. Cualquier otra combinación queda dominada.
+    """
+    if len(pieces) == 1:
+        return [(int((length + EPSILON) // pieces[0]),)]
+
+    first, second = pieces
+    frontier = []
+    for count_first in range(int((length + EPSILON) // first) + 1):
+        rest = length - count_first * first
+        frontier.append((count_first, int((rest + EPSILON) // second)))
+    return frontier
+
+
+def _solve_strips(length, breadth, pieces, stages, deadline=None):
+    """Resuelve el patrón con tiras a lo largo de `length` apiladas sobre `breadth`
+
+    `pieces` son las orientaciones posibles como (medida a lo largo, medida a lo ancho).
+    Con 2 etapas cada columna de la tira lleva una sola pieza; con 3 etapas las piezas
+    se apilan dentro de la columna mientras quepan en la altura de la tira.
+    """
+    across_sizes = sorted({across for _, across in pieces})
+    if stages >= 3:
+        strip_heights = [point for point in _raster_points(breadth, across_sizes, deadline) if point > 0]
+    else:
+        strip_heights = [size for size in across_sizes if size <= breadth + EPSILON]
+
+    frontier = _strip_frontier(length, [along for along, _ in pieces])
+
+    # Solo interesan las tiras que rinden más que cualquier tira más baja
+    strips = []
+    best_value = 0
+    for height in strip_heights:
+        _check_deadline(deadline)
+        stacks = []
+        for _, across in pieces:
+            if across > height + EPSILON:
+                stacks.append(0)
+            else:
+                stacks.append(int((height + EPSILON) // across) if stages >= 3 else 1)
+
+        value, counts = 0, None
+        for combination in frontier:
+            candidate = sum(count * stack for count, stack in zip(combination, stacks))
+            if candidate > value:
+                value, counts = candidate, combination
+        if value <= best_value:
+            continue
+        best_value = value
+
+        columns = tuple(
+            ((along, across, stack), count if stack else 0)
+            for (along, across), stack, count in zip(pieces, stacks, counts)
+        )
+        strips.append((height, value, columns))
+
+    if not strips:
+        return 0, []
+
+    items = tuple((height, value) for height, value, _ in strips)
+    if deadline is None:
+        total, strip_counts = _knapsack(breadth, items)
+    else:
+        total, strip_counts = _knapsack_search(breadth, items, deadline)
+
+    layout = []
+    offset = 0.0
+    for (height, value, columns), repeat in zip(strips, strip_counts):
+        for _ in range(repeat):
+            layout.append((offset, height, value, columns))
+            offset += height
+    return total, layout
+
+
+def solve_strip_direction(sheet_width, sheet_height, cut_width, cut_height, stages, direction, deadline=None):
+    """Resuelve el patrón con tiras en una sola dirección ('horizontal' o 'vertical')
+
+    Devuelve (piezas por hoja, tiras) en el formato interno que combina
+    assemble_guillotine. Cada dirección es independiente de la otra, así que se
+    pueden calcular por separado (por ejemplo en procesos distintos).
+    """
+    orientations = {(cut_width, cut_height), (cut_height, cut_width)}
+    if direction == 'horizontal':
+        # Tiras horizontales: recorren el ancho de la hoja y se apilan en el alto
+        return _solve_strips(sheet_width, sheet_height, tuple(sorted(orientations)), stages, deadline)
+    # Tiras verticales: el mismo problema con la hoja transpuesta
+    return _solve_strips(sheet_height, sheet_width, tuple(sorted((h, w) for w, h in orientations)), stages, deadline)
+
+
+def solve_guillotine(sheet_width, sheet_height, cut_width, cut_height, stages=2, deadline=None):
+    """Calcula el mejor patrón guillotina mezclando orientaciones dentro de la hoja
+
+    Prueba tiras horizontales y verticales y devuelve un diccionario con las piezas por
+    hoja, la dirección de las tiras y el detalle de cada tira en coordenadas de la hoja.
+    cuts_horizontal/cuts_vertical solo se informan cuando el patrón es una cuadrícula
+    uniforme; con orientaciones mezcladas valen None.
+    Si se indica `deadline` (según time.perf_counter) y se supera durante la búsqueda,
+    se lanza TimeBudgetExceeded.
+    """
+    if stages not in (2, 3):
+        raise ValueError("El optimizador guillotina admite 2 o 3 etapas")
+
+    solutions = {
+        direction: solve_strip_direction(sheet_width, sheet_height, cut_width, cut_height,
+                                         stages, direction, deadline)
+        for direction in STRIP_DIRECTIONS
+    }
+    return assemble_guillotine(sheet_width, sheet_height, cut_width, cut_height, stages, solutions)
+
+
+def assemble_guillotine(sheet_width, sheet_height, cut_width, cut_height, stages, solutions):
+    """Elige la mejor dirección de tiras y arma el resultado de solve_guillotine
+
+    `solutions` relaciona cada dirección con lo que devolvió solve_strip_direction.
+    Si empatan gana la horizontal.
+    """
+    horizontal_total, horizontal_layout = solutions['horizontal']
+    vertical_total, vertical_layout = solutions['vertical']
+
+    if horizontal_total >= vertical_total:
+        direction, total, layout = 'horizontal', horizontal_total, horizontal_layout
+    else:
+        direction, total, layout = 'vertical', vertical_total, vertical_layout
+
+    strips = []
+    for offset, height, value, columns in layout:
+        segments = []
+        position = 0.0
+        for (along, across, stack), repeat in columns:
+            if repeat == 0:
+                continue
+            if direction == 'horizontal':
+                segment = {
+                    'x': position, 'y': offset,
+                    'piece_width': along, 'piece_height': across,
+                    'columns': repeat, 'rows': stack
+                }
+            else:
+                segment = {
+                    'x': offset, 'y': position,
+                    'piece_width': across, 'piece_height': along,
+                    'columns': stack, 'rows': repeat
+                }
+            same_as_cut = abs(segment['piece_width'] - cut_width) <= EPSILON and abs(segment['piece_height'] - cut_height) <= EPSILON
+            segment['orientation'] = 'normal' if same_as_cut else 'rotated'
+            segment['count'] = repeat * stack
+            segments.append(segment)
+            position += along * repeat
+
+        if direction == 'horizontal':
+            strip = {'x': 0.0, 'y': offset, 'width': sheet_width, 'height': height}
+        else:
+            strip = {'x': offset, 'y': 0.0, 'width': height, 'height': sheet_height}
+        strip['count'] = value
+        strip['segments'] = segments
+        strips.append(strip)
+
+    # Si el patrón resultó ser una cuadrícula uniforme se reportan filas y columnas
+    segments = [segment for strip in strips for segment in strip['segments']]
+    orientations = {segment['orientation'] for segment in segments}
+    cuts_horizontal = cuts_vertical = None
+    if len(orientations) == 1 and len(segments) == len(strips):
+        if direction == 'horizontal' and len({segment['columns'] for segment in segments}) == 1:
+            cuts_horizontal = segments[0]['columns']
+            cuts_vertical = sum(segment['rows'] for segment in segments)
+        elif direction == 'vertical' and len({segment['rows'] for segment in segments}) == 1:
+            cuts_horizontal = sum(segment['columns'] for segment in segments)
+            cuts_vertical = segments[0]['rows']
+
+    if len(orientations) > 1:
+        orientation = 'mixed'
+    else:
+        orientation = orientations.pop() if orientations else 'normal'
+
+    return {
+        'cuts_per_sheet': total,
+        'cuts_horizontal': cuts_horizontal,
+        'cuts_vertical': cuts_vertical,
+        'orientation': orientation,
+        'strip_direction': direction,
+        'stages': stages,
+        'strips': strips
+    }
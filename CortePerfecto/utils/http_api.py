@@ -0,0 +1,361 @@
+"""API HTTP local (JSON) para las calculadoras
+
+Servidor asyncio de la biblioteca estándar con HTTP/1.1 y conexiones keep-alive. El
+bucle de eventos solo lee y escribe; los cálculos van a un pool (procesos si hay más
+de un trabajador, un hilo si no). Las peticiones que llegan mientras el pool está
+ocupado se juntan y viajan al pool en una sola tarea.
+
+Rutas (POST con un objeto JSON; la respuesta también es JSON):
+  /calculate_optimal   medidas, quantity, grammage y opcionalmente mode, kerf, trim, gripper
+  /calculate_inline    igual, sin mode
+  /calculate_batch     {"jobs": [trabajo, ...]} con las columnas de BATCH_COLUMNS
+  /boxes/<tipo>        parámetros de CalculadorasCajas para tapa_libro, tapa_suelta o redonda
+  GET /health          estado del servicio
+
+Uso (desde CortePerfecto):
+  python -m utils.http_api [--host 127.0.0.1] [--port 8600] [--workers N]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from utils.calculator import BATCH_COLUMNS, BATCH_MARGINS, CuttingCalculator
+from utils.imposition import BOX_CALCULATORS
+from utils.parallel import DEFAULT_WORKERS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8600
+
+# Peticiones que viajan juntas al pool como máximo
+DEFAULT_MAX_BATCH = 256
+
+# Segundos que una conexión keep-alive puede quedar sin peticiones
+KEEP_ALIVE_TIMEOUT = 15.0
+
+# Tamaño máximo del cuerpo de una petición (bytes)
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+OPTIMAL_FIELDS = ('sheet_width', 'sheet_height', 'cut_width', 'cut_height', 'quantity', 'grammage',
+                  'mode', 'kerf', 'trim', 'gripper')
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 501: 'Not Implemented'}
+
+
+class RequestError(ValueError):
+    """Error de la petición que se responde con un código HTTP"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------- CÁLCULOS (corren en el pool) --------------------
+
+_calculator = None
+
+
+def _get_calculator():
+    # Una calculadora por proceso: usa la caché de resultados de ese proceso
+    global _calculator
+    if _calculator is None:
+        _calculator = CuttingCalculator()
+    return _calculator
+
+
+def _fields(payload, allowed):
+    if not isinstance(payload, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    unknown = sorted(set(payload) - set(allowed))
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+    return payload
+
+
+def _calculate_optimal(payload):
+    return _get_calculator().calculate_optimal(**_fields(payload, OPTIMAL_FIELDS))
+
+
+def _calculate_inline(payload):
+    fields = tuple(name for name in OPTIMAL_FIELDS if name != 'mode')
+    return _get_calculator().calculate_inline(**_fields(payload, fields))
+
+
+def _calculate_batch(payload):
+    jobs = _fields(payload, ('jobs',)).get('jobs')
+    if not isinstance(jobs, list) or not all(isinstance(job, dict) for job in jobs):
+        raise ValueError("'jobs' debe ser una lista de objetos")
+    if not jobs:
+        return {'results': []}
+    columns = {name: np.array([job[name] for job in jobs], dtype=np.float64) for name in BATCH_COLUMNS}
+    for name in BATCH_MARGINS:
+        if any(name in job for job in jobs):
+            columns[name] = np.array([job.get(name, 0.0) for job in jobs], dtype=np.float64)
+    result = _get_calculator().calculate_batch(columns)
+    names = list(result)
+    rows = zip(*(np.asarray(result[name]).tolist() for name in names))
+    return {'results': [dict(zip(names, row)) for row in rows]}
+
+
+def _calculate_box(box_type, payload):
+    if box_type not in BOX_CALCULATORS:
+        raise RequestError(404, f"Tipo de caja desconocido: {box_type}")
+    if not isinstance(payload, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    return {'tipo': box_type, 'piezas': BOX_CALCULATORS[box_type](**payload).to_records()}
+
+
+ROUTES = {
+    '/calculate_optimal': _calculate_optimal,
+    '/calculate_inline': _calculate_inline,
+    '/calculate_batch': _calculate_batch
+}
+
+
+def run_request(path, payload):
+    """Resuelve una petición y devuelve (código HTTP, cuerpo)
+
+    Nunca lanza: las medidas inválidas se responden con 400 antes de calcular y
+    cualquier otro error con 500, así una petición mala no hace fallar a las demás
+    que viajan con ella en la misma tarea del pool.
+    """
+    try:
+        if path.startswith('/boxes/'):
+            return 200, _calculate_box(path[len('/boxes/'):], payload)
+        if path not in ROUTES:
+            return 404, {'error': f"Ruta desconocida: {path}"}
+        return 200, ROUTES[path](payload)
+    except RequestError as error:
+        return error.status, {'error': str(error)}
+    except (ValueError, TypeError, KeyError) as error:
+        return 400, {'error': f"{type(error).__name__}: {error}"}
+    except Exception as error:  # p. ej. un ArithmeticError: falla solo esta petición, no su tarea
+        return 500, {'error': f"{type(error).__name__}: {error}"}
+
+
+def run_requests(requests):
+    """Tarea del pool: varias peticiones (ruta, cuerpo) en orden"""
+    return [run_request(path, payload) for path, payload in requests]
+
+
+# -------------------- SERVIDOR --------------------
+
+class RequestBatcher:
+    """Junta las peticiones pendientes y las manda al pool en tareas de hasta `max_batch`
+
+    Hay a lo sumo una tarea en curso por trabajador; lo que llega mientras tanto espera
+    en la cola y sale en la próxima tarea, así con carga alta cada viaje al pool lleva
+    muchas peticiones y sin carga cada petición sale sola y sin demora.
+    """
+
+    def __init__(self, executor, workers, max_batch=DEFAULT_MAX_BATCH):
+        self.executor = executor
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(workers)
+        self._task = None
+        self._pending = set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def submit(self, path, payload):
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((path, payload, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._dispatch(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _dispatch(self, batch):
+        try:
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(
+                self.executor, run_requests, [(path, payload) for path, payload, _ in batch])
+        except Exception as error:  # el pool se cayó: todas las peticiones de la tarea fallan
+            results = [(500, {'error': f"{type(error).__name__}: {error}"})] * len(batch)
+        finally:
+            self._slots.release()
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class CalculatorService:
+    """Servidor HTTP de las calculadoras (ver el docstring del módulo)"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, max_batch=DEFAULT_MAX_BATCH):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.max_batch = max_batch
+        self._server = None
+        self._batcher = None
+        self._executor = None
+
+    async def start(self):
+        if self.workers > 1:
+            # 'spawn' igual que ParallelBackend: los procesos no heredan el bucle de eventos
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._batcher = RequestBatcher(self._executor, self.workers, self.max_batch)
+        self._batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            await self._batcher.stop()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                keep_alive, status, body = await self._handle_request(request_line, reader)
+                writer.write(_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ValueError:
+            # readline: línea de petición o encabezado más larga que el límite del lector
+            try:
+                writer.write(_response(400, {'error': "Línea de petición o encabezado demasiado larga"}, False))
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader):
+        """Lee encabezados y cuerpo de una petición y devuelve (keep-alive, código, cuerpo)"""
+        parts = request_line.decode('latin-1').split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if len(parts) != 3:
+            return False, 400, {'error': "Línea de petición inválida"}
+
+        method, target, version = parts
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        if 'transfer-encoding' in headers:
+            return False, 501, {'error': "Solo se admite Content-Length"}
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            return False, 400, {'error': "Content-Length inválido"}
+        if length > MAX_BODY_SIZE:
+            return False, 413, {'error': "Cuerpo demasiado grande"}
+        body = await reader.readexactly(length) if length > 0 else b''
+
+        path = target.split('?', 1)[0]
+        if path == '/health':
+            return keep_alive, 200, {'status': 'ok', 'workers': self.workers}
+        if method != 'POST':
+            return keep_alive, 405, {'error': "Usar POST con un cuerpo JSON"}
+        try:
+            payload = json.loads(body or b'{}')
+        except (json.JSONDecodeError, UnicodeDecodeError) as error:
+            return keep_alive, 400, {'error': f"JSON inválido: {error}"}
+        status, result = await self._batcher.submit(path, payload)
+        return keep_alive, status, result
+
+
+def _json_default(value):
+    """Números y arreglos de NumPy en las respuestas"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"No se puede convertir a JSON: {type(value).__name__}")
+
+
+def _response(status, body, keep_alive):
+    content = json.dumps(body, ensure_ascii=False, default=_json_default).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + content
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, max_batch=DEFAULT_MAX_BATCH):
+    """Arranca el servicio y atiende hasta que se cancela
+
+    SIGTERM cancela el servicio igual que Ctrl+C, así el pool se cierra con close()
+    y no quedan procesos de cálculo huérfanos.
+    """
+    service = await CalculatorService(host, port, workers, max_batch).start()
+    print(f"API de cálculo en http://{service.host}:{service.port} con {service.workers} trabajador(es)",
+          file=sys.stderr)
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass  # Windows: sin manejadores de señales en el bucle
+    try:
+        await service.serve_forever()
+    finally:
+        loop.remove_signal_handler(signal.SIGTERM)
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m utils.http_api', description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Procesos de cálculo (0 = todos los núcleos o CORTE_WORKERS, 1 = un hilo)")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, max(1, args.max_batch)))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import time
+
+from utils.anytime import anytime_pack
+from utils.box_calculator import GRUPO_CARTON, CalculadorasCajas
+from utils.nesting import EPSILON, RectanglePacker
+
+# Calculadora de cada tipo de caja
+BOX_CALCULATORS = {
+    'tapa_libro': CalculadorasCajas.calcular_tapa_libro,
+    'tapa_suelta': CalculadorasCajas.calcular_tapa_suelta,
+    'redonda': CalculadorasCajas.calcular_redonda
+}
+
+# Máximo de piezas que se acomodan de una sola vez; las tiradas mayores se
+# resuelven por bloques de cajas que se repiten
+DIRECT_PACK_LIMIT = 1500
+
+
+def expand_box_pieces(box_type, parameters, box_quantity, rotatable=True):
+    """Lista de piezas de cartón (ancho, alto, cantidad, rotable, clave) para una tirada de cajas
+
+    Solo se toman las piezas del método corte separado. Los discos de la caja redonda
+    se representan por su cuadrado circunscrito.
+    """
+    if box_type not in BOX_CALCULATORS:
+        raise ValueError(f"Tipo de caja desconocido: {box_type}")
+    pieces = BOX_CALCULATORS[box_type](**parameters).por_grupo(GRUPO_CARTON)
+    return [
+        (piece.ancho, piece.ancho if piece.alto is None else piece.alto,
+         piece.cantidad * box_quantity, rotatable, piece.clave)
+        for piece in pieces
+    ]
+
+
+def impose_boxes(box_type, parameters, box_quantity, sheet_width, sheet_height, kerf=0.0, rotatable=True,
+                 time_budget=None):
+    """Acomoda todas las piezas de cartón de una tirada de cajas en pliegos
+
+    Expande las piezas de cada caja respetando sus cantidades ("2 piezas"), las acomoda
+    en pliegos de sheet_width x sheet_height y devuelve el total de pliegos, los patrones
+    de corte (cada uno con cuántas veces se repite) y el desperdicio. Con `time_budget`
+    (segundos) cada acomodo prueba otros órdenes de piezas con anytime_pack mientras
+    quede tiempo y se queda con el mejor.
+    """
+    if box_quantity < 0:
+        raise ValueError("La cantidad de cajas no puede ser negativa")
+
+    packer = RectanglePacker(sheet_width, sheet_height, kerf)
+    unit_items = expand_box_pieces(box_type, parameters, 1, rotatable)
+
+    # Las piezas que no caben ni en un pliego vacío se reportan aparte
+    fits, unplaced = [], []
+    for width, height, count, can_rotate, key in unit_items:
+        fits_normal = width <= sheet_width + EPSILON and height <= sheet_height + EPSILON
+        fits_rotated = can_rotate and height <= sheet_width + EPSILON and width <= sheet_height + EPSILON
+        if fits_normal or fits_rotated:
+            fits.append((width, height, count, can_rotate, key))
+        else:
+            unplaced.append({'item': key, 'width': width, 'height': height, 'count': count * box_quantity})
+
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    patterns = _impose_units(packer, fits, box_quantity, deadline) if fits and box_quantity else []
+    patterns = _merge_patterns(patterns)
+
+    sheet_area = sheet_width * sheet_height
+    total_boards = sum(pattern['repeat'] for pattern in patterns)
+    used_area = sum(pattern['used_area'] * pattern['repeat'] for pattern in patterns)
+    board_area = total_boards * sheet_area
+
+    return {
+        'box_type': box_type,
+        'box_quantity': box_quantity,
+        'sheet_width': sheet_width,
+        'sheet_height': sheet_height,
+        'kerf': kerf,
+        'pieces_per_box': {key: count for _, _, count, _, key in unit_items},
+        'total_pieces': sum(count for _, _, count, _, _ in unit_items) * box_quantity,
+        'total_boards': total_boards,
+        'patterns': patterns,
+        'unplaced': unplaced,
+        'used_area': used_area,
+        'waste_area': board_area - used_area,
+        'utilization_percentage': (used_area / board_area * 100) if board_area > 0 else 0,
+        'waste_percentage': ((board_area - used_area) / board_area * 100) if board_area > 0 else 0
+    }
+
+
+def _pack(packer, items, deadline):
+    """Acomodo con el orden por defecto o, si hay tiempo límite, el mejor de anytime_pack"""
+    best = None
+    if deadline is not None:
+        for best in anytime_pack(packer.sheet_width, packer.sheet_height, items, packer.kerf,
+                                 deadline - time.perf_counter()):
+            pass
+    return best if best is not None else packer.pack(items)
+
+
+def _impose_units(packer, unit_items, units, deadline=None):
+    """Acomoda `units` copias de un conjunto de piezas y devuelve patrones con repetición
+
+    Si el total es pequeño se acomoda todo de una vez. Si no, se acomoda un bloque de
+    unidades, sus pliegos completos se repiten tantas veces como bloques haya y las piezas
+    del último pliego (incompleto) de cada bloque se juntan y se resuelven de la misma
+    forma, así el costo no crece con el tamaño de la tirada. `deadline` es el límite
+    compartido por todos los acomodos (ver _pack).
+    """
+    pieces_per_unit = sum(count for _, _, count, _, _ in unit_items)
+    if pieces_per_unit * units <= DIRECT_PACK_LIMIT or units <= 1:
+        return _patterns(_pack(packer, _scale(unit_items, units), deadline), 1)
+
+    block_units = max(1, DIRECT_PACK_LIMIT // pieces_per_unit)
+    blocks, rest = divmod(units, block_units)
+    block = _pack(packer, _scale(unit_items, block_units), deadline)
+
+    if block['sheets_used'] <= 1:
+        # Un bloque entero cabe en un pliego: se agranda el bloque a un pliego lleno
+        return _patterns(_pack(packer, _scale(unit_items, units), deadline), 1)
+
+    patterns = _patterns({'sheets': block['sheets'][:-1]}, blocks)
+
+    # Piezas del último pliego de cada bloque, agrupadas como una nueva unidad
+    leftover = {}
+    for placement in block['sheets'][-1]['placements']:
+        width, height = placement['width'], placement['height']
+        if placement['rotated']:
+            width, height = height, width
+        key = (width, height, placement['item'])
+        leftover[key] = leftover.get(key, 0) + 1
+    rotatable = {key: can_rotate for _, _, _, can_rotate, key in unit_items}
+    leftover_items = [
+        (width, height, count, rotatable[item], item)
+        for (width, height, item), count in leftover.items()
+    ]
+    patterns += _impose_units(packer, leftover_items, blocks, deadline)
+
+    if rest:
+        patterns += _impose_units(packer, unit_items, rest, deadline)
+    return patterns
+
+
+def _scale(unit_items, units):
+    """Multiplica las cantidades de una lista de piezas"""
+    return [(width, height, count * units, can_rotate, key) for width, height, count, can_rotate, key in unit_items]
+
+
+def _patterns(packed, repeat):
+    """Convierte las hojas de RectanglePacker en patrones que se repiten `repeat` veces"""
+    return [
+        {
+            'repeat': repeat,
+            'placements': sheet['placements'],
+            'used_area': sheet['used_area'],
+            'utilization_percentage': sheet['utilization_percentage']
+        }
+        for sheet in packed['sheets']
+    ]
+
+
+def _merge_patterns(patterns):
+    """Junta los patrones con exactamente las mismas ubicaciones sumando sus repeticiones"""
+    merged = {}
+    for pattern in patterns:
+        key = tuple(
+            (placement['x'], placement['y'], placement['width'], placement['height'], placement['item'])
+            for placement in pattern['placements']
+        )
+        if key in merged:
+            merged[key]['repeat'] += pattern['repeat']
+        else:
+            merged[key] = dict(pattern)
+    return list(merged.values())
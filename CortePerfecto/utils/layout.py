@@ -0,0 +1,138 @@
+import numpy as np
+
+# Piezas por tramo al recorrer un patrón en streaming
+DEFAULT_CHUNK_SIZE = 65536
+
+# Columnas de cada fila del arreglo de posiciones
+PLACEMENT_COLUMNS = ('x', 'y', 'width', 'height')
+
+
+class Layout:
+    """Posiciones de las piezas de una hoja sin un objeto de Python por pieza
+
+    El patrón se guarda como bloques de cuadrícula (x, y, ancho, alto, columnas, filas)
+    y las posiciones se generan bajo demanda como arreglos NumPy float32 de N x 4
+    (x, y, ancho, alto), completos, por tramos o por rebanadas. Las piezas se numeran
+    bloque por bloque y, dentro de cada bloque, columna por columna; entre piezas
+    vecinas de un bloque queda `kerf`.
+    """
+
+    def __init__(self, sheet_width, sheet_height, blocks, kerf=0.0):
+        self.sheet_width = sheet_width
+        self.sheet_height = sheet_height
+        self.kerf = kerf
+        self.blocks = np.asarray(blocks, dtype=np.float64).reshape(-1, 6)
+        counts = (self.blocks[:, 4] * self.blocks[:, 5]).astype(np.int64)
+        # Índice de la primera pieza de cada bloque (y el total al final)
+        self._starts = np.concatenate([[0], np.cumsum(counts)])
+
+    @classmethod
+    def from_result(cls, result):
+        """Layout de un resultado de cálculo: cuadrícula o guillotina con 'strips'"""
+        if result.get('strips') is not None:
+            blocks = [
+                (segment['x'], segment['y'], segment['piece_width'], segment['piece_height'],
+                 segment['columns'], segment['rows'])
+                for strip in result['strips'] for segment in strip['segments']
+            ]
+        elif result.get('cuts_per_sheet'):
+            piece_width, piece_height = result['cut_width'], result['cut_height']
+            if result.get('orientation') == 'rotated':
+                piece_width, piece_height = piece_height, piece_width
+            trim = result.get('trim', 0.0)
+            blocks = [(trim, trim + result.get('gripper', 0.0), piece_width, piece_height,
+                       result['cuts_horizontal'], result['cuts_vertical'])]
+        else:
+            blocks = []
+        return cls(result['sheet_width'], result['sheet_height'], blocks, result.get('kerf', 0.0))
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    def __getitem__(self, index):
+        """Una pieza (x, y, ancho, alto) con un entero o un arreglo N x 4 con una rebanada"""
+        if isinstance(index, slice):
+            return self._generate(np.arange(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Índice de pieza fuera del patrón")
+        return tuple(self._generate(np.array([index]))[0].tolist())
+
+    def __iter__(self):
+        """Recorre las piezas una a una generándolas por tramos"""
+        for chunk in self.iter_chunks():
+            yield from map(tuple, chunk.tolist())
+
+    def iter_chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Genera las posiciones en arreglos de hasta `chunk_size` piezas"""
+        for start in range(0, len(self), chunk_size):
+            yield self._generate(np.arange(start, min(start + chunk_size, len(self))))
+
+    def to_array(self):
+        """Todas las posiciones en un arreglo float32 de N x 4"""
+        return self._generate(np.arange(len(self)))
+
+    def piece_path(self):
+        """Contorno de todas las piezas como un solo trazo (x, y), para dibujarlas de una vez"""
+        placements = self.to_array()
+        return _rectangles_path(*placements.T)
+
+    def block_path(self):
+        """Contorno de cada bloque de cuadrícula (el área que ocupan sus piezas)"""
+        x, y, width, height, columns, rows = self.blocks.T
+        return _rectangles_path(x, y, columns * (width + self.kerf) - self.kerf,
+                                rows * (height + self.kerf) - self.kerf)
+
+    def grid_path(self):
+        """Bordes de columnas y filas de cada bloque como segmentos (x, y)
+
+        Dibuja lo mismo que los contornos de las piezas con columnas + filas segmentos por
+        bloque en lugar de columnas x filas rectángulos: sirve como vista simplificada
+        cuando hay demasiadas piezas para dibujarlas una por una.
+        """
+        xs, ys = [], []
+        for x, y, width, height, columns, rows in self.blocks:
+            right = x + columns * (width + self.kerf) - self.kerf
+            top = y + rows * (height + self.kerf) - self.kerf
+            # Con kerf cada pieza tiene dos bordes propios; sin kerf coinciden con el de la vecina
+            steps = np.arange(int(columns) + 1) * (width + self.kerf)
+            edges = np.unique(np.concatenate([x + steps[:-1], x + steps[1:] - self.kerf]))
+            xs.append(np.column_stack([edges, edges, np.full(len(edges), np.nan)]))
+            ys.append(np.column_stack([np.full(len(edges), y), np.full(len(edges), top),
+                                       np.full(len(edges), np.nan)]))
+            steps = np.arange(int(rows) + 1) * (height + self.kerf)
+            edges = np.unique(np.concatenate([y + steps[:-1], y + steps[1:] - self.kerf]))
+            xs.append(np.column_stack([np.full(len(edges), x), np.full(len(edges), right),
+                                       np.full(len(edges), np.nan)]))
+            ys.append(np.column_stack([edges, edges, np.full(len(edges), np.nan)]))
+        if not xs:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+        return (np.concatenate(xs).ravel().astype(np.float32),
+                np.concatenate(ys).ravel().astype(np.float32))
+
+    def _generate(self, indices):
+        placements = np.empty((len(indices), 4), dtype=np.float32)
+        if not len(indices):
+            return placements
+        block = np.searchsorted(self._starts, indices, side='right') - 1
+        x, y, width, height, _, rows = self.blocks[block].T
+        column, row = np.divmod(indices - self._starts[block], rows.astype(np.int64))
+        placements[:, 0] = x + column * (width + self.kerf)
+        placements[:, 1] = y + row * (height + self.kerf)
+        placements[:, 2] = width
+        placements[:, 3] = height
+        return placements
+
+
+def _rectangles_path(x, y, width, height):
+    """Rectángulos cerrados separados por NaN en dos arreglos float32 (x, y)
+
+    Plotly corta el trazo en cada NaN y, con fill='toself', rellena cada tramo por
+    separado: así miles de rectángulos son una sola traza en lugar de una forma cada uno.
+    """
+    x, y = np.asarray(x, dtype=np.float32), np.asarray(y, dtype=np.float32)
+    right, top = x + np.asarray(width, dtype=np.float32), y + np.asarray(height, dtype=np.float32)
+    gap = np.full(len(x), np.nan, dtype=np.float32)
+    return (np.column_stack([x, right, right, x, x, gap]).ravel(),
+            np.column_stack([y, y, top, top, y, gap]).ravel())
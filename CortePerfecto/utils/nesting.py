@@ -0,0 +1,316 @@
+from bisect import bisect_left, bisect_right, insort
+
+# Tolerancia para comparar medidas en centímetros con decimales
+EPSILON = 1e-9
+
+# Escalones de lado corto con que se resume el espacio libre de cada hoja
+STAIRCASE_STEPS = 32
+
+# Órdenes en que se pueden acomodar las piezas (de mayor a menor según la clave)
+PACKING_ORDERS = {
+    'max_side': lambda width, height: (max(width, height), width * height),
+    'area': lambda width, height: (width * height, max(width, height)),
+    'perimeter': lambda width, height: (width + height, width * height),
+    'width': lambda width, height: (width, height),
+    'height': lambda width, height: (height, width),
+    'min_side': lambda width, height: (min(width, height), max(width, height))
+}
+
+
+class _FreeRectangles:
+    """Rectángulos libres (MaxRects) de una hoja, indexados por ancho
+
+    Los rectángulos se guardan ordenados por ancho para descartar con bisect los que
+    son demasiado angostos; el mayor alto por sufijo dice sin recorrerlos si alguno de
+    los que quedan es lo bastante alto. `staircase` resume el espacio libre para
+    _SheetIndex: para cada escalón de `thresholds`, el mayor lado largo entre los
+    rectángulos cuyo lado corto lo alcanza.
+    """
+
+    def __init__(self, width, height, thresholds):
+        self.rects = [(width, height, 0.0, 0.0)]  # (ancho, alto, x, y)
+        self.thresholds = thresholds
+        self._update_summaries()
+
+    def can_fit(self, width, height):
+        """Indica si algún rectángulo libre admite la pieza (sin rotarla)"""
+        start = bisect_left(self.rects, (width - EPSILON,))
+        return start < len(self.rects) and height <= self._suffix_height[start] + EPSILON
+
+    def find(self, width, height):
+        """Mejor ajuste por lado corto: devuelve (x, y, sobrante_corto, sobrante_largo) o None"""
+        best = None
+        start = bisect_left(self.rects, (width - EPSILON,))
+        for free_width, free_height, x, y in self.rects[start:]:
+            if height > free_height + EPSILON:
+                continue
+            leftover_x = free_width - width
+            leftover_y = free_height - height
+            score = (min(leftover_x, leftover_y), max(leftover_x, leftover_y))
+            if best is None or score < best[2:]:
+                best = (x, y) + score
+        return best
+
+    def place(self, x, y, width, height):
+        """Ocupa el rectángulo dado y recalcula los rectángulos libres maximales"""
+        right = x + width
+        top = y + height
+        kept = []
+        created = []
+        for rect in self.rects:
+            free_width, free_height, free_x, free_y = rect
+            free_right = free_x + free_width
+            free_top = free_y + free_height
+            if (x >= free_right - EPSILON or right <= free_x + EPSILON or
+                    y >= free_top - EPSILON or top <= free_y + EPSILON):
+                kept.append(rect)
+                continue
+            # Partir el rectángulo libre en hasta cuatro rectángulos maximales
+            if x > free_x + EPSILON:
+                created.append((x - free_x, free_height, free_x, free_y))
+            if right < free_right - EPSILON:
+                created.append((free_right - right, free_height, right, free_y))
+            if y > free_y + EPSILON:
+                created.append((free_width, y - free_y, free_x, free_y))
+            if top < free_top - EPSILON:
+                created.append((free_width, free_top - top, free_x, top))
+
+        # Solo los rectángulos nuevos pueden quedar contenidos en otros
+        survivors = []
+        for index, rect in enumerate(created):
+            contained = any(
+                _contains(other, rect) for other in kept
+            ) or any(
+                _contains(other, rect) and (other != rect or other_index < index)
+                for other_index, other in enumerate(created) if other_index != index
+            )
+            if not contained:
+                survivors.append(rect)
+
+        self.rects = sorted(kept)
+        for rect in survivors:
+            insort(self.rects, rect)
+        self._update_summaries()
+
+    def _update_summaries(self):
+        # Mayor alto desde cada posición hasta el final
+        suffix = [0.0] * len(self.rects)
+        tallest = 0.0
+        for index in range(len(self.rects) - 1, -1, -1):
+            tallest = max(tallest, self.rects[index][1])
+            suffix[index] = tallest
+        self._suffix_height = suffix
+        # Mayor lado largo por escalón de lado corto (y de ahí para arriba)
+        staircase = [-1.0] * len(self.thresholds)
+        for free_width, free_height, _, _ in self.rects:
+            step = bisect_right(self.thresholds, min(free_width, free_height) + EPSILON) - 1
+            staircase[step] = max(staircase[step], max(free_width, free_height))
+        for step in range(len(staircase) - 2, -1, -1):
+            staircase[step] = max(staircase[step], staircase[step + 1])
+        self.staircase = tuple(staircase)
+
+
+def _contains(outer, inner):
+    """Indica si el rectángulo `outer` contiene por completo a `inner`"""
+    outer_width, outer_height, outer_x, outer_y = outer
+    inner_width, inner_height, inner_x, inner_y = inner
+    return (inner_x >= outer_x - EPSILON and inner_y >= outer_y - EPSILON and
+            inner_x + inner_width <= outer_x + outer_width + EPSILON and
+            inner_y + inner_height <= outer_y + outer_height + EPSILON)
+
+
+class _SheetIndex:
+    """Espacio libre de cada hoja en un árbol de segmentos
+
+    Cada hoja guarda la escalera de sus rectángulos libres (_FreeRectangles.staircase)
+    y cada nodo el máximo por escalón entre sus hojas. Encuentra en O(log hojas) la
+    primera hoja, desde una posición, con un rectángulo libre que podría admitir la
+    pieza; las demás se saltan sin mirarlas. Una hoja cerrada tiene todos los
+    escalones en -1 y ya no aparece en las búsquedas.
+    """
+
+    def __init__(self, steps):
+        self.closed = (-1.0,) * steps
+        self._size = 1
+        self._tree = [self.closed] * 2
+        self._count = 0
+
+    def append(self, staircase):
+        if self._count == self._size:
+            leaves = self._tree[self._size:] + [self.closed] * self._size
+            self._size *= 2
+            self._tree = [self.closed] * self._size + leaves
+            for node in range(self._size - 1, 0, -1):
+                self._tree[node] = tuple(map(max, self._tree[2 * node], self._tree[2 * node + 1]))
+        self._count += 1
+        self.update(self._count - 1, staircase)
+
+    def update(self, index, staircase):
+        tree = self._tree
+        node = index + self._size
+        tree[node] = staircase
+        node //= 2
+        while node:
+            tree[node] = tuple(map(max, tree[2 * node], tree[2 * node + 1]))
+            node //= 2
+
+    def first(self, start, step, long_side):
+        """Primera hoja desde `start` cuyo escalón `step` llega a `long_side`, o None"""
+        return self._first(1, 0, self._size, start, step, long_side)
+
+    def _first(self, node, low, high, start, step, long_side):
+        if high <= start or self._tree[node][step] < long_side:
+            return None
+        if high - low == 1:
+            return low
+        middle = (low + high) // 2
+        found = self._first(2 * node, low, middle, start, step, long_side)
+        if found is None:
+            found = self._first(2 * node + 1, middle, high, start, step, long_side)
+        return found
+
+
+class RectanglePacker:
+    """Empaquetador 2D de listas de piezas de distintas medidas sobre hojas iguales"""
+
+    def __init__(self, sheet_width, sheet_height, kerf=0.0):
+        if sheet_width <= 0 or sheet_height <= 0:
+            raise ValueError("Las dimensiones de la hoja deben ser mayores que cero")
+        self.sheet_width = sheet_width
+        self.sheet_height = sheet_height
+        self.kerf = kerf
+
+    def pack(self, items, order='max_side'):
+        """Acomoda las piezas en tantas hojas como hagan falta
+
+        `items` es una lista de tuplas (ancho, alto, cantidad, rotable) con una etiqueta
+        opcional como quinto elemento. Las piezas se ordenan de mayor a menor según
+        `order` (una clave de PACKING_ORDERS) y cada una va a la primera hoja abierta
+        donde quepa (mejor ajuste por lado corto dentro de la hoja). Las hojas se buscan
+        en un _SheetIndex por la escalera de sus rectángulos libres, y una hoja donde ya
+        no entra ninguna de las piezas que faltan se cierra. Devuelve un diccionario con
+        las hojas usadas, las ubicaciones por hoja y la utilización.
+        """
+        if order not in PACKING_ORDERS:
+            raise ValueError(f"Orden de acomodo desconocido: {order}")
+
+        kerf = self.kerf
+        # El corte de sierra se suma a cada pieza y una vez a la hoja
+        usable_width = self.sheet_width + kerf
+        usable_height = self.sheet_height + kerf
+
+        pieces = []
+        for index, item in enumerate(items):
+            width, height, quantity, rotatable = item[:4]
+            label = item[4] if len(item) > 4 else index
+            if width <= 0 or height <= 0:
+                raise ValueError("Las dimensiones de las piezas deben ser mayores que cero")
+            pieces.extend([(width, height, bool(rotatable), label)] * int(quantity))
+
+        sort_key = PACKING_ORDERS[order]
+        pieces.sort(key=lambda piece: sort_key(piece[0], piece[1]), reverse=True)
+
+        pieces = [
+            (width, height, rotatable, label, [
+                orientation for orientation in (
+                    [(width + kerf, height + kerf, False)] +
+                    ([(height + kerf, width + kerf, True)] if rotatable and abs(width - height) > EPSILON else [])
+                )
+                if orientation[0] <= usable_width + EPSILON and orientation[1] <= usable_height + EPSILON
+            ])
+            for width, height, rotatable, label in pieces
+        ]
+        # Lo menos que piden de ancho y de alto las piezas desde cada posición hasta el
+        # final: una hoja donde no entra ni eso se cierra
+        smallest = [None] * len(pieces)
+        bound = (float('inf'), float('inf'))
+        for position in range(len(pieces) - 1, -1, -1):
+            for placed_width, placed_height, _ in pieces[position][4]:
+                bound = (min(bound[0], placed_width), min(bound[1], placed_height))
+            smallest[position] = bound
+
+        # Escalones de lado corto en los cuantiles de las piezas: la escalera distingue
+        # bien justo las medidas que se van a consultar
+        short_sides = sorted(min(width, height) + kerf for width, height, _, _, orientations in pieces
+                             if orientations)
+        thresholds = sorted({0.0} | {short_sides[len(short_sides) * step // STAIRCASE_STEPS]
+                                     for step in range(STAIRCASE_STEPS) if short_sides})
+        sheets = []
+        index = _SheetIndex(len(thresholds))
+        unplaced = []
+        # Primera hoja que todavía podría admitir cada medida: las anteriores ya la
+        # rechazaron y nunca recuperan espacio libre
+        first_candidate = {}
+
+        for position, (width, height, rotatable, label, orientations) in enumerate(pieces):
+            if not orientations:
+                unplaced.append({'width': width, 'height': height, 'item': label})
+                continue
+
+            key = (width, height, rotatable)
+            # Escalón del lado corto de la pieza y lado largo que tiene que alcanzar
+            needed = (bisect_right(thresholds, min(width, height) + kerf + EPSILON) - 1,
+                      max(width, height) + kerf - EPSILON)
+            sheet_index = index.first(first_candidate.get(key, 0), *needed)
+            while sheet_index is not None:
+                free = sheets[sheet_index]['free']
+                best = None
+                for placed_width, placed_height, rotated in orientations:
+                    if not free.can_fit(placed_width, placed_height):
+                        continue
+                    found = free.find(placed_width, placed_height)
+                    if found and (best is None or found[2:] < best[0][2:]):
+                        best = (found, placed_width, placed_height, rotated)
+                if best is not None:
+                    break
+                if not free.can_fit(*smallest[position]):
+                    index.update(sheet_index, index.closed)
+                sheet_index = index.first(sheet_index + 1, *needed)
+
+            if sheet_index is None:
+                sheet = {'free': _FreeRectangles(usable_width, usable_height, thresholds), 'placements': [],
+                         'used_area': 0.0}
+                sheets.append(sheet)
+                index.append(index.closed)
+                sheet_index = len(sheets) - 1
+                placed_width, placed_height, rotated = orientations[0]
+                best = (sheet['free'].find(placed_width, placed_height), placed_width, placed_height, rotated)
+            self._place(sheets[sheet_index], best, width, height, label)
+            first_candidate[key] = sheet_index
+            free = sheets[sheet_index]['free']
+            following = smallest[position + 1] if position + 1 < len(pieces) else None
+            index.update(sheet_index, free.staircase if following and free.can_fit(*following) else index.closed)
+
+        sheet_area = self.sheet_width * self.sheet_height
+        used_area = sum(sheet['used_area'] for sheet in sheets)
+        return {
+            'sheet_width': self.sheet_width,
+            'sheet_height': self.sheet_height,
+            'kerf': kerf,
+            'sheets_used': len(sheets),
+            'pieces_placed': sum(len(sheet['placements']) for sheet in sheets),
+            'unplaced': unplaced,
+            'utilization_percentage': (used_area / (len(sheets) * sheet_area) * 100) if sheets else 0,
+            'sheets': [
+                {
+                    'placements': sheet['placements'],
+                    'used_area': sheet['used_area'],
+                    'utilization_percentage': sheet['used_area'] / sheet_area * 100
+                }
+                for sheet in sheets
+            ]
+        }
+
+    def _place(self, sheet, best, width, height, label):
+        """Registra la pieza en la hoja y actualiza su espacio libre"""
+        (x, y, _, _), placed_width, placed_height, rotated = best
+        sheet['free'].place(x, y, placed_width, placed_height)
+        sheet['placements'].append({
+            'x': x,
+            'y': y,
+            'width': height if rotated else width,
+            'height': width if rotated else height,
+            'rotated': rotated,
+            'item': label
+        })
+        sheet['used_area'] += width * height
@@ -0,0 +1,63 @@
+import os
+import pickle
+
+# Procesos por defecto (se puede cambiar con CORTE_WORKERS; 1 = siempre en serie)
+DEFAULT_WORKERS = int(os.getenv('CORTE_WORKERS', 0)) or (os.cpu_count() or 1)
+
+
+class ParallelBackend:
+    """Reparte cálculos independientes en un pool de procesos
+
+    `map` devuelve los resultados en el mismo orden que las tareas, así que la mezcla
+    posterior es determinista sin importar qué proceso termine primero. Con un solo
+    proceso, o si no se pueden crear procesos, todo se calcula en serie.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self._executor = None
+
+    @property
+    def serial(self):
+        return self.workers <= 1
+
+    def map(self, function, tasks):
+        """Aplica `function` a cada tarea y devuelve la lista de resultados en orden"""
+        tasks = list(tasks)
+        if self.serial or len(tasks) <= 1:
+            return [function(task) for task in tasks]
+        # multiprocessing se importa recién al usar el pool: el cálculo en serie no lo necesita
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            executor = self._get_executor()
+            chunksize = max(1, len(tasks) // (self.workers * 4))
+            return list(executor.map(function, tasks, chunksize=chunksize))
+        except (BrokenProcessPool, OSError, pickle.PicklingError):
+            # Sin procesos disponibles: se sigue en serie
+            self.shutdown()
+            self.workers = 1
+            return [function(task) for task in tasks]
+
+    def shutdown(self):
+        """Cierra el pool de procesos si está abierto"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # 'spawn' evita heredar los hilos del servidor de Streamlit
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
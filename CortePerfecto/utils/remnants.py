@@ -0,0 +1,258 @@
+import itertools
+import math
+import threading
+
+import numpy as np
+
+# Tolerancia para comparar medidas en centímetros con decimales
+EPSILON = 1e-9
+
+# Lado mínimo (cm) para que un recorte se guarde como sobrante
+MIN_REMNANT_SIDE = 10.0
+
+# Decimales del gramaje, los mismos que la columna DECIMAL(10,2) de la tabla remnants
+GRAMMAGE_DECIMALS = 2
+
+
+class RemnantIndex:
+    """Índice en memoria de sobrantes para consultas de dominancia por ancho y alto
+
+    Cada sobrante se guarda como (lado largo, lado corto): con rotación, un sobrante
+    admite una pieza si sus dos lados dominan a los de la pieza. Los arreglos están
+    ordenados por lado largo, así que una búsqueda binaria descarta los demasiado
+    cortos y el máximo de lado corto por sufijo rechaza la consulta sin recorrerlos.
+
+    El diccionario y los arreglos forman una foto inmutable que las escrituras
+    reemplazan en una sola asignación: las consultas toman la foto una vez y no
+    necesitan lock aunque otra sesión esté agregando o consumiendo sobrantes.
+    """
+
+    def __init__(self, remnants=()):
+        self._write_lock = threading.Lock()
+        # (sobrantes por id, ids, lado largo, lado corto, gramaje, máximo lado corto por sufijo)
+        self._snapshot = ({}, np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+        self.extend(remnants)
+
+    def __len__(self):
+        return len(self._snapshot[0])
+
+    def __iter__(self):
+        return iter(self._snapshot[0].values())
+
+    def __contains__(self, remnant_id):
+        return remnant_id in self._snapshot[0]
+
+    def get(self, remnant_id):
+        return self._snapshot[0].get(remnant_id)
+
+    def extend(self, remnants):
+        """Agrega sobrantes (diccionarios con id, width, height y grammage)"""
+        with self._write_lock:
+            by_id, ids, long_sides, short_sides, grammages, _ = self._snapshot
+            remnants = [remnant for remnant in remnants if remnant['id'] not in by_id]
+            if not remnants:
+                return
+            by_id = dict(by_id)
+            for remnant in remnants:
+                by_id[remnant['id']] = remnant
+            new_ids = np.array([remnant['id'] for remnant in remnants], dtype=np.int64)
+            widths = np.array([float(remnant['width']) for remnant in remnants])
+            heights = np.array([float(remnant['height']) for remnant in remnants])
+            new_grammages = np.array([_grammage(remnant.get('grammage')) for remnant in remnants])
+            new_long = np.maximum(widths, heights)
+            order = np.argsort(new_long, kind='stable')
+            positions = np.searchsorted(long_sides, new_long[order], side='right')
+            short_sides = np.insert(short_sides, positions, np.minimum(widths, heights)[order])
+            self._snapshot = (by_id,
+                              np.insert(ids, positions, new_ids[order]),
+                              np.insert(long_sides, positions, new_long[order]),
+                              short_sides,
+                              np.insert(grammages, positions, new_grammages[order]),
+                              _suffix_max(short_sides))
+
+    def add(self, remnant):
+        self.extend([remnant])
+
+    def remove(self, remnant_ids):
+        """Quita sobrantes del índice (por ejemplo al consumirlos)"""
+        with self._write_lock:
+            by_id, ids, long_sides, short_sides, grammages, _ = self._snapshot
+            remnant_ids = [remnant_id for remnant_id in remnant_ids if remnant_id in by_id]
+            if not remnant_ids:
+                return
+            removed = set(remnant_ids)
+            by_id = {remnant_id: remnant for remnant_id, remnant in by_id.items() if remnant_id not in removed}
+            keep = ~np.isin(ids, remnant_ids)
+            short_sides = short_sides[keep]
+            self._snapshot = (by_id, ids[keep], long_sides[keep], short_sides, grammages[keep],
+                              _suffix_max(short_sides))
+
+    def best_fit(self, width, height, grammage=None, exclude=()):
+        """Sobrante de menor área donde cabe la pieza (en cualquier orientación) o None"""
+        snapshot = self._snapshot
+        by_id, ids, long_sides, short_sides = snapshot[:4]
+        matches = _matches(snapshot, width, height, grammage, exclude)
+        if matches is None:
+            return None
+        areas = long_sides[matches] * short_sides[matches]
+        return by_id[int(ids[matches[np.argmin(areas)]])]
+
+    def query(self, width, height, grammage=None, exclude=()):
+        """Todos los sobrantes donde cabe la pieza, del de menor al de mayor área"""
+        snapshot = self._snapshot
+        by_id, ids, long_sides, short_sides = snapshot[:4]
+        matches = _matches(snapshot, width, height, grammage, exclude)
+        if matches is None:
+            return []
+        areas = long_sides[matches] * short_sides[matches]
+        return [by_id[int(remnant_id)] for remnant_id in ids[matches[np.argsort(areas, kind='stable')]]]
+
+
+def _grammage(value):
+    """Gramaje comparable: float redondeado como en la base de datos (Decimal, int o None)"""
+    return round(float(value or 0), GRAMMAGE_DECIMALS)
+
+
+def _matches(snapshot, width, height, grammage, exclude):
+    """Posiciones de los sobrantes de la foto que dominan la pieza, o None si no hay"""
+    _, ids, long_sides, short_sides, grammages, suffix_short = snapshot
+    long_side, short_side = max(width, height), min(width, height)
+    start = int(np.searchsorted(long_sides, long_side - EPSILON, side='left'))
+    if start >= len(long_sides) or suffix_short[start] < short_side - EPSILON:
+        return None
+    mask = short_sides[start:] >= short_side - EPSILON
+    if grammage is not None:
+        mask &= grammages[start:] == _grammage(grammage)
+    if exclude:
+        mask &= ~np.isin(ids[start:], list(exclude))
+    matches = np.flatnonzero(mask) + start
+    return matches if len(matches) else None
+
+
+def _suffix_max(short_sides):
+    # Mayor lado corto desde cada posición hasta el final
+    return np.maximum.accumulate(short_sides[::-1])[::-1]
+
+
+class RemnantStore:
+    """Inventario de sobrantes: índice en memoria respaldado por la tabla remnants
+
+    Sin base de datos (db=None) el inventario vive solo en memoria del proceso.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self._lock = threading.RLock()
+        self._local_ids = itertools.count(1)
+        remnants = db.get_available_remnants() if db is not None else []
+        self.index = RemnantIndex(remnants)
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, remnants):
+        """Guarda sobrantes nuevos y los agrega al índice"""
+        remnants = [dict(remnant) for remnant in remnants]
+        with self._lock:
+            if self.db is not None:
+                ids = self.db.add_remnants(remnants)
+            else:
+                ids = [next(self._local_ids) for _ in remnants]
+            for remnant, remnant_id in zip(remnants, ids):
+                remnant['id'] = remnant_id
+            self.index.extend(remnants)
+        return ids
+
+    def consume(self, remnant_ids):
+        """Marca sobrantes como usados y los quita del índice"""
+        remnant_ids = list(remnant_ids)
+        with self._lock:
+            if self.db is not None:
+                self.db.consume_remnants(remnant_ids)
+            self.index.remove(remnant_ids)
+
+    def apply_plan(self, plan, source=None):
+        """Registra un trabajo terminado: consume los sobrantes usados y guarda los nuevos"""
+        used_ids = [usage['remnant']['id'] for usage in plan['remnants_used']]
+        with self._lock:
+            if any(remnant_id not in self.index for remnant_id in used_ids):
+                raise ValueError("Algún sobrante del plan ya fue usado en otro trabajo; vuelve a planificar")
+            self.consume(used_ids)
+            return self.add(
+                {'width': width, 'height': height, 'grammage': plan['grammage'], 'source': source}
+                for width, height in plan['new_remnants']
+            )
+
+
+def partial_layout(result, pieces):
+    """Copia del resultado con solo las filas o tiras necesarias para `pieces` piezas
+
+    Sirve para calcular los recortes de la última hoja (o sobrante) de un trabajo,
+    que casi nunca se llena con el patrón completo.
+    """
+    if pieces >= result['cuts_per_sheet']:
+        return result
+    partial = dict(result)
+    if result.get('strips') is not None:
+        strips, count = [], 0
+        for strip in result['strips']:
+            if count >= pieces:
+                break
+            strips.append(strip)
+            count += strip['count']
+        partial['strips'] = strips
+        partial['cuts_per_sheet'] = count
+    elif result.get('cuts_horizontal'):
+        rows = math.ceil(pieces / result['cuts_horizontal'])
+        partial['cuts_vertical'] = rows
+        partial['cuts_per_sheet'] = rows * result['cuts_horizontal']
+    return partial
+
+
+def layout_offcuts(result, min_side=MIN_REMNANT_SIDE):
+    """Recortes rectangulares que sobran de una hoja con el patrón del resultado
+
+    Entiende los resultados de cuadrícula (cuts_horizontal x cuts_vertical) y los de
+    guillotina ('strips'). Devuelve una lista de (ancho, alto) con los recortes cuyos
+    dos lados miden al menos `min_side`. Con kerf cada pieza ocupa su medida más el
+    corte; el refile y la pinza de los bordes de origen no se aprovechan.
+    """
+    sheet_width, sheet_height = result['sheet_width'], result['sheet_height']
+    kerf = result.get('kerf', 0.0)
+    offcuts = []
+
+    if result.get('strips') is not None:
+        vertical = result.get('strip_direction') == 'vertical'
+        used = 0.0
+        for strip in result['strips']:
+            if vertical:
+                # Tira vertical: sobra el final de la tira arriba
+                end = max((segment['y'] + (segment['piece_height'] + kerf) * segment['rows']
+                           for segment in strip['segments']), default=0.0)
+                offcuts.append((strip['width'], sheet_height - end))
+                used = max(used, strip['x'] + strip['width'])
+            else:
+                # Tira horizontal: sobra el final de la tira a la derecha
+                end = max((segment['x'] + (segment['piece_width'] + kerf) * segment['columns']
+                           for segment in strip['segments']), default=0.0)
+                offcuts.append((sheet_width - end, strip['height']))
+                used = max(used, strip['y'] + strip['height'])
+        # Lo que queda después de la última tira
+        if vertical:
+            offcuts.append((sheet_width - used, sheet_height))
+        else:
+            offcuts.append((sheet_width, sheet_height - used))
+    elif result.get('cuts_per_sheet'):
+        piece_width, piece_height = result['cut_width'], result['cut_height']
+        if result.get('orientation') == 'rotated':
+            piece_width, piece_height = piece_height, piece_width
+        trim = result.get('trim', 0.0)
+        used_width = trim + result['cuts_horizontal'] * (piece_width + kerf)
+        used_height = trim + result.get('gripper', 0.0) + result['cuts_vertical'] * (piece_height + kerf)
+        offcuts.append((sheet_width - used_width, sheet_height))
+        offcuts.append((used_width, sheet_height - used_height))
+
+    return [
+        (round(width, 2), round(height, 2)) for width, height in offcuts
+        if width >= min_side - EPSILON and height >= min_side - EPSILON
+    ]
@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import OrderedDict
+
+from utils.fixed_point import MICROMETRES_PER_CM
+
+# Resolución de las claves: las medidas en cm se redondean a 0.1 mm
+KEY_RESOLUTION = 100
+
+# Tamaño por defecto de la caché compartida (se puede cambiar con CORTE_CACHE_SIZE)
+DEFAULT_CACHE_SIZE = 4096
+
+
+def normalize_length(value):
+    """Redondea una medida en cm a la resolución de la caché (0.1 mm)"""
+    return round(value * KEY_RESOLUTION) / KEY_RESOLUTION
+
+
+def length_key(value):
+    """Medida en cm como entero de micrómetros para las claves, redondeada a 0.1 mm"""
+    return int(round(value * KEY_RESOLUTION)) * (MICROMETRES_PER_CM // KEY_RESOLUTION)
+
+
+class ResultCache:
+    """Caché LRU acotada de resultados de cálculo, segura entre hilos
+
+    Una sola instancia se comparte entre todas las sesiones de Streamlit del proceso
+    (y cualquier otro llamador), así que los resultados se devuelven como copias
+    superficiales: las estructuras anidadas (por ejemplo 'strips') son de solo lectura.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Devuelve una copia del resultado guardado o None si no está"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, result):
+        """Guarda un resultado y descarta los menos usados si se supera el tamaño"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        """Devuelve el resultado guardado o lo calcula y lo guarda
+
+        El cálculo se hace fuera del candado para no bloquear a otras sesiones.
+        """
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def resize(self, maxsize):
+        """Cambia el tamaño máximo descartando entradas si hace falta"""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        """Vacía la caché y reinicia los contadores"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Contadores de aciertos, fallos y descartes"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'maxsize': self.maxsize
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Si hay un resultado guardado (no cuenta como acierto ni cambia el orden del LRU)"""
+        with self._lock:
+            return key in self._entries
+
+    def _evict(self):
+        while len(self._entries) > max(self.maxsize, 0):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Caché compartida por todo el proceso
+RESULT_CACHE = ResultCache(int(os.getenv('CORTE_CACHE_SIZE', DEFAULT_CACHE_SIZE)))
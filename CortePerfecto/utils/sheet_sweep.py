@@ -0,0 +1,88 @@
+import numpy as np
+
+from utils.fixed_point import to_micrometres
+
+# Tamaños de pliego que se listan por defecto como mejores opciones
+DEFAULT_TOP = 10
+
+
+def sheet_sizes(minimum, maximum, step_mm):
+    """Medidas de pliego (cm) entre `minimum` y `maximum` cada `step_mm` milímetros"""
+    if step_mm <= 0:
+        raise ValueError("El paso debe ser mayor que cero")
+    if minimum <= 0 or maximum < minimum:
+        raise ValueError("El rango de medidas no es válido")
+    count = int(round((maximum - minimum) * 10 / step_mm)) + 1
+    return np.round(minimum + np.arange(count) * step_mm / 10, 2)
+
+
+def sweep_sheet_sizes(sheet_widths, sheet_heights, cuts, top=DEFAULT_TOP):
+    """Utilización ponderada de una lista de cortes para cada tamaño de pliego de una grilla
+
+    `cuts` es una lista de (ancho, alto, peso) en centímetros; el peso puede ser la
+    demanda o la importancia de cada corte. Para cada pliego se usa la mejor
+    cuadrícula uniforme (normal o rotada) de cada corte, igual que el modo 'grid' de
+    calculate_optimal, y la utilización del pliego es el promedio ponderado de la de
+    cada corte. Todo se calcula con enteros en micrómetros y productos exteriores de
+    NumPy, un corte a la vez sobre la grilla completa.
+
+    Devuelve las medidas, la matriz de utilización (filas = altos, columnas = anchos),
+    la cantidad de cortes que no caben en cada pliego y los `top` mejores pliegos
+    donde caben todos los cortes (un pliego y su rotado cuentan una sola vez).
+    """
+    sheet_widths = np.asarray(sheet_widths, dtype=np.float64)
+    sheet_heights = np.asarray(sheet_heights, dtype=np.float64)
+    if not len(cuts):
+        raise ValueError("La lista de cortes está vacía")
+    cut_sizes = np.array([(width, height) for width, height, _ in cuts], dtype=np.float64)
+    weights = np.array([weight for _, _, weight in cuts], dtype=np.float64)
+    if np.any(cut_sizes <= 0) or np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError("Los cortes deben tener medidas mayores que cero y algún peso positivo")
+    if np.any(sheet_widths <= 0) or np.any(sheet_heights <= 0):
+        raise ValueError("Las medidas de pliego deben ser mayores que cero")
+
+    # Enteros en micrómetros: divisiones exactas
+    width_units = to_micrometres(sheet_widths)
+    height_units = to_micrometres(sheet_heights)
+    cut_units = to_micrometres(cut_sizes)
+    sheet_area = np.outer(height_units, width_units).astype(np.float64)
+
+    used_area = np.zeros(sheet_area.shape)
+    missing = np.zeros(sheet_area.shape, dtype=np.int32)
+    for (cut_width, cut_height), weight in zip(cut_units, weights / weights.sum()):
+        normal = np.outer(height_units // cut_height, width_units // cut_width)
+        rotated = np.outer(height_units // cut_width, width_units // cut_height)
+        cuts_per_sheet = np.maximum(normal, rotated)
+        used_area += weight * cuts_per_sheet * float(cut_width * cut_height)
+        missing += cuts_per_sheet == 0
+
+    utilization = used_area / sheet_area * 100
+    return {
+        'sheet_widths': sheet_widths,
+        'sheet_heights': sheet_heights,
+        'utilization_percentage': utilization,
+        'missing_cuts': missing,
+        'top': _top_sizes(sheet_widths, sheet_heights, utilization, missing, top)
+    }
+
+
+def _top_sizes(sheet_widths, sheet_heights, utilization, missing, top):
+    """Mejores pliegos donde caben todos los cortes, sin repetir un pliego rotado"""
+    candidates = np.flatnonzero(missing.ravel() == 0)
+    order = candidates[np.argsort(-utilization.ravel()[candidates], kind='stable')]
+    best, seen = [], set()
+    for position in order:
+        row, column = divmod(int(position), len(sheet_widths))
+        width, height = float(sheet_widths[column]), float(sheet_heights[row])
+        size = (min(width, height), max(width, height))
+        if size in seen:
+            continue
+        seen.add(size)
+        best.append({
+            'sheet_width': width,
+            'sheet_height': height,
+            'utilization_percentage': float(utilization[row, column])
+        })
+        if len(best) >= top:
+            break
+    return best
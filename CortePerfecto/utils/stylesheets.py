@@ -0,0 +1,106 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STATIC_CSS_PATH = os.path.join(BASE_DIR, 'static', 'styles.css')
+
+# Combinaciones de tema compiladas que se guardan (los colores son libres: sin tope crecería sin fin)
+MAX_STYLESHEETS = 64
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+# La URL puede llevar ";" (p. ej. family=Poppins:wght@300;400), así que se toma entera
+_IMPORT = re.compile(r'@import\s+(?:url\([^)]*\)|\'[^\']*\'|"[^"]*")[^;]*;')
+_WHITESPACE = re.compile(r'\s+')
+_AROUND_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+# Bloque sin llaves adentro: solo declaraciones (los selectores y @media quedan afuera)
+_DECLARATION_BLOCK = re.compile(r'\{[^{}]*\}')
+# Dentro del bloque, una propiedad viene después de "{" o ";"; en los selectores el
+# espacio antes de ":" importa ("a :hover" no es "a:hover") y no se toca
+_DECLARATION_COLON = re.compile(r'([{;][-a-zA-Z]+)\s*:\s*')
+
+
+def minify_css(css):
+    """CSS sin comentarios ni espacios de más, con los @import al principio
+
+    Los @import solo valen al comienzo de una hoja de estilos; al juntar varias hojas en
+    una se mueven arriba (sin repetir) para que el navegador no los ignore.
+    """
+    css = _COMMENT.sub('', css)
+    imports = []
+    for rule in _IMPORT.findall(css):
+        rule = _WHITESPACE.sub(' ', rule)
+        if rule not in imports:
+            imports.append(rule)
+    css = _IMPORT.sub('', css)
+    css = _WHITESPACE.sub(' ', css)
+    css = _AROUND_PUNCTUATION.sub(r'\1', css)
+    css = _DECLARATION_BLOCK.sub(lambda block: _DECLARATION_COLON.sub(r'\1:', block.group()), css)
+    css = css.replace(';}', '}')
+    return ''.join(imports) + css.strip()
+
+
+class StylesheetCompiler:
+    """Hoja de estilos de la app compilada una sola vez por combinación de tema
+
+    `render_theme(theme_mode, dark_mode, primary, secondary)` devuelve el CSS del tema;
+    la primera vez que se pide una combinación se le antepone static/styles.css, se
+    minifica y se guarda con el hash del contenido. Después cada pedido es una consulta
+    a un diccionario y todas las sesiones reciben la misma cadena ya armada. Se guardan
+    las `max_stylesheets` combinaciones usadas más recientemente (LRU).
+    """
+
+    def __init__(self, render_theme, static_css_path=STATIC_CSS_PATH, max_stylesheets=MAX_STYLESHEETS):
+        self.render_theme = render_theme
+        self.static_css_path = static_css_path
+        self.max_stylesheets = max_stylesheets
+        self._static_css = None
+        self._stylesheets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, theme_mode, dark_mode, primary, secondary):
+        """Hoja compilada: {'hash', 'css', 'html', 'source_bytes', 'bytes'}"""
+        key = (theme_mode, bool(dark_mode), primary.lower(), secondary.lower())
+        with self._lock:
+            stylesheet = self._stylesheets.get(key)
+            if stylesheet is None:
+                stylesheet = self._stylesheets[key] = self._compile(*key)
+                while len(self._stylesheets) > self.max_stylesheets:
+                    self._stylesheets.popitem(last=False)
+            else:
+                self._stylesheets.move_to_end(key)
+        return stylesheet
+
+    def report(self):
+        """Bytes antes y después de minificar, por combinación compilada"""
+        with self._lock:
+            return {
+                key: {'hash': stylesheet['hash'], 'source_bytes': stylesheet['source_bytes'],
+                      'bytes': stylesheet['bytes']}
+                for key, stylesheet in self._stylesheets.items()
+            }
+
+    def static_css(self):
+        """Contenido de static/styles.css, leído una vez (vacío si no existe)"""
+        if self._static_css is None:
+            try:
+                with open(self.static_css_path, encoding='utf-8') as source:
+                    self._static_css = source.read()
+            except OSError:
+                self._static_css = ''
+        return self._static_css
+
+    def _compile(self, theme_mode, dark_mode, primary, secondary):
+        source = self.static_css() + '\n' + self.render_theme(theme_mode, dark_mode, primary, secondary)
+        css = minify_css(source)
+        digest = hashlib.sha256(css.encode()).hexdigest()[:12]
+        return {
+            'hash': digest,
+            'css': css,
+            'html': f'<style data-stylesheet="{digest}">{css}</style>',
+            'source_bytes': len(source.encode()),
+            'bytes': len(css.encode())
+        }